@@ -0,0 +1,94 @@
+"""
+청커 벤치마크: 글자 수 슬라이딩 윈도우(sliding_window) vs 토큰 청커(token_chunks)
+
+비교 항목
+- 청크 수, 임베딩할 전체 토큰 수 (= 임베딩 API 비용)
+- 청크당 평균/최대 토큰 수
+- 처리량 (MB/s)
+
+사용법 (저장소 루트에서)
+    python -m benchmarks.chunking                 # 합성 한국어/영어 텍스트
+    python -m benchmarks.chunking <mbox 파일>      # 실제 메일 아카이브
+"""
+
+from common.config import DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_STEP, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from src.rag.chunk import sliding_window, token_chunks
+from src.utils.tokenizer import get_encoding
+from src.rag.parse import iter_mbox
+
+import sys, time, random
+
+
+def synthetic_texts(n_docs: int = 300, seed: int = 0) -> list[str]:
+    """
+    공지 메일과 비슷한 형태(문단 여러 개, 한국어/영어 문장 혼합)의 합성 문서.
+    """
+    rng = random.Random(seed)
+    ko_words = ["학생", "여러분", "장학금", "신청", "기간", "안내", "드립니다", "포스텍", "학사", "일정",
+                "변경", "사항", "확인", "바랍니다", "제출", "서류", "온라인", "접수", "문의", "학과"]
+    en_words = ["students", "please", "apply", "scholarship", "deadline", "office", "notice",
+                "POSTECH", "schedule", "submit", "documents", "online", "contact", "department"]
+
+    texts = []
+    for _ in range(n_docs):
+        paragraphs = []
+        for _ in range(rng.randint(3, 12)):
+            words = ko_words if rng.random() < 0.7 else en_words
+            sentences = [
+                " ".join(rng.choices(words, k=rng.randint(5, 25))) + rng.choice([".", "다.", "?", "!"])
+                for _ in range(rng.randint(1, 6))
+            ]
+            paragraphs.append(" ".join(sentences))
+        texts.append("\n\n".join(paragraphs))
+    return texts
+
+
+def run(name: str, texts: list[str], split) -> dict:
+    start = time.perf_counter()
+    chunks = [chunk for text in texts for chunk in split(text)]
+    elapsed = time.perf_counter() - start
+
+    token_counts = [len(t) for t in get_encoding().encode_ordinary_batch(chunks)] if chunks else [0]
+    n_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    return {
+        "name": name,
+        "chunks": len(chunks),
+        "tokens": sum(token_counts),
+        "avg_tokens": sum(token_counts) / max(len(chunks), 1),
+        "max_tokens": max(token_counts),
+        "seconds": elapsed,
+        "mb_per_s": n_bytes / 1e6 / elapsed if elapsed else float("inf"),
+    }
+
+
+def main():
+    if len(sys.argv) > 1:
+        texts = [doc.raw_text for doc in iter_mbox(sys.argv[1])]
+        source = sys.argv[1]
+    else:
+        texts = synthetic_texts()
+        source = "synthetic"
+
+    n_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    print(f"입력: {source} (문서 {len(texts)}개, {n_bytes / 1e6:.1f} MB)")
+
+    results = [
+        run(f"window({DEFAULT_CHUNK_SIZE}/{DEFAULT_CHUNK_STEP})", texts,
+            lambda t: sliding_window(t, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_STEP)),
+        run(f"token({CHUNK_MAX_TOKENS}/{CHUNK_OVERLAP_TOKENS})", texts,
+            lambda t: token_chunks(t, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)),
+    ]
+
+    print(f"{'chunker':<18}{'chunks':>9}{'tokens':>12}{'avg tok':>9}{'max tok':>9}{'sec':>8}{'MB/s':>8}")
+    for r in results:
+        print(
+            f"{r['name']:<18}{r['chunks']:>9}{r['tokens']:>12}{r['avg_tokens']:>9.0f}"
+            f"{r['max_tokens']:>9}{r['seconds']:>8.2f}{r['mb_per_s']:>8.1f}"
+        )
+
+    base, new = results
+    print(f"임베딩 토큰: {new['tokens'] / max(base['tokens'], 1):.2f}배, 청크 수: {new['chunks'] / max(base['chunks'], 1):.2f}배")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+mbox 파서 벤치마크: HTML backend("bs4", "stdlib", "lxml") × 워커 수
+
+- 합성 mbox(한국어 HTML 공지 메일)를 만들어 iter_mbox의 처리량(메일/s, MB/s)을 잰다
+- 모든 설정의 결과가 기준(bs4, 순차 처리)과 정규화 후 같은지 확인한다
+  (정규화 = 공백 문자열을 공백 하나로 합침)
+
+사용법 (저장소 루트에서)
+    python -m benchmarks.mbox                   # 합성 mbox 3000통
+    python -m benchmarks.mbox <mbox 파일>        # 실제 메일 아카이브
+"""
+
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from src.rag.parse import iter_mbox, HTML_BACKENDS
+
+import os, sys, time, random, mailbox, tempfile, importlib.util
+
+
+def make_synthetic_mbox(mbox_path: str, n_mails: int = 3000, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    words = ["학생", "여러분", "장학금", "신청", "기간", "안내", "드립니다", "포스텍", "학사", "일정",
+             "변경", "사항", "확인", "바랍니다", "제출", "서류", "온라인", "접수", "문의", "학과"]
+
+    mbox_data = mailbox.mbox(mbox_path)
+    mbox_data.lock()
+    try:
+        for i in range(n_mails):
+            rows = "".join(
+                f"<tr><td>{rng.choice(words)}</td><td>{' '.join(rng.choices(words, k=8))} &amp; 2025-{i % 12 + 1:02d}</td></tr>"
+                for _ in range(rng.randint(2, 8))
+            )
+            paragraphs = "".join(
+                f"<p style='margin:0'>{' '.join(rng.choices(words, k=rng.randint(10, 40)))}.<br/>&nbsp;</p>"
+                for _ in range(rng.randint(3, 15))
+            )
+            html = (
+                "<html><head><style>p {color: #333}</style><script>var x = 1;</script></head>"
+                f"<body><!-- notice {i} --><div><h2>공지 {i}</h2>{paragraphs}<table>{rows}</table></div></body></html>"
+            )
+            message = MIMEMultipart("alternative")
+            message["Subject"] = f"[공지] 안내 {i}"
+            message["Date"] = "Mon, 03 Mar 2025 09:00:00 +0900"
+            message["Message-ID"] = f"<bench-{i}@postech.ac.kr>"
+            message.attach(MIMEText(" ".join(rng.choices(words, k=50)), "plain", "utf-8"))
+            message.attach(MIMEText(html, "html", "utf-8"))
+            mbox_data.add(message)
+        mbox_data.flush()
+    finally:
+        mbox_data.unlock()
+        mbox_data.close()
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def main():
+    if len(sys.argv) > 1:
+        mbox_path = sys.argv[1]
+    else:
+        mbox_path = os.path.join(tempfile.mkdtemp(), "synthetic.mbox")
+        make_synthetic_mbox(mbox_path)
+    size_mb = os.path.getsize(mbox_path) / 1e6
+
+    backends = [b for b in HTML_BACKENDS if b != "lxml" or importlib.util.find_spec("lxml")]
+    workers_list = sorted({1, os.cpu_count() or 1})
+
+    baseline = None
+    print(f"입력: {mbox_path} ({size_mb:.1f} MB)")
+    print(f"{'backend':<8}{'workers':>8}{'mails':>8}{'sec':>8}{'mails/s':>10}{'MB/s':>8}  same as bs4")
+    for backend in backends:
+        for workers in workers_list:
+            start = time.perf_counter()
+            docs = [(d.doc_key, normalize(d.raw_text)) for d in iter_mbox(mbox_path, backend, workers)]
+            elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline = docs
+            same = docs == baseline
+            print(
+                f"{backend:<8}{workers:>8}{len(docs):>8}{elapsed:>8.2f}"
+                f"{len(docs) / elapsed:>10.0f}{size_mb / elapsed:>8.1f}  {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
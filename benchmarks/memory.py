@@ -0,0 +1,102 @@
+"""
+청크/임베딩 메모리 벤치마크: 이전 표현 vs 현재 표현
+
+- 이전 : pydantic Chunk 모델마다 embedding: list[float] (파이썬 float 3072개)
+- 현재 : __slots__ dataclass Chunk + 배치 단위 (n, dim) float32 numpy 배열
+         (OpenAI 응답의 base64 임베딩을 바로 float32로 읽음, src/utils/vectors.decode_embeddings)
+
+tracemalloc으로 각 표현을 만드는 동안 늘어난 메모리를 재서 청크당 바이트와 비율을 출력한다.
+임베딩 한 차원이 파이썬 float(객체 24 B + 리스트 포인터 8 B)에서 float32(4 B)가 되므로,
+3072차원 기준 약 8배 줄어든다. (청크 2000개에서 약 99 KB → 12 KB/청크)
+
+사용법 (저장소 루트에서)
+    python -m benchmarks.memory                 # 청크 2000개, 3072차원
+    python -m benchmarks.memory <청크 수> <차원>
+"""
+
+from types import SimpleNamespace
+from pydantic import BaseModel
+
+from common.types import Chunk
+from src.utils.vectors import decode_embeddings
+
+import numpy as np
+
+import sys, base64, random, tracemalloc
+
+
+class LegacyChunk(BaseModel):
+    """
+    이전 common.types.Chunk (비교용)
+    """
+    doc_id: int
+    chunk_id: int
+    body: str
+    embedding: list[float] = []
+    summary: str = ""
+
+
+def fake_response(vectors: np.ndarray) -> SimpleNamespace:
+    """
+    encoding_format="base64"로 요청한 embeddings.create 응답과 같은 모양의 객체.
+    """
+    data = [
+        SimpleNamespace(index=i, embedding=base64.b64encode(v.tobytes()).decode())
+        for i, v in enumerate(vectors)
+    ]
+    return SimpleNamespace(data=data)
+
+
+def measure(build) -> tuple[int, object]:
+    """
+    build()가 만든 객체가 살아 있는 동안의 메모리 증가량(bytes)을 반환.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    n_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 3072
+
+    rng = random.Random(0)
+    bodies = [" ".join(str(rng.random()) for _ in range(50)) for _ in range(n_chunks)]
+    vectors = np.random.default_rng(0).standard_normal((n_chunks, dim)).astype(np.float32)
+    texts = list(range(n_chunks))
+    groups = [list(range(n_chunks))]
+
+    # 이전 표현은 응답 JSON을 파싱하면서 청크마다 파이썬 float 리스트를 만들었으므로, float 객체 생성까지 측정에 포함
+    def _legacy():
+        return [
+            LegacyChunk(doc_id=0, chunk_id=i, body=body, embedding=vectors[i].tolist())
+            for i, body in enumerate(bodies)
+        ]
+
+    legacy_bytes, legacy = measure(_legacy)
+    del legacy
+
+    # 현재 표현은 응답의 base64 문자열(요청마다 잠깐 존재)에서 바로 float32 블록을 만든다
+    b64_response = fake_response(vectors)
+
+    def _compact():
+        chunks = [Chunk(doc_id=0, chunk_id=i, body=body) for i, body in enumerate(bodies)]
+        return chunks, decode_embeddings(texts, groups, [b64_response])
+
+    compact_bytes, (chunks, block) = measure(_compact)
+    assert np.array_equal(block, vectors)
+
+    # 본문 문자열은 두 표현이 공유하므로 따로 표시
+    body_bytes = sum(sys.getsizeof(b) for b in bodies)
+    print(f"청크 {n_chunks}개, {dim}차원 (본문 문자열 {body_bytes / n_chunks:,.0f} B/청크는 제외)")
+    print(f"{'representation':<32}{'MB':>10}{'bytes/chunk':>14}")
+    print(f"{'pydantic + list[float]':<32}{legacy_bytes / 1e6:>10.1f}{legacy_bytes / n_chunks:>14,.0f}")
+    print(f"{'slots + float32 block':<32}{compact_bytes / 1e6:>10.1f}{compact_bytes / n_chunks:>14,.0f}")
+    print(f"절감: {legacy_bytes / max(compact_bytes, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+PDF 파서 벤치마크: PDF backend("pdfplumber", "pypdf", "pypdfium2")
+
+- 로컬 PDF 코퍼스(디렉토리 아래 모든 .pdf)를 backend마다 parse_pdf로 파싱해 처리량(pages/s)을 잰다
+- 각 backend의 페이지별 텍스트가 기준(pdfplumber)과 얼마나 같은지 단어 단위 유사도(Dice 계수)로 비교한다
+  (페이지 구분 / 이미지 표시도 단어로 취급하므로, 페이지 수나 이미지 감지가 다르면 유사도가 떨어진다)
+- 출처(doc_source)가 기준과 다른 파일 수도 함께 보여준다
+
+사용법 (저장소 루트에서)
+    python -m benchmarks.pdf <PDF 디렉토리>
+"""
+
+from collections import Counter
+
+from src.rag.parse import parse_pdf, PDF_BACKENDS
+
+import os, sys, time, importlib.util
+
+
+# backend 이름 -> 필요한 모듈
+BACKEND_MODULES = {
+    "pdfplumber": "pdfplumber",
+    "pypdf": "pypdf",
+    "pypdfium2": "pypdfium2",
+}
+
+
+def list_pdfs(root: str) -> list[str]:
+    paths = []
+    for dir_path, _, file_names in os.walk(root):
+        paths.extend(os.path.join(dir_path, name) for name in file_names if name.lower().endswith(".pdf"))
+    return sorted(paths)
+
+
+def page_words(parsed: dict) -> str:
+    """
+    유사도 비교용 텍스트. 페이지 구분과 이미지 표시도 단어로 넣는다.
+    """
+    parts = []
+    for page in parsed["pages"]:
+        parts.append(page["text"])
+        if page["has_images"]:
+            parts.append("<IMAGE>")
+        parts.append(f"<PAGE:{page['page_num']}>")
+    return " ".join(parts)
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    단어 multiset의 Dice 계수. (1.0 = 단어 구성이 같음)
+    """
+    ca, cb = Counter(a.split()), Counter(b.split())
+    total = sum(ca.values()) + sum(cb.values())
+    if not total:
+        return 1.0
+    return 2 * sum((ca & cb).values()) / total
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    pdf_paths = list_pdfs(sys.argv[1])
+    size_mb = sum(os.path.getsize(p) for p in pdf_paths) / 1e6
+    backends = [b for b in PDF_BACKENDS if importlib.util.find_spec(BACKEND_MODULES[b])]
+
+    baseline = None
+    print(f"입력: {sys.argv[1]} (PDF {len(pdf_paths)}개, {size_mb:.1f} MB)")
+    print(f"{'backend':<12}{'pages':>8}{'sec':>8}{'pages/s':>10}{'MB/s':>8}{'similarity':>12}{'source diff':>13}{'failed':>8}")
+    for backend in backends:
+        results = {}
+        n_failed = 0
+        start = time.perf_counter()
+        for path in pdf_paths:
+            try:
+                results[path] = parse_pdf(path, backend)
+            except Exception:
+                n_failed += 1
+        elapsed = time.perf_counter() - start
+
+        n_pages = sum(len(r["pages"]) for r in results.values())
+        if baseline is None:
+            baseline = results
+        common = [p for p in results if p in baseline]
+        sim = sum(similarity(page_words(results[p]), page_words(baseline[p])) for p in common) / max(len(common), 1)
+        source_diff = sum(results[p]["doc_source"] != baseline[p]["doc_source"] for p in common)
+        print(
+            f"{backend:<12}{n_pages:>8}{elapsed:>8.2f}{n_pages / elapsed:>10.1f}{size_mb / elapsed:>8.1f}"
+            f"{sim:>12.3f}{source_diff:>13}{n_failed:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
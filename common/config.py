@@ -1,8 +1,58 @@
 # Common
 DEFAULT_CHUNK_SIZE = 1000 
 DEFAULT_CHUNK_STEP = 500    
-MAX_CHUNK_LENGTH = 1000
+CHUNK_STRATEGY = "token"   # "token" : 문장 경계 기준 토큰 청커, "window" : 글자 수 슬라이딩 윈도우 (이전 방식)
+CHUNK_MAX_TOKENS = 400     # token 청커의 청크 최대 토큰 수
+CHUNK_OVERLAP_TOKENS = 50  # token 청커에서 이전 청크와 겹치는 최대 토큰 수
+MAX_CHUNK_LENGTH = 2000    # payload에 저장할 raw_text 최대 글자 수 (영문 400토큰 청크가 잘리지 않도록)
+DEDUP_ENABLED = True       # 임베딩 전에 저정보/중복 청크를 걸러냄 (src/rag/dedup.py)
+DEDUP_THRESHOLD = 0.8      # 이 이상의 (추정) Jaccard 유사도면 유사 중복으로 봄
+DEDUP_NUM_PERM = 64        # MinHash 해시 개수
+DEDUP_BANDS = 8            # LSH 밴드 수 (밴드당 DEDUP_NUM_PERM / DEDUP_BANDS개 해시)
+DEDUP_SHINGLE_SIZE = 5     # 글자 n-gram 크기
+DEDUP_MAX_ENTRIES = 20000  # 중복 비교를 위해 기억하는 최대 청크 수 (청크당 약 2.5KB, 넘으면 비우고 다시 시작)
+MIN_CHUNK_CHARS = 30       # 의미 있는 글자가 이보다 적은 청크는 저정보 청크로 봄
 EMBED_BATCH_SIZE = 200
+EMBED_REQUEST_MAX_ITEMS = 256       # embeddings.create 한 번에 담을 최대 텍스트 수
+EMBED_REQUEST_MAX_TOKENS = 100000   # embeddings.create 한 번에 담을 최대 토큰 수
+EMBED_CACHE_PATH = "bin/cache/embedding.sqlite"
+PARSE_CACHE_PATH = "bin/cache/parse.sqlite"   # 파일 내용 해시 → 파싱 결과 캐시 (src/rag/cache.ParseCache)
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024   # 파싱 캐시 최대 크기 (압축 후), 넘으면 오래 안 쓴 항목부터 삭제
+SUMMARY_PACK_SIZE = 10   # 요약 요청 하나에 묶어 보낼 청크 수
+EXTRACTIVE_SUMMARY_MAX_CHARS = 100   # 추출 요약(textrank, lead)의 최대 길이
+
+# 소스별 요약 backend ("gpt", "textrank", "lead")
+SUMMARY_BACKEND = {
+    "word": "gpt",
+    "pdf": "gpt",
+    "mbox": "gpt",
+    "everytime": "gpt",
+}
+BATCH_DIR = "bin/batch"   # Batch API 작업 디렉토리
+BATCH_MAX_REQUESTS = 50000   # Batch API 요청 파일 하나에 담을 최대 요청 수
+MANIFEST_DIR = "bin/manifest"   # 증분 업로드용 파일 manifest (컬렉션별)
+JOURNAL_DIR = "bin/journal"   # 중단된 업로드를 이어서 진행하기 위한 체크포인트 저널
+JOB_DB_PATH = "bin/jobs/jobs.sqlite"   # 관리자 페이지의 백그라운드 업로드 작업 큐 (src/rag/jobs.py)
+JOB_MAX_WORKERS = 2   # 업로드 작업 워커 프로세스 수 (같은 컬렉션의 작업은 순서대로 처리)
+JOB_WORKER_IDLE_TIMEOUT = 300   # 워커가 이 시간(초) 동안 작업이 없으면 종료
+JOB_POLL_INTERVAL = 2.0   # 워커가 새 작업을 확인하는 간격 / 페이지의 작업 상태 갱신 간격 (초)
+URL_DOWNLOAD_DIR = "bin/downloads"   # 원본 URL 문서를 내려받아 두는 디렉토리 (update.refresh_urls)
+URL_REFRESH_CONCURRENCY = 8   # 동시에 확인할 URL 수
+HTTP_TIMEOUT = (5, 60)   # (연결, 읽기) 타임아웃 (초), 읽기 타임아웃은 전체가 아니라 청크 사이 대기 시간
+HTTP_CHUNK_SIZE = 1 << 16   # 다운로드 스트리밍 단위 (bytes)
+
+# OpenAI rate limit (계정 tier에 맞게 조정)
+OPENAI_EMBED_RPM = 3000
+OPENAI_EMBED_TPM = 1000000
+OPENAI_CHAT_RPM = 500
+OPENAI_CHAT_TPM = 200000
+RATE_LIMIT_MAX_CONCURRENCY = 32    # 동시 요청 수 상한 (실제 동시성은 지연 시간에 따라 자동 조절)
+RATE_LIMIT_TARGET_LATENCY = 10.0   # 이보다 느린 응답이 오면 동시성을 줄인다 (초)
+PIPELINE_QUEUE_SIZE = 2   # 업로드 파이프라인 단계 사이에 대기할 수 있는 최대 배치 수
+PARSE_MAX_WORKERS = None   # docx/pdf 파싱 프로세스 수 (None이면 CPU 코어 수, 1이면 순차 처리)
+MBOX_PARSE_WORKERS = None   # mbox 메일 파싱/HTML 변환 프로세스 수 (None이면 CPU 코어 수, 1이면 순차 처리)
+PDF_BACKEND = "pdfplumber"   # PDF 텍스트 추출 방식 ("pdfplumber", "pypdf", "pypdfium2"), benchmarks/pdf.py로 비교
+MBOX_HTML_BACKEND = "stdlib"   # 메일 HTML 본문 → 텍스트 변환 방식 ("bs4", "stdlib", "lxml")
 
 # Deprecated
 COLLECTION_NAME_EXP = "posplexity-demo-local"
@@ -13,6 +63,13 @@ POSTECH_COLLECTION_PROD = "posplexity-postech-prod"
 POSTECH_COLLECTION_EXP = "posplexity-postech-exp"
 POSTECH_BUCKET_NAME = "posplexity-postech"
 POSTECH_REGION_NAME = "us-east-1"
+S3_SYNC_PREFIXES = ["uploaded/", "final/"]   # Qdrant 컬렉션과 동기화할 버킷 prefix (update.sync_s3)
+S3_MAX_POOL_CONNECTIONS = 32   # 공유 S3 클라이언트의 연결 풀 크기
+S3_UPLOAD_CONCURRENCY = 8   # 동시에 업로드할 파일 수
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024   # 이 크기 이상인 파일은 multipart로 업로드
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024   # multipart 파트 크기 (파일당 메모리 사용량 ≈ 파트 크기 × 파트 동시성)
+S3_PART_CONCURRENCY = 4   # 파일 하나의 multipart 파트 동시 업로드 수
+PRESIGNED_URL_REFRESH_MARGIN = 300   # presigned URL을 만료 몇 초 전까지 재사용할지
 
 # Kaist
 KAIST_COLLECTION_PROD = "posplexity-kaist-prod"
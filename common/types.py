@@ -1,20 +1,27 @@
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 
-class Chunk(BaseModel):
+# 문서 하나에 청크가 수백 개씩 생기므로 pydantic 모델 대신 __slots__ dataclass로 가볍게 유지.
+# 임베딩은 청크에 붙이지 않고, 배치 단위 float32 numpy 배열로 다룬다 (src/rag/embedding.py)
+@dataclass(slots=True)
+class Chunk:
     doc_id: int
     chunk_id: int
     body: str
-    embedding: list[float] = []
-    summary: str=""
+    summary: str = ""
+    page_num: Optional[int] = None   # PDF 청크의 페이지 번호 (1부터)
 
 class Document(BaseModel):
     doc_id: int = -1
+    doc_key: str = ""   # 문서 고유 키 (Point ID 생성용, src/rag/ids.py)
     doc_type: str=""
     doc_title: str = ""
     doc_source: str = ""
     chunk_list: list[Chunk] = []
     raw_text: str=""
+    pages: list[dict] = []   # PDF의 페이지별 텍스트 {"page_num", "text", "has_images"} (src/rag/parse.parse_pdf)
+    doc_path: str = ""  # 원본 파일 경로 (증분 업로드 manifest 용)
 
 
 # gpt : structured output
@@ -22,4 +29,7 @@ class str_struct(BaseModel):
     output: str
 
 class intlist_struct(BaseModel):
-    output: list[int]
\ No newline at end of file
+    output: list[int]
+
+class strlist_struct(BaseModel):
+    output: list[str]
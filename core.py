@@ -80,9 +80,10 @@ def get_response(
 
         # (3) Re-ranking
         stream_caption(refinement_placeholder, "문서를 재정렬 중입니다...", 0.01)
+        # Point ID(UUID) 대신 검색 결과 순번을 id로 넘겨 재정렬 (intlist_struct 유지, 토큰 절약)
         chunk_dict = {
-            c["id"]: (c["doc_title"], c["summary"])
-            for c in found_chunks
+            idx: (c["doc_title"], c["summary"])
+            for idx, c in enumerate(found_chunks)
         }
 
         # "답변을 생성 중입니다..." 만 표시
@@ -96,9 +97,11 @@ def get_response(
         )
         reranked_ids = reranked_output.output
 
-        filtered_chunks = [c for c in found_chunks if c["id"] in reranked_ids]
-        id_to_rank = {id_: idx for idx, id_ in enumerate(reranked_ids)}
-        sorted_chunks = sorted(filtered_chunks, key=lambda x: id_to_rank[x["id"]])
+        sorted_chunks = [
+            found_chunks[idx]
+            for idx in dict.fromkeys(reranked_ids)  # 순서를 유지하며 중복 제거
+            if 0 <= idx < len(found_chunks)
+        ]
 
         # (4) 최종 RAG 컨텍스트 구성
         context_texts = [c["raw_text"] for c in sorted_chunks]
@@ -3,65 +3,56 @@
 import os
 import json
 import asyncio
+import hashlib
 
 from tqdm import tqdm
 
-# ===== Qdrant & 관련 함수들 import =====
-from common.globals import qdrant_client
-from qdrant_client import models
-from qdrant_client.models import PointStruct, ScrollResult
-
 # ===== 타입/함수들 import (upload.py에서 사용하던 것) =====
 from common.config import (
     POSTECH_COLLECTION_EXP,
     POSTECH_COLLECTION_PROD,
     EMBED_BATCH_SIZE,
+    EMBED_CACHE_PATH,
+    BATCH_DIR,
+    JOURNAL_DIR,
+    MANIFEST_DIR,
+)
+from src.rag.pipeline import run_pipeline, batched
+from src.rag.manifest import load_manifest, save_manifest
+from src.rag.journal import IngestJournal
+from src.rag.cache import EmbeddingCache
+from src.utils.ratelimit import embedding_limiter, chat_limiter
+from src.rag.summary import async_summarize, resolve_backend
+from src.rag.ids import make_point_id
+from src.rag.batch import (
+    batch_job_exists,
+    write_batch_requests,
+    submit_batch_job,
+    collect_batch_job,
+    upsert_batch_results,
 )
-from src.llm.gpt.inference import async_run_gpt
-from src.rag.embedding import async_openai_embedding
-from common.types import str_struct
-from src.utils.utils import async_wrapper
-
 
-def get_max_point_id(collection_name: str) -> int:
-    """
-    해당 collection에 존재하는 Point 중 가장 큰 ID를 반환.
-    만약 컬렉션이 비어있으면 0을 반환.
-    """
-    max_id = 0
-    scroll_offset = None
 
-    # 한번에 1000개씩 스크롤
-    while True:
-        result: ScrollResult = qdrant_client.scroll(
-            collection_name=collection_name,
-            offset=scroll_offset,
-            limit=1000,
-            with_vectors=False,
-        )
-        for point in result[0]:
-            if point.id > max_id:
-                max_id = point.id
+EVERYTIME_DATA_PATH = "bin/everytime/free.jsonl"
 
-        if result[1] is None:
-            break
-        scroll_offset = result[1]
 
-    return max_id
+def iter_everytime_data(data_path: str = EVERYTIME_DATA_PATH):
+    """
+    free.jsonl 파일에 들어있는 게시글(및 댓글들)을 한 줄씩 읽어 yield.
+    파일 전체를 메모리에 올리지 않는다.
+    """
+    with open(data_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
 
-def get_everytime_data():
+def get_everytime_data(data_path: str = EVERYTIME_DATA_PATH):
     """
     bin/everytime/free.jsonl 파일에 들어있는 
     게시글(및 댓글들)을 리스트 형태로 반환
     """
-    full_data = []
-    with open("bin/everytime/free.jsonl", "r", encoding="utf-8") as f:
-        for line in f:
-            data = json.loads(line)
-            full_data.append(data)
-
-    return full_data
+    return list(iter_everytime_data(data_path))
 
 
 def parse_pretty(data):
@@ -69,18 +60,21 @@ def parse_pretty(data):
     에브리타임 댓글 형식을 사람이 보기 편한 문자열로 변환.
     + doc_title, doc_source 등을 함께 반환
     """
+    # parent_id → 대댓글 목록 (원래 순서 유지). 댓글 수에 선형
+    replies = {}
+    for comment in data["comments"]:
+        if comment["parent_id"] != "0":
+            replies.setdefault(comment["parent_id"], []).append(comment)
+
     formatted_comments = []
     comment_num = 1
 
     for comment in data["comments"]:
         if comment["parent_id"] == "0":  # 메인 댓글
             formatted_comments.append(f"{comment_num}. {comment['text']}")
-            # 해당 메인 댓글의 대댓글 찾기
-            reply_num = 1
-            for reply in data["comments"]:
-                if reply["parent_id"] == comment["comment_id"]:
-                    formatted_comments.append(f"{comment_num}-{reply_num}. {reply['text']}")
-                    reply_num += 1
+            # 해당 메인 댓글의 대댓글
+            for reply_num, reply in enumerate(replies.get(comment["comment_id"], []), start=1):
+                formatted_comments.append(f"{comment_num}-{reply_num}. {reply['text']}")
             comment_num += 1
 
     comments = "\n".join(formatted_comments)
@@ -93,10 +87,113 @@ def parse_pretty(data):
     return payload_data
 
 
-def upload_everytime_data(dev: bool = True):
+def post_hash(raw_text: str) -> str:
+    """
+    게시글 본문 + 댓글(parse_pretty의 raw_text)의 sha256.
+    본문이나 댓글이 바뀌면 값이 달라진다.
+    """
+    return hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+
+
+def iter_everytime_docs(data_path: str = EVERYTIME_DATA_PATH):
+    """
+    에브리타임 게시글마다 parse_pretty를 적용한 dict를 yield.
+    - doc_key : 게시글 URL 기반의 고유 키 (Point ID 생성용, manifest 키)
+    - doc_id  : 이번 실행 안에서의 순번 (Batch API custom_id 등에 사용)
+    - hash    : 본문 + 댓글 해시 (증분 업로드용)
+    """
+    # 2~3. 에브리타임 데이터를 한 줄씩 읽어 parse_pretty 적용 (한 게시글 = 하나의 문서)
+    for i, item in enumerate(iter_everytime_data(data_path)):
+        parsed = parse_pretty(item)  # title, source, raw_text
+        yield {
+            "doc_id": i,
+            "doc_key": f"everytime:{parsed['doc_source']}",
+            "title": parsed["doc_title"],
+            "source": parsed["doc_source"],
+            "body": parsed["raw_text"],   # 임베딩/요약 대상
+            "hash": post_hash(parsed["raw_text"]),
+        }
+
+
+def load_everytime_docs() -> list[dict]:
+    """
+    iter_everytime_docs의 결과를 리스트로 반환.
+    """
+    return list(iter_everytime_docs())
+
+
+def filter_changed_docs(doc_infos, manifest: dict, stats: dict):
+    """
+    manifest(doc_key → {"hash", "point_ids"})와 비교해 새 게시글이나
+    본문/댓글이 바뀐 게시글만 yield. stats에 new / changed / unchanged 개수를 센다.
+    """
+    for key in ("new", "changed", "unchanged"):
+        stats.setdefault(key, 0)
+
+    for item in doc_infos:
+        entry = manifest.get(item["doc_key"])
+        if entry is None:
+            stats["new"] += 1
+        elif entry["hash"] != item["hash"]:
+            stats["changed"] += 1
+        else:
+            stats["unchanged"] += 1
+            continue
+        yield item
+
+
+def make_payload(item: dict) -> dict:
+    """
+    Qdrant Point에 저장할 payload (요약 제외).
+    """
+    return {
+        "doc_title": item["title"],
+        "doc_source": item["source"],
+        "raw_text": item["body"],   # 원문 (길면 잘라서 저장하는 것도 가능)
+        "filter": "everytime"
+    }
+
+
+def make_unit(item: dict, summary_backend: str) -> dict:
+    """
+    게시글 하나의 업로드 단위(unit). (src/rag/pipeline.py, src/rag/batch.py 공용 형식)
+    """
+    return {
+        "point_id": make_point_id(item["doc_key"], 0),   # 게시글 하나 = 청크 하나
+        "doc_id": item["doc_id"],
+        "doc_key": item["doc_key"],
+        "chunk_id": 0,
+        "body": item["body"],
+        "payload": make_payload(item),
+        "summary_backend": summary_backend,
+        "hash": item["hash"],
+    }
+
+
+def make_units(doc_info_list: list[dict], summary_backend: str) -> list[dict]:
+    """
+    게시글마다 업로드 단위(unit)를 만든다.
+    """
+    return [make_unit(item, summary_backend) for item in doc_info_list]
+
+
+def upload_everytime_data(
+    dev: bool = True,
+    use_cache: bool = True,
+    summary_backend: str = None,
+    force: bool = False,
+):
     """
     에브리타임 데이터를 읽어서 요약/임베딩 후 Qdrant에 업서트한다.
-    (일회성 사용을 가정)
+    use_cache=True면 로컬 임베딩 캐시(EMBED_CACHE_PATH)를 먼저 조회한다.
+    summary_backend: "gpt", "textrank", "lead" 중 하나. None이면 SUMMARY_BACKEND["everytime"].
+    중단된 뒤 다시 실행하면 체크포인트 저널(JOURNAL_DIR)을 보고 이미 업서트된 게시글은 건너뛴다.
+
+    증분 업로드 (MANIFEST_DIR/<컬렉션>-everytime.json)
+    - free.jsonl은 한 줄씩 읽어 배치 단위로 파이프라인에 흘려보낸다
+    - 본문과 댓글이 그대로인 게시글은 건너뛰고, 새 게시글이나 바뀐 게시글만 다시 임베딩/업서트한다
+      (Point ID가 게시글 URL로 정해지므로 바뀐 게시글은 같은 Point를 덮어쓴다)
+    - force=True면 모든 게시글을 다시 업로드한다
     """
     # 0. 어떤 컬렉션에 업로드할지 결정 (dev / prod)
     if dev:
@@ -104,78 +201,97 @@ def upload_everytime_data(dev: bool = True):
     else:
         COLLECTION_NAME = POSTECH_COLLECTION_PROD
 
-    # 1. Qdrant 컬렉션에서 현재 존재하는 max point ID 찾기
-    existing_max_id = get_max_point_id(COLLECTION_NAME)
-    next_doc_id_start = (existing_max_id // 1000) + 1
+    # 1~3. 에브리타임 데이터를 스트리밍으로 읽고, manifest와 비교해 바뀐 게시글만 고르기
+    manifest_path = os.path.join(MANIFEST_DIR, f"{COLLECTION_NAME}-everytime.json")
+    manifest = load_manifest(manifest_path)
+    diff_stats = {}
+    doc_infos = filter_changed_docs(iter_everytime_docs(), {} if force else manifest, diff_stats)
 
-    # 2. 에브리타임 데이터 읽기
-    data_list = get_everytime_data()
+    # 4. 업로드 단위 만들기 → EMBED_BATCH_SIZE개씩 파이프라인으로 임베딩/요약/업서트
+    backend = resolve_backend("everytime", summary_backend)
+    units = (make_unit(item, backend) for item in doc_infos)
+    embedding_cache = EmbeddingCache(EMBED_CACHE_PATH) if use_cache else None
 
-    # 3. 각 json에 대해 parse_pretty를 거쳐야 할 정보를 추출
-    #    doc_id를 next_doc_id_start + i 로 지정 (한 게시글 = 하나의 문서)
-    doc_info_list = []
-    for i, item in enumerate(data_list):
-        doc_id = next_doc_id_start + i
-        parsed = parse_pretty(item)  # title, source, raw_text
-        doc_info_list.append({
-            "doc_id": doc_id,
-            "title": parsed["doc_title"],
-            "source": parsed["doc_source"],
-            "body": parsed["raw_text"],   # 임베딩/요약 대상
-        })
-
-    # 4. batch 단위로 임베딩 + 요약 + 업서트
-    total_docs = len(doc_info_list)
-    with tqdm(total=total_docs, desc="Embedding & Summarizing") as pbar:
-        for start_idx in range(0, total_docs, EMBED_BATCH_SIZE):
-            batch = doc_info_list[start_idx : start_idx + EMBED_BATCH_SIZE]
-
-            # (a) 임베딩 생성 (비동기)
-            embedding_tasks = [async_openai_embedding(item["body"]) for item in batch]
-            embedding_results = asyncio.run(async_wrapper(embedding_tasks))
-
-            # (b) 요약 생성 (비동기)
-            summary_tasks = [async_run_gpt(item["body"], "make_summary.json", str_struct) for item in batch]
-            summary_results = asyncio.run(async_wrapper(summary_tasks))
-
-            # (c) Qdrant 업서트할 PointStruct 리스트 만들기
-            points_to_upsert = []
-            for (item, emb, summ) in zip(batch, embedding_results, summary_results):
-                # ID = doc_id * 1000 (chunk_id = 0 가정)
-                point_id = item["doc_id"] * 1000
-
-                payload_data = {
-                    "doc_title": item["title"],
-                    "doc_source": item["source"],
-                    "raw_text": item["body"],   # 원문 (길면 잘라서 저장하는 것도 가능)
-                    "summary": summ,
-                    "filter":"everytime"
-                }
-
-                points_to_upsert.append(
-                    PointStruct(
-                        id=point_id,
-                        vector=emb, 
-                        payload=payload_data
-                    )
-                )
+    journal = IngestJournal(os.path.join(JOURNAL_DIR, f"{COLLECTION_NAME}-everytime.jsonl"))
+    if journal.status()["upserted"]:
+        print(f"중단된 업로드를 이어서 진행합니다: {journal.status()}")
+    journal.start_run(force=force)
+
+    with tqdm(desc="Embedding & Summarizing", unit="post") as pbar:
+        def _on_upserted(batch):
+            # manifest에 게시글별 hash, point_id 기록
+            for unit in batch:
+                manifest[unit["doc_key"]] = {"hash": unit["hash"], "point_ids": [unit["point_id"]]}
+
+            pbar.update(len(batch))
+            if embedding_cache:
+                pbar.set_postfix(embedding_cache.stats())
 
-            # (d) 업서트 실행
-            try:
-                qdrant_client.upsert(
-                    collection_name=COLLECTION_NAME,
-                    points=points_to_upsert
+        try:
+            asyncio.run(
+                run_pipeline(
+                    batched(units, EMBED_BATCH_SIZE),
+                    COLLECTION_NAME,
+                    embedding_cache=embedding_cache,
+                    on_upserted=_on_upserted,
+                    journal=journal,
                 )
-                pbar.update(len(points_to_upsert))
-            except:
-                # 혹시 대량 업서트 에러 시, 소규모로 재시도
-                for small_start in range(0, len(points_to_upsert), 5):
-                    small_batch = points_to_upsert[small_start : small_start + 5]
-                    qdrant_client.upsert(
-                        collection_name=COLLECTION_NAME,
-                        points=small_batch
-                    )
-                    pbar.update(len(small_batch))
+            )
+        finally:
+            # 중간에 실패해도 업서트까지 끝난 게시글은 다음 실행에서 건너뛰도록 저장
+            save_manifest(manifest_path, manifest)
+
+    print(
+        f"신규 {diff_stats['new']}개 / 변경 {diff_stats['changed']}개 / "
+        f"유지 {diff_stats['unchanged']}개"
+    )
+
+    journal.finish_run()
+    journal.close()
+
+    if embedding_cache:
+        print(f"임베딩 캐시: {embedding_cache.stats()}")
+        embedding_cache.close()
+    print(f"API 호출: 임베딩 {embedding_limiter.stats()} / 요약 {chat_limiter.stats()}")
+
+
+def export_everytime_batch(job_name: str = "everytime", summary_backend: str = None) -> dict:
+    """
+    에브리타임 데이터 전체를 OpenAI Batch API 요청 파일로 만들고 제출한다.
+    이미 요청 파일이 만들어진 작업이면 미제출 파일만 제출한다.
+    gpt가 아닌 요약 backend를 쓰면 여기서 바로 요약해 payload에 넣는다.
+    """
+    job_dir = os.path.join(BATCH_DIR, job_name)
+
+    if not batch_job_exists(job_dir):
+        doc_info_list = load_everytime_docs()
+
+        backend = resolve_backend("everytime", summary_backend)
+        units = make_units(doc_info_list, backend)
+        if backend != "gpt":
+            summaries = asyncio.run(async_summarize([u["body"] for u in units], backend))
+            for unit, summ in zip(units, summaries):
+                unit["payload"]["summary"] = summ.model_dump()
+
+        write_batch_requests(units, job_dir)
+
+    return submit_batch_job(job_dir)
+
+
+def import_everytime_batch(job_name: str = "everytime", dev: bool = True):
+    """
+    export_everytime_batch로 제출한 작업이 끝났으면 결과를 Qdrant에 업서트한다.
+    """
+    COLLECTION_NAME = POSTECH_COLLECTION_EXP if dev else POSTECH_COLLECTION_PROD
+    job_dir = os.path.join(BATCH_DIR, job_name)
+
+    if not collect_batch_job(job_dir):
+        print("아직 완료되지 않은 batch가 있습니다. 나중에 다시 실행해 주세요.")
+        return None
+
+    stats = upsert_batch_results(job_dir, COLLECTION_NAME)
+    print(f"Batch 업서트 결과: {stats}")
+    return stats
 
 
 if __name__ == "__main__":
@@ -183,8 +299,14 @@ if __name__ == "__main__":
     # dev=True  => POSTECH_COLLECTION_EXP 컬렉션에 업서트
     # dev=False => POSTECH_COLLECTION_PROD 컬렉션에 업서트
     upload_everytime_data(dev=False)
+    # LLM 요약 없이 추출 요약만 사용하려면:
+    # upload_everytime_data(dev=False, summary_backend="textrank")
+
+    # 대량 backfill은 Batch API로 처리 (요청 파일 생성/제출 후, 완료되면 업서트)
+    # export_everytime_batch(job_name="everytime")
+    # import_everytime_batch(job_name="everytime", dev=False)
 
     # 혹은 테스트만 간단히 하고 싶다면:
-    # data = get_everytime_data()
-    # parsed_example = parse_pretty(data[0])
+    # data = next(iter_everytime_data())
+    # parsed_example = parse_pretty(data)
     # print(parsed_example)
\ No newline at end of file
@@ -0,0 +1,452 @@
+"""
+OpenAI Batch API를 이용한 대량 업로드(backfill)용 모듈.
+
+작업 디렉토리(job_dir) 구조
+- mapping.jsonl            : custom_id -> (point_id, doc_id, chunk_id, payload)
+- embeddings-000.jsonl ... : /v1/embeddings 요청 파일
+- summaries-000.jsonl ...  : /v1/chat/completions 요청 파일
+- state.json               : 요청 파일별 file_id, batch_id, 상태, 결과/에러 파일 경로, 실패한 batch 기록
+                             + 원본 파일별 hash (증분 업로드 manifest 용)
+- results/                 : 다운로드한 결과 파일 (<요청 파일>, 에러는 <요청 파일>.errors.jsonl)
+- upserted.txt             : Qdrant에 업서트 완료된 custom_id (append-only)
+
+모든 단계는 state.json / upserted.txt를 보고 이미 끝난 작업을 건너뛰므로,
+중간에 중단되더라도 같은 함수를 다시 호출하면 이어서 진행된다.
+"""
+
+from typing import Iterator, Optional
+from qdrant_client.models import PointStruct
+from openai import OpenAI
+from pydantic import ValidationError
+
+from common.types import str_struct
+from common.config import BATCH_MAX_REQUESTS, EMBED_BATCH_SIZE
+from common.globals import qdrant_client
+from src.rag.embedding import openai_embedding_batch
+from src.rag.summary import async_summarize
+
+import os, json, asyncio
+
+client = OpenAI()
+prompt_base_path = "src/llm/prompt"
+
+# 결과 없이 끝나는 batch 상태 (요청 파일을 다시 제출해야 함)
+RETRY_STATUSES = ("failed", "expired", "cancelled")
+
+
+def make_custom_id(doc_id: int, chunk_id: int) -> str:
+    return f"{doc_id}-{chunk_id}"
+
+
+def batch_job_exists(job_dir: str) -> bool:
+    """
+    요청 파일과 매핑이 이미 만들어진 작업인지 확인.
+    """
+    return os.path.exists(os.path.join(job_dir, "mapping.jsonl"))
+
+
+def load_state(job_dir: str) -> dict:
+    state_path = os.path.join(job_dir, "state.json")
+    if not os.path.exists(state_path):
+        return {"parts": {}}
+    with open(state_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(job_dir: str, state: dict) -> None:
+    state_path = os.path.join(job_dir, "state.json")
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def load_prompt(prompt_in_path: str) -> dict:
+    with open(
+        os.path.join(prompt_base_path, prompt_in_path), "r", encoding="utf-8"
+    ) as file:
+        return json.load(file)
+
+
+def build_summary_body(text: str, prompt_dict: dict, gpt_model: str = "gpt-4o-mini") -> dict:
+    """
+    async_run_gpt와 같은 프롬프트/structured output으로 chat.completions 요청 body를 만든다.
+    """
+    user_prompt_text = "\n".join(
+        [prompt_dict["user_prompt"]["head"], text, prompt_dict["user_prompt"]["tail"]]
+    )
+    schema = str_struct.model_json_schema()
+    schema["additionalProperties"] = False
+
+    return {
+        "model": gpt_model,
+        "messages": [
+            {"role": "system", "content": prompt_dict["system_prompt"]},
+            {"role": "user", "content": user_prompt_text},
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "str_struct", "schema": schema, "strict": True},
+        },
+    }
+
+
+def write_batch_requests(
+    units: list[dict],
+    job_dir: str,
+    embedding_model: str = "text-embedding-3-large",
+    gpt_model: str = "gpt-4o-mini",
+    max_requests: int = BATCH_MAX_REQUESTS,
+    hashes: Optional[dict] = None,
+) -> dict:
+    """
+    업로드할 단위(unit) 목록으로 Batch API 요청 파일과 custom_id 매핑을 만든다.
+    unit = {"point_id", "doc_id", "chunk_id", "body", "payload", "doc_key", "doc_path"}
+    hashes({원본 파일 경로: hash})를 넘기면 state에 기록해 두고, 업서트가 끝난 파일을 manifest에 기록할 때 쓴다.
+    - 임베딩과 요약은 endpoint가 다르므로 별도의 파일로 분리
+    - payload에 summary가 이미 있는 단위(추출 요약 등)는 요약 요청을 만들지 않는다
+    - 한 파일에는 최대 max_requests개의 요청만 담는다
+    이미 매핑 파일이 있으면 새로 만들지 않고 기존 상태를 반환한다.
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    mapping_path = os.path.join(job_dir, "mapping.jsonl")
+    if batch_job_exists(job_dir):
+        return load_state(job_dir)
+
+    state = {"parts": {}, "hashes": hashes or {}}
+    prompt_dict = load_prompt("make_summary.json")
+
+    for part_idx, start in enumerate(range(0, len(units), max_requests)):
+        part_units = units[start : start + max_requests]
+        emb_name = f"embeddings-{part_idx:03d}.jsonl"
+        sum_name = f"summaries-{part_idx:03d}.jsonl"
+        n_summary_requests = 0
+
+        with open(os.path.join(job_dir, emb_name), "w", encoding="utf-8") as f_emb, \
+             open(os.path.join(job_dir, sum_name), "w", encoding="utf-8") as f_sum:
+            for unit in part_units:
+                custom_id = make_custom_id(unit["doc_id"], unit["chunk_id"])
+                f_emb.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/embeddings",
+                    "body": {"model": embedding_model, "input": unit["body"]},
+                }, ensure_ascii=False) + "\n")
+
+                # 추출 요약 등으로 요약이 이미 payload에 있으면 요약 요청은 생략
+                if "summary" in unit["payload"]:
+                    continue
+                f_sum.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": build_summary_body(unit["body"], prompt_dict, gpt_model),
+                }, ensure_ascii=False) + "\n")
+                n_summary_requests += 1
+
+        state["parts"][emb_name] = {"endpoint": "/v1/embeddings", "status": "created"}
+        if n_summary_requests:
+            state["parts"][sum_name] = {"endpoint": "/v1/chat/completions", "status": "created"}
+        else:
+            # 빈 요청 파일은 Batch API에 제출할 수 없으므로 삭제
+            os.remove(os.path.join(job_dir, sum_name))
+
+    # 매핑은 요청 파일이 모두 만들어진 뒤에 기록 (매핑 파일 존재 = 요청 파일 준비 완료)
+    tmp_path = mapping_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for unit in units:
+            f.write(json.dumps({
+                "custom_id": make_custom_id(unit["doc_id"], unit["chunk_id"]),
+                "point_id": unit["point_id"],
+                "doc_id": unit["doc_id"],
+                "chunk_id": unit["chunk_id"],
+                "payload": unit["payload"],
+                "doc_key": unit.get("doc_key"),
+                "doc_path": unit.get("doc_path"),
+            }, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, mapping_path)
+
+    save_state(job_dir, state)
+    return state
+
+
+def submit_batch_job(job_dir: str) -> dict:
+    """
+    아직 제출되지 않은 요청 파일을 업로드하고 batch를 생성한다.
+    """
+    state = load_state(job_dir)
+    for part_name, part in state["parts"].items():
+        if part.get("batch_id"):
+            continue
+        with open(os.path.join(job_dir, part_name), "rb") as f:
+            uploaded = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=part["endpoint"],
+            completion_window="24h",
+        )
+        part.update({"file_id": uploaded.id, "batch_id": batch.id, "status": batch.status})
+        save_state(job_dir, state)
+    return state
+
+
+def part_finished(part: dict) -> bool:
+    """
+    결과(또는 모든 요청이 실패한 경우 에러) 파일까지 내려받은 요청 파일인지.
+    """
+    return bool(part.get("output_file") or part.get("error_file"))
+
+
+def collect_batch_job(job_dir: str) -> bool:
+    """
+    제출된 batch의 상태를 갱신하고, 완료된 batch의 결과 파일과 에러 파일을 results/에 내려받는다.
+    - completed : output_file_id / error_file_id를 내려받는다 (모든 요청이 실패해 에러 파일만 있어도 완료로 본다)
+    - failed, expired, cancelled : 상태와 에러를 failed_batches에 기록하고 batch_id를 지워서,
+      submit_batch_job이 요청 파일을 다시 제출하게 한다 (expired batch의 일부 결과도 내려받아 둔다)
+    모든 요청 파일의 결과가 준비되면 True를 반환.
+    """
+    state = load_state(job_dir)
+    results_dir = os.path.join(job_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+
+    for part_name, part in state["parts"].items():
+        if part_finished(part) or not part.get("batch_id"):
+            continue
+        batch = client.batches.retrieve(part["batch_id"])
+        part["status"] = batch.status
+        if batch.status == "completed":
+            if batch.output_file_id:
+                output_path = os.path.join(results_dir, part_name)
+                client.files.content(batch.output_file_id).write_to_file(output_path)
+                part["output_file"] = output_path
+            if batch.error_file_id:
+                error_path = os.path.join(results_dir, f"{part_name}.errors.jsonl")
+                client.files.content(batch.error_file_id).write_to_file(error_path)
+                part["error_file"] = error_path
+        elif batch.status in RETRY_STATUSES:
+            failed = {"batch_id": batch.id, "status": batch.status}
+            if getattr(batch, "errors", None) and batch.errors.data:
+                failed["errors"] = [f"{e.code}: {e.message}" for e in batch.errors.data]
+            # 만료된 batch도 일부 요청은 성공했을 수 있으므로, 결과는 따로 받아 두고 업서트에 함께 쓴다
+            for kind, file_id in (("output", batch.output_file_id), ("errors", batch.error_file_id)):
+                if file_id:
+                    path = os.path.join(results_dir, f"{part_name}.{batch.id}.{kind}.jsonl")
+                    client.files.content(file_id).write_to_file(path)
+                    failed[f"{kind}_file"] = path
+            part.setdefault("failed_batches", []).append(failed)
+            part.pop("batch_id", None)
+            part.pop("file_id", None)
+        save_state(job_dir, state)
+
+    return all(part_finished(part) for part in state["parts"].values())
+
+
+def needs_resubmit(job_dir: str) -> list[str]:
+    """
+    batch가 실패/만료/취소되어 다시 제출해야 하는 요청 파일 목록.
+    """
+    state = load_state(job_dir)
+    return [name for name, part in state["parts"].items() if not part_finished(part) and not part.get("batch_id")]
+
+
+def part_result_paths(job_dir: str, part_name: str, part: dict) -> list[str]:
+    """
+    요청 파일 하나의 결과 파일들 (완료된 batch의 결과 + 만료된 batch의 일부 결과)
+    """
+    paths = [b["output_file"] for b in part.get("failed_batches", []) if b.get("output_file")]
+    paths.append(part.get("output_file") or os.path.join(job_dir, "results", part_name))
+    return [p for p in paths if os.path.exists(p)]
+
+
+def iter_batch_results(results_path: str) -> Iterator[tuple[str, dict]]:
+    """
+    결과 파일을 한 줄씩 읽어 (custom_id, response body)를 yield. 실패한 요청은 건너뛴다.
+    """
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                continue
+            yield result["custom_id"], response["body"]
+
+
+def iter_part_results(job_dir: str, part_name: str, part: dict) -> Iterator[tuple[str, dict]]:
+    for results_path in part_result_paths(job_dir, part_name, part):
+        yield from iter_batch_results(results_path)
+
+
+def parse_summary(body: dict) -> Optional[dict]:
+    """
+    chat.completions 응답 body에서 요약(str_struct)을 꺼낸다.
+    거부(refusal), 빈 응답, 스키마에 맞지 않는 JSON이면 None.
+    """
+    try:
+        content = body["choices"][0]["message"].get("content")
+        if not content:
+            return None
+        return str_struct.model_validate_json(content).model_dump()
+    except (KeyError, IndexError, TypeError, ValidationError):
+        return None
+
+
+def load_request_inputs(job_dir: str, custom_ids: set[str]) -> dict:
+    """
+    임베딩 요청 파일에서 custom_id별 원문(청크 본문)을 읽는다. (결과가 없는 단위를 다시 처리할 때 사용)
+    """
+    inputs = {}
+    for part_name, part in load_state(job_dir)["parts"].items():
+        if part["endpoint"] != "/v1/embeddings":
+            continue
+        with open(os.path.join(job_dir, part_name), "r", encoding="utf-8") as f:
+            for line in f:
+                request = json.loads(line)
+                if request["custom_id"] in custom_ids:
+                    inputs[request["custom_id"]] = request["body"]["input"]
+    return inputs
+
+
+def load_upserted(job_dir: str) -> set[str]:
+    upserted_path = os.path.join(job_dir, "upserted.txt")
+    if not os.path.exists(upserted_path):
+        return set()
+    with open(upserted_path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def iter_mapping(job_dir: str) -> Iterator[dict]:
+    with open(os.path.join(job_dir, "mapping.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def upserted_manifest_entries(job_dir: str) -> dict:
+    """
+    모든 청크가 업서트된 원본 파일의 manifest 항목 {파일 경로: {"hash", "doc_keys", "point_ids"}}.
+    (state의 hashes에 없는 파일, 아직 업서트되지 않은 청크가 남은 파일은 제외)
+    """
+    hashes = load_state(job_dir).get("hashes", {})
+    upserted = load_upserted(job_dir)
+    entries, incomplete = {}, set()
+    for entry in iter_mapping(job_dir):
+        path = entry.get("doc_path")
+        if path not in hashes:
+            continue
+        if entry["custom_id"] not in upserted:
+            incomplete.add(path)
+            continue
+        manifest_entry = entries.setdefault(path, {"hash": hashes[path], "doc_keys": [], "point_ids": []})
+        if entry.get("doc_key") and entry["doc_key"] not in manifest_entry["doc_keys"]:
+            manifest_entry["doc_keys"].append(entry["doc_key"])
+        manifest_entry["point_ids"].append(entry["point_id"])
+    return {path: e for path, e in entries.items() if path not in incomplete}
+
+
+def upsert_batch_results(
+    job_dir: str,
+    collection_name: str,
+    batch_size: int = EMBED_BATCH_SIZE,
+    fallback: bool = True,
+) -> dict:
+    """
+    results/의 결과 파일과 mapping.jsonl을 합쳐 Qdrant에 업서트한다.
+    - 임베딩 결과는 파일을 스트리밍하며 batch_size개씩 업서트 (메모리에 모두 올리지 않음)
+    - 이미 업서트한 custom_id(upserted.txt)는 건너뛰므로 재실행해도 안전
+    - 요약 응답이 거부/빈 응답/잘못된 JSON이면 그 단위의 요약만 실패로 보고 invalid로 집계한다
+    - 임베딩/요약 결과가 없는 단위(요청 실패, invalid)는 fallback=True면 실시간 API로 다시 처리해서 업서트하고
+      (fallback으로 집계), fallback=False면 missing으로 집계하고 건너뛴다
+    """
+    state = load_state(job_dir)
+    mapping = {entry["custom_id"]: entry for entry in iter_mapping(job_dir)}
+    upserted_path = os.path.join(job_dir, "upserted.txt")
+    upserted = load_upserted(job_dir)
+    stats = {"upserted": 0, "skipped": 0, "missing": 0, "invalid": 0, "fallback": 0}
+
+    # 요약 결과는 짧으므로 먼저 전부 읽어둔다
+    summaries = {}
+    for part_name, part in state["parts"].items():
+        if part["endpoint"] != "/v1/chat/completions":
+            continue
+        for custom_id, body in iter_part_results(job_dir, part_name, part):
+            summary = parse_summary(body)
+            if summary is None:
+                stats["invalid"] += 1
+                continue
+            summaries[custom_id] = summary
+
+    pending_points, pending_ids = [], []
+
+    def _flush():
+        if not pending_points:
+            return
+        qdrant_client.upsert(collection_name=collection_name, points=pending_points)
+        with open(upserted_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{cid}\n" for cid in pending_ids))
+        stats["upserted"] += len(pending_points)
+        pending_points.clear()
+        pending_ids.clear()
+
+    def _add(custom_id: str, vector, summary: Optional[dict]):
+        payload = dict(mapping[custom_id]["payload"])
+        if summary is not None:
+            payload["summary"] = summary
+        pending_points.append(PointStruct(id=mapping[custom_id]["point_id"], vector=vector, payload=payload))
+        pending_ids.append(custom_id)
+        if len(pending_points) >= batch_size:
+            _flush()
+
+    def _needs_summary(custom_id: str) -> bool:
+        return custom_id not in summaries and "summary" not in mapping[custom_id]["payload"]
+
+    # 결과가 빠진 단위: custom_id -> 임베딩 결과 (임베딩도 없으면 None)
+    retry = {}
+    seen = set()
+    for part_name, part in state["parts"].items():
+        if part["endpoint"] != "/v1/embeddings":
+            continue
+        for custom_id, body in iter_part_results(job_dir, part_name, part):
+            if custom_id in seen:
+                continue
+            seen.add(custom_id)
+            if custom_id in upserted:
+                stats["skipped"] += 1
+                continue
+            if custom_id not in mapping:
+                stats["missing"] += 1
+                continue
+            vector = body["data"][0]["embedding"]
+            if _needs_summary(custom_id):
+                retry[custom_id] = vector
+                continue
+            _add(custom_id, vector, summaries.get(custom_id))
+    _flush()
+
+    for custom_id in mapping:
+        if custom_id not in seen and custom_id not in upserted:
+            retry[custom_id] = None
+    if not fallback:
+        stats["missing"] += len(retry)
+        return stats
+
+    # batch에서 결과를 받지 못한 단위는 실시간 API로 임베딩/요약해서 업서트
+    texts = load_request_inputs(job_dir, set(retry))
+    retry_ids = list(retry)
+    for start in range(0, len(retry_ids), batch_size):
+        group = retry_ids[start : start + batch_size]
+        to_embed = [cid for cid in group if retry[cid] is None]
+        to_summarize = [cid for cid in group if _needs_summary(cid)]
+        if to_embed:
+            vectors = openai_embedding_batch([texts[cid] for cid in to_embed])
+            for cid, vector in zip(to_embed, vectors):
+                retry[cid] = vector.tolist()
+        if to_summarize:
+            new_summaries = asyncio.run(async_summarize([texts[cid] for cid in to_summarize], "gpt"))
+            for cid, summ in zip(to_summarize, new_summaries):
+                summaries[cid] = summ.model_dump()
+        for cid in group:
+            _add(cid, retry[cid], summaries.get(cid))
+        _flush()
+        stats["fallback"] += len(group)
+    return stats
@@ -0,0 +1,177 @@
+from typing import Any, Optional
+
+import numpy as np
+
+import os, json, time, zlib, hashlib, sqlite3
+
+
+class EmbeddingCache:
+    """
+    (임베딩 모델명, 청크 텍스트)의 해시를 키로 하는 로컬 임베딩 캐시.
+    - SQLite 파일 하나에 float32 벡터를 바이트로 압축 저장
+    - 같은 문서를 다시 업로드하거나, 중단된 업로드를 재시작할 때 API 호출을 생략
+    """
+
+    def __init__(self, db_path: str):
+        dir_name = os.path.dirname(db_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+        )
+        self.conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, model: str, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """
+        texts 각각에 대한 캐시된 벡터(float32 배열)를 반환. 캐시에 없는 항목은 None.
+        """
+        keys = [self.make_key(model, t) for t in texts]
+        found = {}
+
+        # SQLite 변수 개수 제한을 넘지 않도록 나누어 조회
+        for start in range(0, len(keys), 500):
+            sub_keys = keys[start : start + 500]
+            placeholders = ",".join("?" * len(sub_keys))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                sub_keys,
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+
+        results = [found.get(k) for k in keys]
+        n_hits = sum(1 for r in results if r is not None)
+        self.hits += n_hits
+        self.misses += len(results) - n_hits
+        return results
+
+    def put_many(self, model: str, texts: list[str], vectors) -> None:
+        """
+        vectors는 (len(texts), dim) float32 배열 또는 벡터 리스트.
+        """
+        rows = [
+            (self.make_key(model, t), model, np.asarray(v, dtype=np.float32).tobytes())
+            for t, v in zip(texts, vectors)
+        ]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+            rows,
+        )
+        self.conn.commit()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class ParseCache:
+    """
+    (파일 내용 해시, 파서 이름, 파서 버전)을 키로 하는 로컬 파싱 결과 캐시.
+    - 파싱 결과 dict(doc_title, doc_source, raw_text(PDF는 페이지별 pages) 등)를
+      zlib으로 압축한 JSON으로 저장
+    - 저장된 전체 크기가 max_bytes를 넘으면 가장 오래 조회되지 않은 항목부터 삭제
+    - 여러 프로세스(파싱 프로세스 풀)가 같은 파일을 동시에 열어도 되도록 WAL 모드 + busy timeout 사용
+    """
+
+    def __init__(self, db_path: str, max_bytes: int):
+        dir_name = os.path.dirname(db_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed ("
+            "key BLOB PRIMARY KEY, parser TEXT NOT NULL, data BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS parsed_accessed ON parsed (accessed)")
+        self.conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, parser: str, version: str) -> bytes:
+        return hashlib.sha256(f"{parser}\0{version}\0{content_hash}".encode("utf-8")).digest()
+
+    def get(self, content_hash: str, parser: str, version: str) -> Optional[Any]:
+        """
+        캐시된 파싱 결과를 반환. 없으면 None.
+        """
+        key = self.make_key(content_hash, parser, version)
+        row = self.conn.execute("SELECT data FROM parsed WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.conn.execute("UPDATE parsed SET accessed = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, content_hash: str, parser: str, version: str, result: Any) -> None:
+        blob = zlib.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO parsed (key, parser, data, size, accessed) VALUES (?, ?, ?, ?, ?)",
+            (self.make_key(content_hash, parser, version), parser, blob, len(blob), time.time()),
+        )
+        self.conn.commit()
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        전체 크기가 max_bytes 이하가 될 때까지 가장 오래 조회되지 않은 항목을 삭제한다.
+        삭제한 항목 수를 반환.
+        """
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM parsed").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        stale = []
+        for key, size in self.conn.execute("SELECT key, size FROM parsed ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM parsed WHERE key = ?", stale)
+        self.conn.commit()
+        return len(stale)
+
+    def get_or_parse(self, content_hash: str, parser: str, version: str, parse_fn) -> Any:
+        """
+        캐시된 결과가 있으면 반환하고, 없으면 parse_fn()으로 파싱해서 저장한다.
+        """
+        result = self.get(content_hash, parser, version)
+        if result is None:
+            result = parse_fn()
+            self.put(content_hash, parser, version, result)
+        return result
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self.conn.close()
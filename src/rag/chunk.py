@@ -1,7 +1,20 @@
 # chunk.py
 from typing import List, Dict, Any
-from common.config import DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_STEP
+from common.config import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_STEP,
+    CHUNK_STRATEGY,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+)
 from common.types import Chunk, Document
+from src.utils.tokenizer import get_encoding
+
+import re
+
+# 문장 경계: 마침표/물음표/느낌표(한국어 "~다." 포함) 뒤의 공백
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。])\s+")
+_PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n|\n")
 
 def sliding_window(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_step: int = DEFAULT_CHUNK_STEP) -> List[str]:
     """
@@ -19,66 +32,178 @@ def sliding_window(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_step:
 
     return chunks
 
+def _split_long_segment(text: str, tokens: list[int], max_tokens: int) -> list[tuple[str, int]]:
+    """
+    max_tokens보다 긴 문장을 단어(공백) 경계에서 나눈다.
+    단어 하나가 max_tokens보다 길면(공백 없는 긴 문자열 등) 토큰 단위로 자른다.
+    """
+    words = text.split()
+    if len(words) <= 1:
+        return [
+            (get_encoding().decode(tokens[start : start + max_tokens]), len(tokens[start : start + max_tokens]))
+            for start in range(0, len(tokens), max_tokens)
+        ]
+
+    pieces = []
+    word_tokens = get_encoding().encode_ordinary_batch(words)
+    current, current_len = [], 0
+    for word, toks in zip(words, word_tokens):
+        # 앞 단어와 합칠 때 붙는 공백 토큰 1개를 감안
+        n = len(toks) + (1 if current else 0)
+        if current and current_len + n > max_tokens:
+            pieces.append((" ".join(current), current_len))
+            current, current_len, n = [], 0, len(toks)
+        if n > max_tokens:
+            pieces.extend(_split_long_segment(word, toks, max_tokens))
+            continue
+        current.append(word)
+        current_len += n
+    if current:
+        pieces.append((" ".join(current), current_len))
+    return pieces
+
+
+def split_segments(text: str, max_tokens: int) -> list[tuple[str, int, bool]]:
+    """
+    텍스트를 (문장, 토큰 수, 문단 시작 여부) 목록으로 나눈다.
+    max_tokens보다 긴 문장은 단어 경계에서 다시 나눈다.
+    """
+    sentences, starts = [], []
+    for paragraph in _PARAGRAPH_BOUNDARY.split(text):
+        first = True
+        for sentence in _SENTENCE_BOUNDARY.split(paragraph.strip()):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+                starts.append(first)
+                first = False
+
+    # 문장별 토큰화는 tiktoken의 batch API로 한 번에 처리 (내부적으로 멀티스레드)
+    segments = []
+    for sentence, tokens, start in zip(sentences, get_encoding().encode_ordinary_batch(sentences), starts):
+        if len(tokens) <= max_tokens:
+            segments.append((sentence, len(tokens), start))
+        else:
+            for idx, (piece, n) in enumerate(_split_long_segment(sentence, tokens, max_tokens)):
+                segments.append((piece, n, start and idx == 0))
+    return segments
+
+
+def token_chunks(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> List[str]:
+    """
+    문장/문단 경계를 지키면서 텍스트를 max_tokens 토큰 이하의 청크로 나누는 함수.
+    - 문장을 순서대로 채우다가 다음 문장이 들어가지 않으면 새 청크를 시작
+    - 청크가 절반 이상 찼고 다음 문단이 통째로 들어가지 않으면 문단 경계에서 끊음
+    - 새 청크는 이전 청크의 마지막 문장들(최대 overlap_tokens 토큰)로 시작
+    토큰 수는 문장별 토큰 수의 합(+ 이어 붙이는 공백)으로 계산하므로 실제 값과 1~2 토큰 차이가 날 수 있다.
+    """
+    segments = split_segments(text, max_tokens)
+    if not segments:
+        return []
+
+    # 문단별 남은 토큰 수 (문단 경계에서 끊을지 판단할 때 사용)
+    paragraph_rest = [0] * len(segments)
+    rest = 0
+    for idx in range(len(segments) - 1, -1, -1):
+        rest += segments[idx][1] + 1
+        paragraph_rest[idx] = rest
+        if segments[idx][2]:
+            rest = 0
+
+    chunks = []
+    current, current_len = [], 0   # current: segments의 인덱스
+
+    def _join(indices):
+        parts = []
+        for i in indices:
+            if parts:
+                parts.append("\n" if segments[i][2] else " ")
+            parts.append(segments[i][0])
+        return "".join(parts)
+
+    for idx, (sentence, n_tokens, paragraph_start) in enumerate(segments):
+        n = n_tokens + (1 if current else 0)
+        full = current and current_len + n > max_tokens
+        paragraph_break = (
+            current
+            and paragraph_start
+            and current_len >= max_tokens // 2
+            and current_len + paragraph_rest[idx] > max_tokens
+        )
+        if full or paragraph_break:
+            chunks.append(_join(current))
+
+            # 이전 청크의 뒤쪽 문장들을 overlap으로 가져옴 (청크 전체가 반복되지는 않도록)
+            overlap, overlap_len = [], 0
+            for i in reversed(current[1:]):
+                if overlap_len + segments[i][1] + 1 > overlap_tokens:
+                    break
+                overlap.insert(0, i)
+                overlap_len += segments[i][1] + 1
+            if overlap and overlap_len + n_tokens + 1 > max_tokens:
+                overlap, overlap_len = [], 0
+            current, current_len = overlap, max(overlap_len - 1, 0)
+            n = n_tokens + (1 if current else 0)
+
+        current.append(idx)
+        current_len += n
+
+    if current:
+        chunks.append(_join(current))
+    return chunks
+
+
+def split_text(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_step: int = DEFAULT_CHUNK_STEP) -> List[str]:
+    """
+    CHUNK_STRATEGY에 따라 텍스트를 청크로 나눈다.
+    - "token"  : 문장 경계 기준 토큰 청커 (token_chunks)
+    - "window" : 글자 수 기준 슬라이딩 윈도우 (sliding_window, 이전 방식)
+    """
+    if CHUNK_STRATEGY == "window":
+        return sliding_window(text, chunk_size, chunk_step)
+    return token_chunks(text)
+
+
 def chunk_word(parsed_dict: Dict[str, Any], chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_step: int = DEFAULT_CHUNK_STEP) -> None:
     """
-    Word(docx) 파일의 파싱 데이터를 슬라이딩 윈도우 방식으로 청킹하는 함수.
+    Word(docx) 파일의 파싱 데이터를 청킹하는 함수. (split_text)
     페이지 구분 없이 전체 텍스트를 대상으로 청킹을 수행.
     """
     raw_text = parsed_dict.raw_text
-    chunks = sliding_window(raw_text, chunk_size, chunk_step)
+    chunks = split_text(raw_text, chunk_size, chunk_step)
     chunk_list = [Chunk(doc_id=parsed_dict.doc_id, chunk_id=idx, body=chunk) for idx, chunk in enumerate(chunks)]
 
     return chunk_list
 
 def chunk_pdf(parsed_dict: Dict[str, Any], chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_step: int = DEFAULT_CHUNK_STEP) -> None:
     """
-    PDF 파일의 파싱 데이터를 슬라이딩 윈도우 방식으로 청킹하는 함수.
-    각 페이지를 기준으로 청킹을 수행하여 페이지 간의 구분을 유지.
+    PDF 파일의 파싱 데이터를 청킹하는 함수. (split_text)
+    parse_pdf가 만든 페이지 목록(pages)을 페이지 단위로 청킹하여 페이지 간의 구분을 유지하고,
+    청크마다 페이지 번호(1부터)를 page_num에 기록한다.
     """
-    raw_text = parsed_dict.raw_text
-    
-    # 페이지별로 텍스트를 분리 (<PAGE_BREAK: 페이지 번호>로 분리)
-    pages = raw_text.split("<PAGE_BREAK:")  
-    chunks = []
-    
-    for page in pages:
-        page = page.strip()
-        if not page:
-            continue
-        page = page.split('>')[-1].strip()
-        if not page:
+    chunk_list = []
+
+    for page in parsed_dict.pages:
+        page_text = page["text"].strip()
+        if not page_text:
             continue
-        
-        # 슬라이딩 윈도우 청킹
-        page_chunks = sliding_window(page, chunk_size, chunk_step)
-        chunks.extend(page_chunks)
-    
-    chunk_list = [Chunk(doc_id=parsed_dict.doc_id, chunk_id=idx, body=chunk) for idx, chunk in enumerate(chunks)]
+
+        # 페이지 단위로 청킹
+        for chunk in split_text(page_text, chunk_size, chunk_step):
+            chunk_list.append(
+                Chunk(doc_id=parsed_dict.doc_id, chunk_id=len(chunk_list), body=chunk, page_num=page["page_num"])
+            )
+
     return chunk_list
 
 def chunk_text(doc: Document) -> list[Chunk]:
     """
-    Document의 body(단순 텍스트)를 일정 길이로 잘라서 Chunk의 list로 반환.
-    아래는 예시 구현이며, 실제로는 토큰 단위로 잘라내거나,
-    적절한 길이(예: 1000자, 2000자 등)로 segmenting 하는 로직을 넣으시면 됩니다.
+    Document의 body(단순 텍스트, 메일 등)를 청크로 나눠 Chunk의 list로 반환. (split_text)
     """
-    max_len = 1000  # 예시
-    body = doc.raw_text
-
-    chunks = []
-    start_idx = 0
-    chunk_id = 0
-
-    while start_idx < len(body):
-        end_idx = start_idx + max_len
-        snippet = body[start_idx:end_idx]
-        chunk = Chunk(
-            doc_id=doc.doc_id,
-            chunk_id=chunk_id,
-            body=snippet
-        )
-        chunks.append(chunk)
-        chunk_id += 1
-        start_idx = end_idx
-
-    return chunks
\ No newline at end of file
+    # window 방식에서는 기존처럼 겹치지 않게 DEFAULT_CHUNK_SIZE씩 자름
+    chunks = split_text(doc.raw_text, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_SIZE)
+    return [Chunk(doc_id=doc.doc_id, chunk_id=idx, body=chunk) for idx, chunk in enumerate(chunks)]
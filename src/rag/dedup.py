@@ -0,0 +1,160 @@
+"""
+임베딩 전에 중복/저정보 청크를 걸러내는 단계.
+
+- 저정보 청크 : 기호를 빼면 남는 글자가 거의 없는 청크
+- 완전 중복   : 공백/대소문자를 정규화한 본문이 이미 나온 청크와 같은 경우
+- 유사 중복   : 글자 n-gram의 MinHash + LSH로 찾은 후보 중, 추정 Jaccard 유사도가 threshold 이상인 경우
+                (같은 공지를 여러 번 다시 보낸 메일, 겹치는 윈도우 등)
+
+걸러진 청크는 업로드하지 않는다.
+중복 비교는 원본 파일(doc_path) 안에서만 한다. manifest는 파일 단위로 Point를 삭제/재업로드하므로,
+원본 청크와 걸러진 중복 청크가 항상 같은 파일에 있어야 원본이 바뀌거나 삭제될 때 중복 청크의 내용이 사라지지 않는다.
+(mbox는 파일 하나에 메일이 여럿이므로, 같은 아카이브 안에서 다시 보낸 공지는 그대로 걸러진다)
+파일 하나 안에서도 기억하는 청크는 DEDUP_MAX_ENTRIES개까지만 두어 메모리 사용량을 제한한다.
+"""
+
+from typing import Iterable, Iterator, Optional
+
+from common.config import (
+    DEDUP_THRESHOLD,
+    DEDUP_NUM_PERM,
+    DEDUP_BANDS,
+    DEDUP_SHINGLE_SIZE,
+    DEDUP_MAX_ENTRIES,
+    MIN_CHUNK_CHARS,
+)
+
+import re, zlib, hashlib
+import numpy as np
+
+_NON_WORD = re.compile(r"[^0-9A-Za-z가-힣]+")
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize(text: str) -> str:
+    """
+    비교용 정규화: 소문자, 글자/숫자 이외의 문자는 공백 하나로.
+    """
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def is_low_information(text: str, min_chars: int = MIN_CHUNK_CHARS) -> bool:
+    """
+    의미 있는 글자(한글/영문/숫자)가 min_chars보다 적거나, 같은 글자만 반복되는 청크.
+    """
+    compact = normalize(text).replace(" ", "")
+    return len(compact) < min_chars or len(set(compact)) < 5
+
+
+class NearDuplicateFilter:
+    """
+    MinHash(num_perm개 해시) + LSH(bands개 밴드)로 유사 중복을 찾는다.
+    본 적 있는 청크의 서명은 밴드별 버킷에 저장되며, 새 청크는 같은 버킷에 들어간 후보와만 비교한다.
+    max_entries개를 기억하면 저장한 청크를 모두 비우고 다시 시작한다. (청크당 약 2.5KB)
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = DEDUP_NUM_PERM,
+        bands: int = DEDUP_BANDS,
+        shingle_size: int = DEDUP_SHINGLE_SIZE,
+        max_entries: int = DEDUP_MAX_ENTRIES,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands의 배수여야 합니다.")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self.clear()
+
+    def clear(self) -> None:
+        self.exact = {}        # 정규화 본문 해시 -> key
+        self.buckets = {}      # (band, band 해시) -> [key, ...]
+        self.signatures = {}   # key -> MinHash 서명 (uint32)
+
+    def signature(self, text: str) -> np.ndarray:
+        # 한국어는 띄어쓰기가 불규칙하므로 공백을 뺀 글자 n-gram을 사용
+        compact = text.replace(" ", "")
+        n = self.shingle_size
+        shingles = {compact[i : i + n] for i in range(max(len(compact) - n + 1, 1))}
+        # crc32(32bit) * a(31bit) < 2^63 이므로 uint64에서 overflow 없이 계산된다
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        hashed = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def find(self, key: str, text: str) -> Optional[tuple[str, str]]:
+        """
+        text가 이미 본 청크의 중복이면 ("exact" | "near", 원본 key)를 반환하고,
+        처음 보는 청크면 key로 등록한 뒤 None을 반환한다.
+        """
+        normalized = normalize(text)
+        digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+        if digest in self.exact:
+            return "exact", self.exact[digest]
+
+        sig = self.signature(normalized)
+        band_keys = [
+            (band, sig[band * self.rows : (band + 1) * self.rows].tobytes()) for band in range(self.bands)
+        ]
+
+        checked = set()
+        for band_key in band_keys:
+            for other in self.buckets.get(band_key, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                # 서명이 같은 위치의 비율 = Jaccard 유사도의 추정치
+                if np.mean(self.signatures[other] == sig) >= self.threshold:
+                    return "near", other
+
+        if len(self.signatures) >= self.max_entries:
+            self.clear()
+        self.exact[digest] = key
+        self.signatures[key] = sig
+        for band_key in band_keys:
+            self.buckets.setdefault(band_key, []).append(key)
+        return None
+
+
+def iter_dedup_units(units: Iterable[dict], stats: Optional[dict] = None) -> Iterator[dict]:
+    """
+    업로드 단위(unit) 스트림에서 저정보/중복 청크를 걸러낸다.
+    unit은 원본 파일(doc_path, 없으면 doc_key) 순서대로 들어오며, 파일이 바뀌면 중복 비교 상태를 비운다.
+    stats에는 청크 수(kept, low_info, exact_dup, near_dup)를 기록한다.
+    """
+    if stats is None:
+        stats = {}
+    for name in ("kept", "low_info", "exact_dup", "near_dup"):
+        stats.setdefault(name, 0)
+
+    dedup = NearDuplicateFilter()
+    scope = None
+    for unit in units:
+        if is_low_information(unit["body"]):
+            stats["low_info"] += 1
+            continue
+
+        unit_scope = unit.get("doc_path") or unit.get("doc_key")
+        if unit_scope != scope:
+            dedup.clear()
+            scope = unit_scope
+
+        found = dedup.find(unit["point_id"], unit["body"])
+        if found:
+            kind, _ = found
+            stats[f"{kind}_dup"] += 1
+            continue
+
+        stats["kept"] += 1
+        yield unit
@@ -1,8 +1,22 @@
 from openai import OpenAI, AsyncOpenAI
+from common.config import EMBED_REQUEST_MAX_ITEMS, EMBED_REQUEST_MAX_TOKENS
+from src.utils.ratelimit import embedding_limiter
+from src.utils.vectors import decode_embeddings
+from src.utils.tokenizer import get_encoding
+
+import numpy as np
+
+import asyncio
 
 client = OpenAI()
 async_client = AsyncOpenAI()
 
+
+def count_tokens(text: str) -> int:
+    # 토크나이저는 배치로 묶을 때 처음 불러온다 (import 시점에는 네트워크를 쓰지 않음)
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
 def openai_embedding(target_text:str, embedding_model:str="text-embedding-3-large"):
     response = client.embeddings.create(
         input=target_text,
@@ -15,4 +29,114 @@ async def async_openai_embedding(target_text:str, embedding_model:str="text-embe
         input=target_text,
         model=embedding_model
     )
-    return response.data[0].embedding 
\ No newline at end of file
+    return response.data[0].embedding
+
+
+def pack_embedding_requests(
+    texts: list[str],
+    max_items: int = EMBED_REQUEST_MAX_ITEMS,
+    max_tokens: int = EMBED_REQUEST_MAX_TOKENS,
+) -> list[list[int]]:
+    """
+    texts를 하나의 embeddings.create 요청에 담을 묶음으로 나눈다.
+    - 한 요청에는 최대 max_items개, 합계 max_tokens 토큰까지만 담는다.
+    - 각 묶음은 texts 안에서의 인덱스 리스트로 반환한다.
+    """
+    groups = []
+    current, current_tokens = [], 0
+
+    for idx, text in enumerate(texts):
+        n_tokens = count_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + n_tokens > max_tokens):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += n_tokens
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def openai_embedding_batch(
+    texts: list[str],
+    embedding_model: str = "text-embedding-3-large",
+    max_items: int = EMBED_REQUEST_MAX_ITEMS,
+    max_tokens: int = EMBED_REQUEST_MAX_TOKENS,
+) -> np.ndarray:
+    """
+    여러 텍스트를 묶어서 한 번의 요청으로 임베딩한다.
+    반환값은 (len(texts), dim) float32 배열이고, 행 순서는 texts의 순서와 동일하다.
+    """
+    groups = pack_embedding_requests(texts, max_items, max_tokens)
+    responses = [
+        client.embeddings.create(
+            input=[texts[i] for i in group],
+            model=embedding_model,
+            encoding_format="base64",
+        )
+        for group in groups
+    ]
+    return decode_embeddings(texts, groups, responses)
+
+
+async def async_openai_embedding_batch(
+    texts: list[str],
+    embedding_model: str = "text-embedding-3-large",
+    max_items: int = EMBED_REQUEST_MAX_ITEMS,
+    max_tokens: int = EMBED_REQUEST_MAX_TOKENS,
+) -> np.ndarray:
+    """
+    openai_embedding_batch의 비동기 버전.
+    묶음별 요청은 공유 rate limiter(embedding_limiter) 안에서 동시에 전송되고,
+    429/timeout 등으로 실패한 묶음만 다시 보낸다.
+    """
+    groups = pack_embedding_requests(texts, max_items, max_tokens)
+
+    async def _embed_group(group: list[int]):
+        group_texts = [texts[i] for i in group]
+        return await embedding_limiter.run(
+            lambda: async_client.embeddings.create(
+                input=group_texts,
+                model=embedding_model,
+                encoding_format="base64",
+            ),
+            tokens=sum(count_tokens(t) for t in group_texts),
+        )
+
+    responses = await asyncio.gather(*[_embed_group(g) for g in groups])
+    return decode_embeddings(texts, groups, responses)
+
+
+async def async_cached_embedding_batch(
+    texts: list[str],
+    cache=None,
+    embedding_model: str = "text-embedding-3-large",
+) -> np.ndarray:
+    """
+    EmbeddingCache를 먼저 조회하고, 캐시에 없는 텍스트만 묶어서 임베딩한다.
+    새로 만든 임베딩은 캐시에 저장된다. cache가 None이면 캐시 없이 동작.
+    반환값은 (len(texts), dim) float32 배열.
+    """
+    if cache is None:
+        return await async_openai_embedding_batch(texts, embedding_model)
+
+    cached = cache.get_many(embedding_model, texts)
+    miss_indices = [i for i, r in enumerate(cached) if r is None]
+
+    new_vectors = None
+    if miss_indices:
+        miss_texts = [texts[i] for i in miss_indices]
+        new_vectors = await async_openai_embedding_batch(miss_texts, embedding_model)
+        cache.put_many(embedding_model, miss_texts, new_vectors)
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    dim = new_vectors.shape[1] if new_vectors is not None else cached[0].shape[0]
+    results = np.empty((len(texts), dim), dtype=np.float32)
+    for i, vec in enumerate(cached):
+        if vec is not None:
+            results[i] = vec
+    if new_vectors is not None:
+        results[miss_indices] = new_vectors
+    return results
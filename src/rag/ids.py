@@ -0,0 +1,30 @@
+import os, uuid
+
+
+# 모든 Point ID의 기준 namespace (값이 바뀌면 기존 Point와 ID가 달라지므로 변경 금지)
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://github.com/posplexity/posplexity")
+
+
+def make_point_id(doc_key: str, chunk_id: int) -> str:
+    """
+    문서 고유 키와 청크 위치로 결정적인 Point ID(UUIDv5)를 만든다.
+    - 같은 문서/청크는 항상 같은 ID → 다시 업로드해도 중복 없이 덮어쓰기(idempotent)
+    - 컬렉션을 스캔할 필요가 없으므로 여러 업로더가 동시에 실행되어도 충돌하지 않음
+    - 청크 개수 제한 없음 (기존 doc_id * 1000 + chunk_id 방식은 1000개 이상에서 충돌)
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{doc_key}#{chunk_id}"))
+
+
+def file_doc_key(file_path: str) -> str:
+    """
+    파일(docx, pdf) 문서의 고유 키. 관리자 페이지의 중복 검사와 같이 파일명을 기준으로 한다.
+    """
+    return f"file:{os.path.basename(file_path)}"
+
+
+def source_doc_key(source_name: str) -> str:
+    """
+    원격 소스(S3 객체, URL) 문서의 고유 키. 파일명 대신 전체 이름(s3://버킷/키, 정규화한 URL)을 쓰므로
+    다른 prefix/호스트의 같은 파일명, 로컬 업로드 파일과 Point ID가 겹치지 않는다.
+    """
+    return f"source:{source_name}"
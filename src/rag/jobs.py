@@ -0,0 +1,277 @@
+"""
+관리자 업로드 페이지용 백그라운드 업로드 작업 큐.
+
+페이지는 업로드 버퍼를 작업으로 등록(enqueue)만 하고 바로 돌아가며,
+별도 워커 프로세스(python -m src.rag.jobs)가 작업을 꺼내 update.upload(files=...)를 실행한다.
+(S3에 함께 올린 파일의 작업은 params에 s3_prefix가 있고, sync_s3와 같은 manifest를 쓰는 update.ingest_s3_uploads로 처리)
+- 작업과 업로드 버퍼는 SQLite 파일(JOB_DB_PATH)에 저장되므로, 브라우저 탭이나 streamlit이 종료되어도 유지된다
+- 워커는 JOB_MAX_WORKERS개까지 띄울 수 있고, 각 워커는 작업을 하나씩 처리한다
+  (같은 컬렉션의 manifest/저널을 동시에 쓰지 않도록, 실행 중인 작업과 같은 컬렉션의 작업은 기다린다)
+- 워커가 작업 도중 죽으면, 다음에 뜨는 워커가 작업을 다시 대기 상태로 돌리고
+  체크포인트 저널(src/rag/journal.py)로 이어서 진행한다
+- 워커는 JOB_WORKER_IDLE_TIMEOUT초 동안 작업이 없으면 종료되고, 페이지가 작업을 등록할 때 다시 띄운다
+
+작업 상태: queued → running → done / failed
+"""
+
+from typing import Optional
+
+import os, sys, json, time, sqlite3, traceback, subprocess
+
+
+class JobQueue:
+    """
+    SQLite 파일 하나에 작업(jobs), 업로드 버퍼(job_files), 워커 목록(workers)을 저장한다.
+    streamlit은 요청마다 다른 스레드에서 실행되므로, 페이지에서는 호출마다 열고 닫는다.
+    """
+
+    def __init__(self, db_path: str):
+        dir_name = os.path.dirname(db_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self.db_path = db_path
+        # 트랜잭션은 직접 관리 (claim에서 BEGIN IMMEDIATE로 잠금)
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, params TEXT NOT NULL, "
+            "files TEXT NOT NULL, status TEXT NOT NULL, created REAL NOT NULL, started REAL, finished REAL, "
+            "progress INTEGER NOT NULL DEFAULT 0, worker_pid INTEGER, error TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_files (job_id INTEGER NOT NULL, name TEXT NOT NULL, data BLOB NOT NULL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS workers (pid INTEGER PRIMARY KEY, started REAL NOT NULL)")
+
+    def enqueue(self, files: list[tuple[str, bytes]], collection: str, **params) -> int:
+        """
+        업로드 버퍼((파일명, bytes) 목록)를 작업으로 등록하고 작업 ID를 반환한다.
+        params는 update.upload()에 그대로 넘길 인자 (dev 등, JSON으로 저장 가능해야 함).
+        params에 s3_prefix가 있으면 update.ingest_s3_uploads()에 넘긴다.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (collection, params, files, status, created) VALUES (?, ?, ?, 'queued', ?)",
+                (collection, json.dumps(params), json.dumps([name for name, _ in files], ensure_ascii=False), time.time()),
+            )
+            job_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO job_files (job_id, name, data) VALUES (?, ?, ?)",
+                [(job_id, name, data) for name, data in files],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self, worker_pid: int) -> Optional[dict]:
+        """
+        실행 중인 작업이 없는 컬렉션의 가장 오래된 대기 작업을 꺼내 running으로 바꾼다.
+        여러 워커가 동시에 호출해도 같은 작업을 두 번 꺼내지 않는다.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND collection NOT IN "
+                "(SELECT collection FROM jobs WHERE status = 'running') ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', started = ?, worker_pid = ? WHERE id = ?",
+                    (time.time(), worker_pid, row["id"]),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"]) if row is not None else None
+
+    def load_files(self, job_id: int) -> list[tuple[str, bytes]]:
+        rows = self.conn.execute("SELECT name, data FROM job_files WHERE job_id = ? ORDER BY rowid", (job_id,))
+        return [(name, bytes(data)) for name, data in rows]
+
+    def add_progress(self, job_id: int, n: int) -> None:
+        self.conn.execute("UPDATE jobs SET progress = progress + ? WHERE id = ?", (n, job_id))
+
+    def finish(self, job_id: int, error: Optional[str] = None) -> None:
+        """
+        작업을 done(또는 error가 있으면 failed)으로 표시한다.
+        성공한 작업의 업로드 버퍼는 지우고, 실패한 작업은 다시 시도할 수 있도록 남겨 둔다.
+        """
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ?",
+            ("failed" if error else "done", time.time(), error, job_id),
+        )
+        if not error:
+            self.conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+
+    def retry(self, job_id: int) -> None:
+        self.conn.execute(
+            "UPDATE jobs SET status = 'queued', error = NULL, started = NULL, finished = NULL "
+            "WHERE id = ? AND status = 'failed'",
+            (job_id,),
+        )
+
+    def requeue_orphans(self) -> int:
+        """
+        running 상태지만 워커 프로세스가 없는 작업을 다시 queued로 돌린다. 돌린 작업 수를 반환.
+        """
+        rows = self.conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+        orphans = [(row["id"],) for row in rows if not pid_alive(row["worker_pid"])]
+        self.conn.executemany(
+            "UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?",
+            orphans,
+        )
+        return len(orphans)
+
+    def register_worker(self, pid: int) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO workers (pid, started) VALUES (?, ?)", (pid, time.time()))
+
+    def unregister_worker(self, pid: int) -> None:
+        self.conn.execute("DELETE FROM workers WHERE pid = ?", (pid,))
+
+    def live_workers(self) -> list[int]:
+        """
+        살아 있는 워커 pid 목록. 죽은 워커는 목록에서 지운다.
+        """
+        pids = [row["pid"] for row in self.conn.execute("SELECT pid FROM workers")]
+        dead = [(pid,) for pid in pids if not pid_alive(pid)]
+        self.conn.executemany("DELETE FROM workers WHERE pid = ?", dead)
+        return [pid for pid in pids if pid_alive(pid)]
+
+    def get(self, job_id: int) -> Optional[dict]:
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return job_status(row) if row is not None else None
+
+    def list_jobs(self, limit: int = 20) -> list[dict]:
+        rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [job_status(row) for row in rows]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        # 이 프로세스가 띄운 워커가 끝났으면 좀비로 남아 살아 있는 것처럼 보이지 않도록 회수한다
+        if os.waitpid(pid, os.WNOHANG)[0] == pid:
+            return False
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def job_status(row: sqlite3.Row) -> dict:
+    """
+    작업 한 줄을 dict로 바꾸고, 경과 시간과 처리량(업서트한 청크/s)을 더한다.
+    """
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["files"] = json.loads(job["files"])
+    if job["started"]:
+        job["elapsed"] = (job["finished"] or time.time()) - job["started"]
+        job["throughput"] = job["progress"] / job["elapsed"] if job["elapsed"] > 0 else 0.0
+    else:
+        job["elapsed"], job["throughput"] = 0.0, 0.0
+    return job
+
+
+def ensure_workers(db_path: str, max_workers: int, log_dir: Optional[str] = None) -> int:
+    """
+    대기 중인 작업이 있는데 워커가 max_workers개보다 적으면 워커 프로세스를 띄우고 바로 workers에 등록한다.
+    워커는 새 세션으로 띄우므로 streamlit이 종료되어도 계속 실행된다. 새로 띄운 워커 수를 반환.
+    """
+    log_dir = log_dir or os.path.dirname(db_path) or "."
+    n_spawned = 0
+    queue = JobQueue(db_path)
+    try:
+        # 워커 수 확인부터 새 워커 등록까지 한 트랜잭션으로 묶는다.
+        # (동시에 호출되거나, 워커가 아직 스스로 등록하기 전에 다시 호출되어도 max_workers를 넘지 않도록)
+        queue.conn.execute("BEGIN IMMEDIATE")
+        try:
+            n_queued = queue.conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            n_missing = min(max_workers - len(queue.live_workers()), n_queued)
+            for _ in range(max(n_missing, 0)):
+                log_path = os.path.join(log_dir, f"worker-{time.strftime('%Y%m%d-%H%M%S')}.log")
+                with open(log_path, "ab") as log:
+                    process = subprocess.Popen(
+                        [sys.executable, "-m", "src.rag.jobs", db_path],
+                        cwd=os.getcwd(),
+                        stdout=log,
+                        stderr=subprocess.STDOUT,
+                        stdin=subprocess.DEVNULL,
+                        start_new_session=True,
+                    )
+                queue.register_worker(process.pid)
+                n_spawned += 1
+            queue.conn.execute("COMMIT")
+        except Exception:
+            queue.conn.execute("ROLLBACK")
+            raise
+    finally:
+        queue.close()
+    return n_spawned
+
+
+def run_worker(db_path: str, idle_timeout: float, poll_interval: float) -> None:
+    """
+    작업을 하나씩 꺼내 update.upload(files=...)로 처리한다. idle_timeout초 동안 작업이 없으면 종료.
+    (params에 s3_prefix가 있는 작업은 update.ingest_s3_uploads(files=...)로 처리)
+    """
+    # 무거운 import보다 먼저 등록해서, import하는 동안 ensure_workers가 워커를 더 띄우지 않게 한다
+    pid = os.getpid()
+    queue = JobQueue(db_path)
+    queue.register_worker(pid)
+    idle_since = time.time()
+    try:
+        # Qdrant/OpenAI 클라이언트를 만드는 무거운 import는 워커에서만
+        from update import upload, ingest_s3_uploads
+
+        while True:
+            n_requeued = queue.requeue_orphans()
+            if n_requeued:
+                print(f"중단된 작업 {n_requeued}개를 다시 대기열에 넣었습니다.", flush=True)
+
+            job = queue.claim(pid)
+            if job is None:
+                if time.time() - idle_since > idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            print(f"작업 #{job['id']} 시작: {job['files']}", flush=True)
+            ingest = ingest_s3_uploads if "s3_prefix" in job["params"] else upload
+            try:
+                ingest(
+                    files=queue.load_files(job["id"]),
+                    on_progress=lambda n, job_id=job["id"]: queue.add_progress(job_id, n),
+                    **job["params"],
+                )
+                queue.finish(job["id"])
+            except Exception:
+                queue.finish(job["id"], error=traceback.format_exc(limit=5))
+            print(f"작업 #{job['id']} 종료: {queue.get(job['id'])['status']}", flush=True)
+            idle_since = time.time()
+    finally:
+        queue.unregister_worker(pid)
+        queue.close()
+
+
+if __name__ == "__main__":
+    # python -m src.rag.jobs [작업 DB 경로]  (저장소 루트에서, 보통은 관리자 페이지가 ensure_workers로 띄움)
+    from common.config import JOB_DB_PATH, JOB_WORKER_IDLE_TIMEOUT, JOB_POLL_INTERVAL
+
+    run_worker(sys.argv[1] if len(sys.argv) > 1 else JOB_DB_PATH, JOB_WORKER_IDLE_TIMEOUT, JOB_POLL_INTERVAL)
@@ -0,0 +1,173 @@
+"""
+중단된 업로드를 이어서 진행하기 위한 append-only 체크포인트 저널.
+
+한 줄에 하나의 JSON 이벤트를 기록한다.
+- {"event": "run_started", "time", "meta"}       : 업로드 실행 시작 (meta = 파일 수 등 실행 인자)
+- {"event": "counted", "units": n}                : 이번 실행의 전체 unit 수 (입력을 끝까지 읽었을 때 기록)
+- {"event": "embedded", "keys": [...]}            : 임베딩 완료 (벡터는 임베딩 캐시에 저장됨)
+- {"event": "summarized", "items": {key: summary}} : 요약 완료 (요약 결과를 함께 기록)
+- {"event": "upserted", "keys": [...]}            : Qdrant 업서트 완료
+- {"event": "run_finished", "time"}               : 업로드 실행 정상 종료
+
+key는 (point_id, 청크 본문 해시)이므로, 재시작 사이에 내용이 바뀐 청크는 새 청크로 취급된다.
+직전 실행이 run_finished 없이 끝났으면 이어서 진행하고, 정상 종료된 저널은 다음 실행 시작 시 비운다.
+배치 단위로 flush + fsync 하므로, 프로세스가 죽어도 마지막으로 기록된 배치까지는 유지된다.
+"""
+
+from typing import Optional
+
+import os, sys, json, time, hashlib
+
+
+def empty_state() -> dict:
+    return {"runs": [], "embedded": set(), "summaries": {}, "upserted": set(), "total_units": None}
+
+
+def read_journal(journal_path: str) -> dict:
+    """
+    저널 파일을 처음부터 읽어 현재 상태를 복원한다.
+    반환값: {"runs": [...], "embedded": set, "summaries": {key: summary}, "upserted": set, "total_units": int | None}
+    """
+    state = empty_state()
+    if not os.path.exists(journal_path):
+        return state
+
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 기록 도중 죽어서 잘린 마지막 줄은 무시
+                continue
+            event = entry["event"]
+            if event in ("run_started", "run_finished"):
+                state["runs"].append(entry)
+                if event == "run_started":
+                    # 전체 unit 수는 실행마다 입력을 끝까지 읽은 뒤에 다시 기록된다
+                    state["total_units"] = None
+            elif event == "counted":
+                state["total_units"] = entry["units"]
+            elif event == "embedded":
+                state["embedded"].update(entry["keys"])
+            elif event == "summarized":
+                state["summaries"].update(entry["items"])
+            elif event == "upserted":
+                state["upserted"].update(entry["keys"])
+    return state
+
+
+def journal_status(state: dict) -> dict:
+    started = [r for r in state["runs"] if r["event"] == "run_started"]
+    return {
+        "runs": len(started),
+        "meta": started[-1]["meta"] if started else {},
+        "embedded": len(state["embedded"]),
+        "summarized": len(state["summaries"]),
+        "upserted": len(state["upserted"]),
+        "total_units": state["total_units"],
+        "finished": bool(state["runs"]) and state["runs"][-1]["event"] == "run_finished",
+    }
+
+
+class IngestJournal:
+    """
+    업로드 파이프라인(src/rag/pipeline.run_pipeline)이 배치마다 진행 상황을 기록하는 저널.
+    resume=False이거나 직전 실행이 정상 종료되었으면 빈 저널로 시작한다.
+    """
+
+    def __init__(self, journal_path: str, resume: bool = True):
+        dir_name = os.path.dirname(journal_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self.journal_path = journal_path
+        self.state = read_journal(journal_path) if resume else None
+        if self.state is None or journal_status(self.state)["finished"]:
+            self.state = empty_state()
+            open(journal_path, "w", encoding="utf-8").close()
+
+        self.file = open(journal_path, "a", encoding="utf-8")
+
+    def _write(self, entry: dict) -> None:
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    @staticmethod
+    def unit_key(unit: dict) -> str:
+        body_hash = hashlib.sha1(unit["body"].encode("utf-8")).hexdigest()[:16]
+        return f"{unit['point_id']}:{body_hash}"
+
+    def is_upserted(self, unit: dict) -> bool:
+        return self.unit_key(unit) in self.state["upserted"]
+
+    def get_summary(self, unit: dict) -> Optional[dict]:
+        return self.state["summaries"].get(self.unit_key(unit))
+
+    def start_run(self, **meta) -> None:
+        entry = {"event": "run_started", "time": time.time(), "meta": meta}
+        self.state["runs"].append(entry)
+        self._write(entry)
+
+    def record_total(self, n_units: int) -> None:
+        """
+        입력을 끝까지 읽어 이번 실행의 전체 unit 수를 알게 되었을 때 기록한다. (진행률 "업서트/전체")
+        """
+        self.state["total_units"] = n_units
+        self._write({"event": "counted", "units": n_units})
+
+    def finish_run(self) -> None:
+        entry = {"event": "run_finished", "time": time.time()}
+        self.state["runs"].append(entry)
+        self._write(entry)
+
+    def record_embedded(self, units: list[dict]) -> None:
+        keys = [self.unit_key(u) for u in units]
+        self.state["embedded"].update(keys)
+        self._write({"event": "embedded", "keys": keys})
+
+    def record_summarized(self, units: list[dict], summaries: list[dict]) -> None:
+        items = {self.unit_key(u): s for u, s in zip(units, summaries)}
+        self.state["summaries"].update(items)
+        self._write({"event": "summarized", "items": items})
+
+    def record_upserted(self, units: list[dict]) -> None:
+        keys = [self.unit_key(u) for u in units]
+        self.state["upserted"].update(keys)
+        self._write({"event": "upserted", "keys": keys})
+
+    def status(self) -> dict:
+        return journal_status(self.state)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def print_status(journal_path: str) -> None:
+    """
+    저널 파일의 진행 상황을 출력한다. (읽기 전용, 저널을 수정하지 않음)
+    """
+    status = journal_status(read_journal(journal_path))
+
+    total = status["total_units"]
+    progress = f"{status['upserted']}/{total}" if total else f"{status['upserted']}"
+    state = "완료" if status["finished"] else ("진행 중 또는 중단됨" if status["runs"] else "기록 없음")
+    print(
+        f"{os.path.basename(journal_path)}: {state} | 실행 {status['runs']}회 | "
+        f"임베딩 {status['embedded']} / 요약 {status['summarized']} / 업서트 {progress}"
+    )
+    if status["meta"]:
+        print(f"  {status['meta']}")
+
+
+if __name__ == "__main__":
+    # python -m src.rag.journal [저널 파일 ...]  (인자가 없으면 JOURNAL_DIR의 모든 저널)
+    from common.config import JOURNAL_DIR
+
+    paths = sys.argv[1:]
+    if not paths and os.path.isdir(JOURNAL_DIR):
+        paths = sorted(
+            os.path.join(JOURNAL_DIR, name) for name in os.listdir(JOURNAL_DIR) if name.endswith(".jsonl")
+        )
+    for path in paths:
+        print_status(path)
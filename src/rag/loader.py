@@ -0,0 +1,169 @@
+"""
+파일 파싱 + 청킹 단계 (프로세스 풀 병렬 처리).
+
+pdfplumber, python-docx 파싱은 CPU를 많이 쓰므로 파일 단위로 프로세스 풀에서 처리한다.
+- 결과는 입력 파일 순서대로 반환 (doc_id, manifest 기록 순서가 실행마다 같도록)
+- 한 파일의 파싱이 실패해도 나머지 파일은 계속 처리하고, 실패는 결과에 기록
+- 파일별 파싱 시간을 결과에 기록
+- 파싱 결과는 파일 내용 해시로 로컬 캐시(PARSE_CACHE_PATH)에 저장해, 같은 파일은 다시 파싱하지 않음
+
+입력(source)은 파일 경로 또는 (파일명, bytes) 튜플.
+관리자 페이지처럼 업로드 버퍼가 메모리에 있으면 임시 파일을 만들지 않고 튜플로 넘긴다.
+(파일명, bytes를 반환하는 함수)도 넘길 수 있으며, 함수는 프로세스 풀에 넘기기 직전에 현재 프로세스에서 호출된다.
+(S3 객체처럼 내려받아야 하는 입력을 진행 중인 파일 수만큼만 메모리에 올리기 위함)
+
+자식 프로세스(spawn)에서 다시 import되므로, 이 모듈은 Qdrant/OpenAI 클라이언트를 import하지 않는다.
+"""
+
+from typing import Iterator, Optional
+
+from common.types import Document
+from common.config import PARSE_MAX_WORKERS, PARSE_CACHE_PATH, PARSE_CACHE_MAX_BYTES, PDF_BACKEND
+from src.rag.parse import parse_word, parse_pdf, source_filename, require_backend, PARSER_VERSION
+from src.rag.chunk import chunk_word, chunk_pdf
+from src.rag.cache import ParseCache
+from src.rag.ids import file_doc_key
+from src.rag.manifest import file_hash
+from src.utils.parallel import iter_ordered, resolve_workers
+
+import time, traceback
+
+
+# 프로세스마다 하나씩 여는 파싱 캐시 (프로세스 풀 자식에서도 처음 쓸 때 연다)
+_parse_cache = None
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """
+    PARSE_CACHE_PATH가 None이면 캐시를 쓰지 않는다.
+    """
+    global _parse_cache
+    if _parse_cache is None and PARSE_CACHE_PATH:
+        _parse_cache = ParseCache(PARSE_CACHE_PATH, PARSE_CACHE_MAX_BYTES)
+    return _parse_cache
+
+
+def split_source(source) -> tuple[str, Optional[bytes]]:
+    """
+    source를 (파일 경로 또는 파일명, bytes)로 나눈다. 파일 경로면 bytes는 None.
+    """
+    if isinstance(source, tuple):
+        return source
+    return source, None
+
+
+def resolve_source(source):
+    """
+    (이름, bytes를 반환하는 함수)를 (이름, bytes)로 바꾼다. 다른 입력은 그대로 반환.
+    """
+    if isinstance(source, tuple) and callable(source[1]):
+        return source[0], source[1]()
+    return source
+
+
+class _FetchError(str):
+    """
+    입력을 읽지 못했을 때의 traceback. (_timed_load_file에서 실패로 기록)
+    """
+
+
+def _iter_resolved(paths_list: list) -> Iterator:
+    """
+    입력을 하나씩 resolve_source한다. 읽기에 실패한 입력은 (이름, _FetchError(traceback))로 넘겨
+    해당 파일만 실패로 기록되게 한다.
+    """
+    for source in paths_list:
+        try:
+            yield resolve_source(source)
+        except Exception:
+            yield split_source(source)[0], _FetchError(traceback.format_exc(limit=3))
+
+
+def parse_source(source, cache: Optional[ParseCache] = None) -> tuple[str, dict]:
+    """
+    docx/pdf 하나를 파싱해서 (doc_type, 파싱 결과 dict)를 반환.
+    cache가 있으면 파일 내용 해시 + 파서 버전으로 캐시한다. (관리자 페이지 미리보기와 공유)
+    """
+    file_path, data = split_source(source)
+    if file_path.endswith(".docx"):
+        doc_type, parser, parse_fn = "word", "word", parse_word
+    elif file_path.endswith(".pdf"):
+        # backend마다 추출 결과가 다르므로 캐시 키에 backend 이름을 포함
+        doc_type, parser, parse_fn = "pdf", f"pdf:{PDF_BACKEND}", parse_pdf
+    else:
+        raise ValueError(f"지원하지 않는 파일 형식입니다: {file_path}")
+
+    def _parse():
+        return parse_fn(file_path if data is None else data, filename=file_path)
+
+    if cache is None:
+        return doc_type, _parse()
+    digest = file_hash(file_path) if data is None else ParseCache.content_hash(data)
+    parsed = cache.get_or_parse(digest, parser, PARSER_VERSION, _parse)
+
+    # 캐시는 내용 기준이므로, 같은 내용이 다른 이름으로 들어오면 제목(과 URL이 없을 때의 출처)은 현재 이름으로 바꾼다
+    title = source_filename(file_path)
+    if parsed["doc_source"] == parsed["doc_title"]:
+        parsed["doc_source"] = title
+    parsed["doc_title"] = title
+    return doc_type, parsed
+
+
+def load_file(source) -> Document:
+    """
+    docx/pdf 하나(파일 경로 또는 (파일명, bytes))를 파싱, 청킹한 Document를 반환.
+    chunk의 doc_id는 호출부에서 실행 내 순번을 정한 뒤 다시 채운다.
+    """
+    file_path, _ = split_source(source)
+    doc_type, parsed = parse_source(source, get_parse_cache())
+    doc = Document(**parsed)
+    doc.doc_type = doc_type
+    doc.chunk_list = chunk_word(doc) if doc_type == "word" else chunk_pdf(doc)
+
+    doc.doc_key = file_doc_key(file_path)
+    doc.doc_path = file_path
+    return doc
+
+
+def _timed_load_file(source) -> dict:
+    """
+    load_file을 실행하고 예외를 결과로 바꿔서 반환한다. (프로세스 풀 작업 단위)
+    """
+    start = time.perf_counter()
+    if isinstance(source, tuple) and isinstance(source[1], _FetchError):
+        return {"path": source[0], "doc": None, "error": str(source[1]), "elapsed": 0.0}
+    try:
+        doc, error = load_file(source), None
+    except Exception:
+        doc, error = None, traceback.format_exc(limit=3)
+    return {"path": split_source(source)[0], "doc": doc, "error": error, "elapsed": time.perf_counter() - start}
+
+
+def _crashed_result(source, error: BaseException) -> dict:
+    """
+    파싱하던 워커 프로세스가 죽은 파일의 결과. (다른 파싱 실패와 같은 형식, iter_ordered의 on_crash)
+    """
+    return {
+        "path": split_source(source)[0],
+        "doc": None,
+        "error": f"파싱 워커 프로세스가 비정상 종료되었습니다 (segfault, 메모리 부족 등): {error!r}",
+        "elapsed": 0.0,
+    }
+
+
+def iter_load_files(paths_list: list, max_workers: Optional[int] = PARSE_MAX_WORKERS) -> Iterator[dict]:
+    """
+    파일들을 프로세스 풀에서 병렬로 load_file하고, 입력 순서대로 결과를 yield한다.
+    paths_list의 항목은 파일 경로, (파일명, bytes), (파일명, bytes를 반환하는 함수).
+    결과 = {"path", "doc", "error", "elapsed"} (실패한 파일은 doc=None, error=traceback)
+
+    진행 중인 파일 수는 max_workers * 2개로 제한된다. (src/utils/parallel.iter_ordered)
+    max_workers가 1이면 프로세스 풀 없이 순차적으로 처리한다.
+    워커 프로세스가 죽으면 그 파일만 실패로 기록하고, 풀을 새로 만들어 나머지 파일을 계속 처리한다.
+    PDF가 있으면 PDF_BACKEND의 선택 의존성이 설치되어 있는지 풀을 시작하기 전에 확인한다.
+    """
+    if any(split_source(source)[0].endswith(".pdf") for source in paths_list):
+        require_backend(PDF_BACKEND)
+    max_workers = min(resolve_workers(max_workers), max(len(paths_list), 1))
+    # 내려받아야 하는 입력은 iter_ordered가 작업을 제출할 때 하나씩 읽는다
+    yield from iter_ordered(_timed_load_file, _iter_resolved(paths_list), max_workers, on_crash=_crashed_result)
@@ -0,0 +1,84 @@
+"""
+디렉토리 증분 업로드용 파일 manifest.
+
+manifest = {
+    "<파일 절대경로 또는 업로드 파일명>": {"hash": "<sha256>", "doc_keys": [...], "point_ids": [...]},
+    ...
+}
+컬렉션마다 하나의 JSON 파일로 저장한다.
+(관리자 페이지에서 메모리 버퍼로 바로 올린 파일은 절대경로 대신 파일명을 키로 쓴다)
+"""
+
+import os, json, hashlib
+
+
+def file_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    파일 내용의 sha256 해시. 큰 파일도 block_size 단위로 읽어서 계산.
+    """
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def data_hash(data: bytes) -> str:
+    """
+    메모리에 있는 파일 내용의 sha256 해시. (file_hash와 같은 값)
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest(manifest_path: str) -> dict:
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_path: str, manifest: dict) -> None:
+    dir_name = os.path.dirname(manifest_path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def diff_hashes(manifest: dict, hashes: dict, scope_prefix: str = None) -> dict:
+    """
+    현재 파일별 hash(키 → sha256)를 manifest와 비교한다.
+    반환값:
+    - new       : manifest에 없는 파일
+    - changed   : 내용(hash)이 바뀐 파일
+    - unchanged : 그대로인 파일
+    - removed   : scope_prefix로 시작하는 키 중 지금은 없는 파일 (scope_prefix가 None이면 비워 둠)
+    - hashes    : 현재 파일별 hash
+    """
+    result = {"new": [], "changed": [], "unchanged": [], "removed": [], "hashes": hashes}
+
+    for path, digest in hashes.items():
+        if path not in manifest:
+            result["new"].append(path)
+        elif manifest[path]["hash"] != digest:
+            result["changed"].append(path)
+        else:
+            result["unchanged"].append(path)
+
+    if scope_prefix is not None:
+        for path in manifest:
+            if path.startswith(scope_prefix) and path not in hashes:
+                result["removed"].append(path)
+
+    return result
+
+
+def diff_manifest(manifest: dict, file_paths: list[str], db_path: str) -> dict:
+    """
+    현재 디렉토리의 파일 목록을 manifest와 비교한다. (반환값은 diff_hashes와 같음)
+    removed는 db_path 아래에 있었지만 지금은 없는 파일.
+    """
+    hashes = {path: file_hash(path) for path in file_paths}
+    return diff_hashes(manifest, hashes, os.path.abspath(db_path) + os.sep)
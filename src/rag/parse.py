@@ -1,27 +1,89 @@
 from email.header import decode_header, make_header
+from html.parser import HTMLParser
 from bs4 import BeautifulSoup
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional
+from urllib.parse import urlsplit, unquote
 
 from common.types import Document
+from common.config import MBOX_HTML_BACKEND, MBOX_PARSE_WORKERS, PDF_BACKEND
+from src.utils.parallel import iter_ordered, resolve_workers
 
-import os, re, docx, pdfplumber, mailbox
+import io, os, re, docx, pdfplumber, mailbox, importlib.util
 
 
+# 파싱 결과 형식이나 정제 규칙이 바뀌면 올린다. (src/rag/cache.ParseCache 키에 포함)
+PARSER_VERSION = "2"
 
+# 선택 의존성이 필요한 backend 이름 -> 모듈 이름 (pyproject.toml의 extras 이름도 같다)
+OPTIONAL_BACKEND_MODULES = {
+    "lxml": "lxml",
+    "pypdf": "pypdf",
+}
 
-def parse_word(file_path: str, clean: bool = False) -> Dict[str, Any]:
+
+def require_backend(backend: str):
+    """
+    backend에 필요한 선택 의존성이 설치되어 있는지 확인한다.
+    워커 프로세스 안에서 ImportError가 나기 전에, 작업을 시작하는 쪽에서 미리 호출한다.
+    """
+    module = OPTIONAL_BACKEND_MODULES.get(backend)
+    if module and importlib.util.find_spec(module) is None:
+        raise ImportError(
+            f"{backend} backend를 쓰려면 {module} 패키지가 필요합니다. "
+            f"(pip install {module} 또는 poetry install -E {module})"
+        )
+
+
+def open_source(source):
+    """
+    파서 입력(파일 경로, bytes, 바이너리 파일 객체)을 파일 경로 또는 파일 객체로 바꾼다.
+    bytes는 디스크에 쓰지 않고 BytesIO로 감싼다.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+def _basename(name: str) -> str:
+    """
+    경로의 파일명. URL 형태의 소스 이름(s3://..., https://...)은 경로의 파일명이고,
+    URL#파일명처럼 fragment가 붙어 있으면 fragment를 파일명으로 쓴다. (update.url_source_name)
+    """
+    if "://" in name:
+        parts = urlsplit(name)
+        return unquote(parts.fragment) or os.path.basename(unquote(parts.path))
+    return os.path.basename(name)
+
+
+def source_filename(source, filename: Optional[str] = None) -> str:
+    """
+    문서 제목/출처로 쓸 파일명. 경로가 아닌 입력(bytes, 파일 객체)은 filename을 넘겨야 한다.
+    """
+    if filename:
+        return _basename(filename)
+    if isinstance(source, str):
+        return _basename(source)
+    name = getattr(source, "name", None)
+    if isinstance(name, str):
+        return os.path.basename(name)
+    raise ValueError("파일 경로가 아닌 입력은 filename을 지정해야 합니다.")
+
+
+def parse_word(source, clean: bool = False, filename: Optional[str] = None) -> Dict[str, Any]:
     """
     Word(docx) 파일을 파싱하여 title, source, raw_text를 추출하는 함수.
+    - source: 파일 경로, bytes, 바이너리 파일 객체 (bytes/파일 객체면 filename 지정)
     - 첫 줄이 URL인 경우만 출처로 사용, 아니면 파일명을 출처로 사용
     - 모든 텍스트는 하나의 문자열로 합침
     """
     # 1. Title, Source를 파일명 그대로 사용
-    filename = os.path.basename(file_path)
-    doc = docx.Document(file_path)
+    filename = source_filename(source, filename)
+    doc = docx.Document(open_source(source))
 
     # 2. 전체 데이터 파싱, 불필요한 기호 제거
     full_text = []
     first_line = True
+    url = None
     
     for para in doc.paragraphs:
         raw_text = para.text.strip()
@@ -32,9 +94,9 @@ def parse_word(file_path: str, clean: bool = False) -> Dict[str, Any]:
                 # URL인 경우만 source로 사용
                 if cleaned_text.startswith(('URL', 'http://', 'https://')):
                     if cleaned_text.startswith('URL'):
-                        source = cleaned_text.split('URL: ')[1]
+                        url = cleaned_text.split('URL: ')[1]
                     else:
-                        source = cleaned_text
+                        url = cleaned_text
                     continue
                 # URL이 아니면 텍스트로 처리
                 if clean:
@@ -50,143 +112,355 @@ def parse_word(file_path: str, clean: bool = False) -> Dict[str, Any]:
     # 3. 최종 Dict 반환
     parsed_dict = {
         "doc_title": filename,
-        "doc_source": source if 'source' in locals() else filename, 
+        "doc_source": url if url is not None else filename, 
         "raw_text": " ".join(full_text),
         "chunk_list": []
     }
     return parsed_dict
 
 
-def parse_pdf(file_path: str) -> Dict[str, Any]:
+def _clean_lines(page_text: Optional[str]) -> list[str]:
+    """
+    페이지 텍스트를 줄 단위로 나누고 줄마다 공백을 정리한다. (빈 줄 제외)
+    """
+    if not page_text:
+        return []
+    lines = (" ".join(line.split()) for line in page_text.splitlines())
+    return [line for line in lines if line]
+
+
+def _iter_pdf_pages_pdfplumber(source) -> Iterator[tuple[int, list[str], bool]]:
+    # pdfplumber는 읽은 페이지의 레이아웃/객체를 캐시하므로, 페이지마다 close()로 캐시를 비움
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages:
+            try:
+                lines = _clean_lines(page.extract_text())
+                has_images = bool(page.images)
+            finally:
+                page.close()
+            yield page.page_number, lines, has_images
+
+
+def _iter_pdf_pages_pypdf(source) -> Iterator[tuple[int, list[str], bool]]:
+    # pypdf는 선택 의존성이므로 사용할 때만 import
+    from pypdf import PdfReader
+
+    reader = PdfReader(source)
+    for page_index, page in enumerate(reader.pages):
+        # page.images는 이미지를 디코딩하므로, 리소스의 XObject 종류만 확인
+        resources = page["/Resources"] if "/Resources" in page else {}
+        xobjects = resources["/XObject"] if "/XObject" in resources else {}
+        has_images = any(xobjects[name]["/Subtype"] == "/Image" for name in xobjects)
+        yield page_index + 1, _clean_lines(page.extract_text()), has_images
+
+
+def _iter_pdf_pages_pypdfium2(source) -> Iterator[tuple[int, list[str], bool]]:
+    # pypdfium2는 pdfplumber의 의존성이지만, 사용할 때만 import
+    import pypdfium2
+    import pypdfium2.raw as pdfium_c
+
+    pdf = pypdfium2.PdfDocument(source)
+    try:
+        for page_index in range(len(pdf)):
+            page = pdf[page_index]
+            textpage = page.get_textpage()
+            try:
+                lines = _clean_lines(textpage.get_text_range())
+                has_images = any(True for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)))
+            finally:
+                textpage.close()
+                page.close()
+            yield page_index + 1, lines, has_images
+    finally:
+        pdf.close()
+
+
+# PDF_BACKEND 이름 -> PDF를 한 페이지씩 읽는 함수
+PDF_BACKENDS = {
+    "pdfplumber": _iter_pdf_pages_pdfplumber,  # 레이아웃 분석 포함, 가장 느림 (이전 방식)
+    "pypdf": _iter_pdf_pages_pypdf,            # 순수 파이썬 (선택 의존성: poetry install -E pypdf)
+    "pypdfium2": _iter_pdf_pages_pypdfium2,    # PDFium (C++ 구현), 가장 빠름
+}
+
+
+def iter_pdf_pages(source, backend: str = PDF_BACKEND) -> Iterator[tuple[int, list[str], bool]]:
     """
-    PDF 문서를 파싱하여 title, source, raw_text를 추출하는 함수.
+    PDF를 한 페이지씩 읽어 (페이지 번호(1부터), 공백을 정리한 줄 목록, 이미지 포함 여부)를 yield.
+    source는 파일 경로 또는 바이너리 파일 객체.
+    어떤 backend든 페이지를 다 읽으면 해당 페이지 객체를 닫아, 페이지 수와 관계없이
+    메모리 사용량이 일정하게 유지되도록 한다.
+    """
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"지원하지 않는 PDF backend입니다: {backend}")
+    require_backend(backend)
+    yield from PDF_BACKENDS[backend](source)
+
+
+def parse_pdf(source, backend: str = PDF_BACKEND, filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    PDF 문서를 파싱하여 title, source, 페이지별 텍스트를 추출하는 함수.
+    - source: 파일 경로, bytes, 바이너리 파일 객체 (bytes/파일 객체면 filename 지정)
+    - backend: 텍스트 추출 방식 ("pdfplumber", "pypdf", "pypdfium2"). 어떤 backend든 같은 형식의 dict를 반환
     - 첫 줄이 URL인 경우만 출처로 사용, 아니면 파일명을 출처로 사용
-    - 모든 텍스트는 하나의 문자열로 합침
-    - 이미지와 관련된 코드 구조는 유지하되, 실제 바이너리는 저장하지 않음
+    - pages: 페이지마다 {"page_num"(1부터), "text", "has_images"}
+      (문서 전체를 하나의 문자열로 합치지 않고, chunk_pdf가 페이지별로 바로 청킹)
+    - 이미지는 포함 여부만 기록하고, 실제 바이너리는 저장하지 않음
     """
-    filename = os.path.basename(file_path)
-    full_text = []
+    filename = source_filename(source, filename)
+    pages = []
     first_line = True
-    source = None
-
-    with pdfplumber.open(file_path) as pdf:
-        for page_index, page in enumerate(pdf.pages):
-            # 1. 텍스트 추출
-            page_text = page.extract_text()
-            if page_text:
-                lines = page_text.split('\n')
-                for line in lines:
-                    cleaned_line = " ".join(line.strip().split())
-                    if cleaned_line:
-                        # 1-1. 첫 유효 텍스트가 URL인지 확인
-                        if first_line:
-                            first_line = False
-                            if cleaned_line.startswith(('http://', 'https://')):
-                                source = cleaned_line
-                                continue
-                            cleaned_line = re.sub(r"[^0-9A-Za-z가-힣\s.,!?\-()]", "", cleaned_line)
-                            if cleaned_line:
-                                full_text.append(cleaned_line)
-                        else:
-                            cleaned_line = re.sub(r"[^0-9A-Za-z가-힣\s.,!?\-()]", "", cleaned_line)
-                            if cleaned_line:
-                                full_text.append(cleaned_line)
-
-            # 2. 이미지 처리 구조는 남겨두지만, 실제 바이너리/설명은 스킵
-            if page.images:
-                full_text.append("<IMAGE>")
-
-            # 3. 페이지 구분 
-            full_text.append(f"<PAGE_BREAK: {page_index}>")
-
-    # 4. 최종 Dict 반환
+    url = None
+
+    for page_num, lines, has_images in iter_pdf_pages(open_source(source), backend):
+        page_text = []
+        for cleaned_line in lines:
+            # 첫 유효 텍스트가 URL인지 확인
+            if first_line:
+                first_line = False
+                if cleaned_line.startswith(('http://', 'https://')):
+                    url = cleaned_line
+                    continue
+            cleaned_line = re.sub(r"[^0-9A-Za-z가-힣\s.,!?\-()]", "", cleaned_line)
+            if cleaned_line:
+                page_text.append(cleaned_line)
+        pages.append({"page_num": page_num, "text": " ".join(page_text), "has_images": has_images})
+
     parsed_dict = {
         "doc_title": filename,
-        "doc_source": source if source else filename, 
-        "raw_text": " ".join(full_text),
-        "chunk_list": [] 
+        "doc_source": url if url is not None else filename,
+        "pages": pages,
+        "chunk_list": []
     }
     return parsed_dict
 
 
-def parse_mbox(mbox_path: str) -> list[Document]:
-
-    # 제거할 문구들
-    disclaimer_strings = [
-        "본 메일은 발신전용입니다. (This is an outgoing mail only.)",
-        "메일 수신을 원치 않으시면 아래의 경로에서  \"수신받지 않음\"으로 설정 바랍니다. (If you do not want to receive this type of mail, please set \"Unsubscribe\" in the path below.)",
-        "경로: POVIS 전자게시 → 환경설정 → 교내회보 수신설정(Path: POVIS Bulletin Boards → Settings → Announcements Setting)"
-    ]
-
-    mbox_data = mailbox.mbox(mbox_path)
-    documents = []
-
-    for message in mbox_data:
-        # 메일 제목
-        subject = str(make_header(decode_header(message['Subject']))) if message['Subject'] else "No Subject"
-        # 메일 날짜
-        date_str = str(message['Date']) if message['Date'] else "No Date"
-
-        # 이 메일에서 추출한 텍스트 누적
-        full_text = ""
-
-        # multipart 여부 확인
-        if message.is_multipart():
-            for part in message.walk():
-                ctype = part.get_content_type()
-                if ctype == "text/plain":
-                    payload = part.get_payload(decode=True)
-                    if payload:
-                        text = payload.decode("utf-8", errors="ignore")
-                        full_text += text
-                elif ctype == "text/html":
-                    payload = part.get_payload(decode=True)
-                    if payload:
-                        html = payload.decode("utf-8", errors="ignore")
-                        soup = BeautifulSoup(html, "html.parser")
-                        text = soup.get_text()
-                        full_text += text
-        else:
-            # 단일 파트
-            ctype = message.get_content_type()
+# ===== mbox =====
+
+# 제거할 문구들
+MBOX_DISCLAIMER_STRINGS = [
+    "본 메일은 발신전용입니다. (This is an outgoing mail only.)",
+    "메일 수신을 원치 않으시면 아래의 경로에서  \"수신받지 않음\"으로 설정 바랍니다. (If you do not want to receive this type of mail, please set \"Unsubscribe\" in the path below.)",
+    "경로: POVIS 전자게시 → 환경설정 → 교내회보 수신설정(Path: POVIS Bulletin Boards → Settings → Announcements Setting)"
+]
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """
+    표준 라이브러리 HTMLParser로 텍스트 노드만 모은다. (트리를 만들지 않아 BeautifulSoup보다 빠름)
+    BeautifulSoup.get_text()처럼 script/style 내용과 주석은 제외한다.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def _html_to_text_bs4(html: str) -> str:
+    return BeautifulSoup(html, "html.parser").get_text()
+
+
+def _html_to_text_stdlib(html: str) -> str:
+    parser = _HTMLTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def _html_to_text_lxml(html: str) -> str:
+    # lxml은 선택 의존성이므로 사용할 때만 import
+    import lxml.html
+
+    if not html.strip():
+        return ""
+    tree = lxml.html.document_fromstring(html)
+    for element in tree.xpath("//script|//style"):
+        element.drop_tree()   # tail 텍스트는 유지됨
+    return tree.text_content()
+
+
+# MBOX_HTML_BACKEND 이름 -> HTML에서 텍스트를 뽑는 함수
+HTML_BACKENDS = {
+    "bs4": _html_to_text_bs4,        # BeautifulSoup + html.parser (이전 방식)
+    "stdlib": _html_to_text_stdlib,  # 표준 라이브러리 HTMLParser (추가 의존성 없음)
+    "lxml": _html_to_text_lxml,      # lxml (C 구현, 선택 의존성: poetry install -E lxml)
+}
+
+
+def html_to_text(html: str, backend: str = MBOX_HTML_BACKEND) -> str:
+    if backend not in HTML_BACKENDS:
+        raise ValueError(f"지원하지 않는 HTML backend입니다: {backend}")
+    return HTML_BACKENDS[backend](html)
+
+
+def mail_to_document(message: mailbox.mboxMessage, html_backend: str = MBOX_HTML_BACKEND) -> Document:
+    """
+    메일 하나를 Document로 변환한다. (본문 추출, 안내문구 제거, 공백 정리)
+    """
+    # 메일 제목
+    subject = str(make_header(decode_header(message['Subject']))) if message['Subject'] else "No Subject"
+    # 메일 날짜
+    date_str = str(message['Date']) if message['Date'] else "No Date"
+    # 메일 고유 키 (Message-ID가 없으면 제목 + 날짜)
+    message_id = str(message['Message-ID']).strip() if message['Message-ID'] else f"{subject}|{date_str}"
+
+    # 이 메일에서 추출한 텍스트 누적
+    full_text = ""
+
+    # multipart 여부 확인
+    if message.is_multipart():
+        for part in message.walk():
+            ctype = part.get_content_type()
             if ctype == "text/plain":
-                payload = message.get_payload(decode=True)
+                payload = part.get_payload(decode=True)
                 if payload:
                     text = payload.decode("utf-8", errors="ignore")
-                    full_text = text
+                    full_text += text
             elif ctype == "text/html":
-                payload = message.get_payload(decode=True)
+                payload = part.get_payload(decode=True)
                 if payload:
                     html = payload.decode("utf-8", errors="ignore")
-                    soup = BeautifulSoup(html, "html.parser")
-                    text = soup.get_text()
-                    full_text = text
-
-        # (2) 특정 안내문구 제거
-        for disc in disclaimer_strings:
-            full_text = full_text.replace(disc, "")
-
-        # (3) 여러 줄바꿈('\n\n...') -> '\n' 하나로 축소
-        full_text = re.sub(r'\n{2,}', '\n', full_text)
-
-        # (4) 여러 공백 -> 하나의 공백으로 축소
-        full_text = re.sub(r'[ \t]+', ' ', full_text)
-
-        # (5) 앞뒤 공백 제거
-        full_text = full_text.strip()
-
-        # (6) 일시 제거
-        full_text = "\n".join(full_text.split("\n")[2:])
-
-        # 메일 본문 맨 윗부분에 Date/Title 등을 넣고 싶다면, 아래처럼 합칠 수도 있음
-        # full_text = f"Date: {date_str}\nTitle: {subject}\n\n{full_text}"
-        # Document 생성
-        doc = Document(
-            doc_type="email",
-            doc_title=subject,
-            doc_source=f"[교내회보메일] {subject}",  # 혹은 mbox 파일명 등 원하는 형태로
-            raw_text=full_text,
-        )
-        documents.append(doc)
+                    text = html_to_text(html, html_backend)
+                    full_text += text
+    else:
+        # 단일 파트
+        ctype = message.get_content_type()
+        if ctype == "text/plain":
+            payload = message.get_payload(decode=True)
+            if payload:
+                text = payload.decode("utf-8", errors="ignore")
+                full_text = text
+        elif ctype == "text/html":
+            payload = message.get_payload(decode=True)
+            if payload:
+                html = payload.decode("utf-8", errors="ignore")
+                text = html_to_text(html, html_backend)
+                full_text = text
+
+    # (2) 특정 안내문구 제거
+    for disc in MBOX_DISCLAIMER_STRINGS:
+        full_text = full_text.replace(disc, "")
+
+    # (3) 여러 줄바꿈('\n\n...') -> '\n' 하나로 축소
+    full_text = re.sub(r'\n{2,}', '\n', full_text)
+
+    # (4) 여러 공백 -> 하나의 공백으로 축소
+    full_text = re.sub(r'[ \t]+', ' ', full_text)
+
+    # (5) 앞뒤 공백 제거
+    full_text = full_text.strip()
+
+    # (6) 일시 제거
+    full_text = "\n".join(full_text.split("\n")[2:])
+
+    # 메일 본문 맨 윗부분에 Date/Title 등을 넣고 싶다면, 아래처럼 합칠 수도 있음
+    # full_text = f"Date: {date_str}\nTitle: {subject}\n\n{full_text}"
+    # Document 생성
+    return Document(
+        doc_type="email",
+        doc_key=f"mbox:{message_id}",
+        doc_title=subject,
+        doc_source=f"[교내회보메일] {subject}",  # 혹은 mbox 파일명 등 원하는 형태로
+        raw_text=full_text,
+    )
+
+
+def _raw_mails_to_documents(args: tuple[list[bytes], str]) -> list[Document]:
+    """
+    프로세스 풀 작업 단위: 원본 메일 바이트 여러 개를 Document로 변환.
+    """
+    raw_mails, html_backend = args
+    return [mail_to_document(mailbox.mboxMessage(raw), html_backend) for raw in raw_mails]
+
+
+def _iter_raw_mails_from_stream(stream) -> Iterator[bytes]:
+    """
+    mbox 형식의 바이너리 스트림을 "From " 줄 기준으로 나눠 메일 원본 바이트를 하나씩 yield.
+    (mailbox.mbox.get_bytes와 같이 "From " 줄은 빼고, 줄바꿈은 \n으로 통일)
+    """
+    def _join(lines: list[bytes]) -> bytes:
+        # 메일 사이의 빈 구분 줄은 본문에 포함하지 않는다
+        if lines and lines[-1] == b"\n":
+            lines.pop()
+        return b"".join(lines)
+
+    lines = None
+    for line in stream:
+        if line.startswith(b"From "):
+            if lines is not None:
+                yield _join(lines)
+            lines = []
+        elif lines is not None:
+            lines.append(line.rstrip(b"\r\n") + b"\n")
+    if lines is not None:
+        yield _join(lines)
+
+
+def _iter_raw_mails(source) -> Iterator[bytes]:
+    """
+    mbox 파일 경로, bytes, 바이너리 파일 객체에서 메일 원본 바이트를 하나씩 yield.
+    메일 파싱(email 모듈)은 호출부(워커)에서 하도록 원본 바이트만 읽는다.
+    """
+    if isinstance(source, str):
+        mbox_data = mailbox.mbox(source)
+        for key in mbox_data.iterkeys():
+            yield mbox_data.get_bytes(key)
+    else:
+        yield from _iter_raw_mails_from_stream(open_source(source))
+
+
+def _iter_raw_mail_groups(raw_mails: Iterator[bytes], group_size: int) -> Iterator[list[bytes]]:
+    group = []
+    for raw in raw_mails:
+        group.append(raw)
+        if len(group) >= group_size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def iter_mbox(
+    mbox_path,
+    html_backend: str = MBOX_HTML_BACKEND,
+    max_workers: Optional[int] = MBOX_PARSE_WORKERS,
+    group_size: int = 64,
+) -> Iterator[Document]:
+    """
+    mbox 파일의 메일을 하나씩 Document로 변환해 yield하는 제너레이터.
+    전체 메일 목록을 메모리에 올리지 않으므로 큰 아카이브도 일정한 메모리로 처리할 수 있다.
+    - mbox_path    : mbox 파일 경로, bytes, 바이너리 파일 객체
+    - html_backend : HTML 본문을 텍스트로 바꾸는 방식 ("bs4", "stdlib", "lxml")
+    - max_workers  : 메일 파싱/HTML 변환 프로세스 수 (1이면 현재 프로세스에서 순차 처리)
+    병렬 처리 시에도 메일은 mbox 파일의 순서대로 yield되며, 메일 group_size개를 한 작업으로 묶어 보낸다.
+    """
+    if html_backend not in HTML_BACKENDS:
+        raise ValueError(f"지원하지 않는 HTML backend입니다: {html_backend}")
+    require_backend(html_backend)
+
+    raw_mails = _iter_raw_mails(mbox_path)
+
+    if resolve_workers(max_workers) <= 1:
+        for raw in raw_mails:
+            yield mail_to_document(mailbox.mboxMessage(raw), html_backend)
+        return
+
+    groups = ((group, html_backend) for group in _iter_raw_mail_groups(raw_mails, group_size))
+    for docs in iter_ordered(_raw_mails_to_documents, groups, max_workers):
+        yield from docs
+
 
-    return documents
\ No newline at end of file
+def parse_mbox(mbox_path) -> list[Document]:
+    return list(iter_mbox(mbox_path))
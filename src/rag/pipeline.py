@@ -0,0 +1,155 @@
+"""
+임베딩 → 요약 → Qdrant 업서트 파이프라인.
+
+업로드 단위(unit)는 Batch API 모드와 같은 dict를 사용한다.
+unit = {
+    "point_id": str,          # src/rag/ids.make_point_id
+    "body": str,              # 임베딩/요약 대상 텍스트
+    "payload": dict,          # summary를 제외한 payload
+    "summary_backend": str,   # "gpt", "textrank", "lead"
+}
+
+세 단계는 하나의 이벤트 루프 위에서 크기가 제한된 큐로 연결되어 동시에 진행된다.
+- 배치 준비 : batches 이터레이터에서 다음 배치를 꺼냄 (파싱 등 무거운 작업은 스레드에서)
+- API       : 배치 하나의 임베딩과 요약을 동시에 요청
+- 업서트     : Qdrant 업서트 (동기 클라이언트이므로 스레드에서 실행)
+배치의 임베딩은 (배치 크기, dim) float32 배열 하나로 주고받고, 그대로 Qdrant 클라이언트에 넘긴다.
+따라서 배치 N을 업서트하는 동안 배치 N+1의 API 호출이 진행되고,
+전체 처리량은 세 단계의 합이 아니라 가장 느린 단계에 가까워진다.
+
+journal(src/rag/journal.IngestJournal)을 넘기면 배치마다 임베딩/요약/업서트 완료와 입력을 다 읽었을 때의 전체 unit 수를 기록하고,
+재시작 시 이미 업서트된 unit은 건너뛰며, 요약까지 끝난 unit은 저널의 요약을 재사용한다.
+(임베딩은 임베딩 캐시를 통해 재사용되므로, 재시작 시에도 캐시를 함께 쓰는 것이 좋다)
+"""
+
+from typing import Callable, Iterable, Iterator, Optional
+from qdrant_client import models
+
+import numpy as np
+
+from common.globals import qdrant_client
+from common.config import PIPELINE_QUEUE_SIZE
+from src.rag.embedding import async_cached_embedding_batch
+from src.rag.summary import async_summarize
+
+import asyncio
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    iterable을 size개씩 묶어 리스트로 yield. (itertools.batched는 3.12부터 제공)
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_points(collection_name: str, ids: list[str], vectors: np.ndarray, payloads: list[dict]) -> None:
+    """
+    Point들을 업서트한다. vectors는 (len(ids), dim) float32 배열.
+    대량 업서트에서 에러가 나면 5개씩 잘라서 다시 시도.
+    """
+    try:
+        qdrant_client.upload_collection(
+            collection_name=collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=ids,
+            batch_size=len(ids),
+            wait=True,
+        )
+    except Exception:
+        for small_start in range(0, len(ids), 5):
+            small = slice(small_start, small_start + 5)
+            qdrant_client.upsert(
+                collection_name=collection_name,
+                points=models.Batch(ids=ids[small], vectors=vectors[small].tolist(), payloads=payloads[small]),
+            )
+
+
+async def run_pipeline(
+    batches: Iterable[list[dict]],
+    collection_name: str,
+    embedding_cache=None,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    on_upserted: Optional[Callable[[list[dict]], None]] = None,
+    journal=None,
+) -> None:
+    """
+    batches의 각 배치(unit 리스트)를 임베딩/요약해서 업서트한다.
+    on_upserted(batch)는 배치 하나의 업서트가 끝날 때마다 호출된다 (진행률, manifest 기록 등).
+    저널에 업서트 완료로 기록되어 건너뛴 unit들도 on_upserted로 전달된다.
+    한 단계에서 예외가 나면 나머지 단계도 취소되고 예외가 그대로 전달된다.
+    """
+    api_queue = asyncio.Queue(maxsize=queue_size)
+    upsert_queue = asyncio.Queue(maxsize=queue_size)
+    batch_iter = iter(batches)
+
+    async def _produce():
+        n_units = 0
+        while True:
+            batch = await asyncio.to_thread(next, batch_iter, None)
+            if batch is None:
+                break
+            if batch:
+                n_units += len(batch)
+                await api_queue.put(batch)
+        # 스트리밍 입력은 끝까지 읽어야 전체 unit 수를 알 수 있다 (python -m src.rag.journal의 진행률)
+        if journal:
+            journal.record_total(n_units)
+        await api_queue.put(None)
+
+    async def _call_api():
+        while (batch := await api_queue.get()) is not None:
+            summaries = [None] * len(batch)
+            if journal:
+                done = [unit for unit in batch if journal.is_upserted(unit)]
+                if done and on_upserted:
+                    on_upserted(done)
+                batch = [unit for unit in batch if not journal.is_upserted(unit)]
+                if not batch:
+                    continue
+                summaries = [journal.get_summary(unit) for unit in batch]
+
+            # 저널에 요약이 없는 unit만 요약 요청
+            todo = [idx for idx, summ in enumerate(summaries) if summ is None]
+            texts = [unit["body"] for unit in batch]
+            embeddings, new_summaries = await asyncio.gather(
+                async_cached_embedding_batch(texts, cache=embedding_cache),
+                async_summarize([texts[i] for i in todo], [batch[i]["summary_backend"] for i in todo]),
+            )
+            for idx, summ in zip(todo, new_summaries):
+                summaries[idx] = summ.model_dump()
+
+            if journal:
+                journal.record_embedded(batch)
+                if todo:
+                    journal.record_summarized([batch[i] for i in todo], [summaries[i] for i in todo])
+            await upsert_queue.put((batch, embeddings, summaries))
+        await upsert_queue.put(None)
+
+    async def _upsert():
+        while (item := await upsert_queue.get()) is not None:
+            batch, embeddings, summaries = item
+            payloads = []
+            for unit, summ in zip(batch, summaries):
+                payload = dict(unit["payload"])
+                payload["summary"] = summ
+                payloads.append(payload)
+
+            ids = [unit["point_id"] for unit in batch]
+            await asyncio.to_thread(upsert_points, collection_name, ids, embeddings, payloads)
+            if journal:
+                journal.record_upserted(batch)
+            if on_upserted:
+                on_upserted(batch)
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(_produce())
+        tg.create_task(_call_api())
+        tg.create_task(_upsert())
@@ -0,0 +1,178 @@
+from common.types import str_struct, strlist_struct
+from common.config import SUMMARY_PACK_SIZE, EXTRACTIVE_SUMMARY_MAX_CHARS, SUMMARY_BACKEND
+from src.llm.gpt.inference import async_run_gpt
+from src.rag.embedding import count_tokens
+from src.utils.ratelimit import chat_limiter
+
+import re, math, asyncio
+
+
+def build_packed_prompt(texts: list[str]) -> str:
+    """
+    여러 청크를 [번호]로 구분해 하나의 요약 요청 본문으로 합친다.
+    """
+    return "\n\n".join(f"[{idx + 1}]\n{text}" for idx, text in enumerate(texts))
+
+
+async def async_summarize_single(text: str, gpt_model: str = "gpt-4o-mini") -> str_struct:
+    return await chat_limiter.run(
+        lambda: async_run_gpt(text, "make_summary.json", str_struct, gpt_model=gpt_model),
+        tokens=count_tokens(text),
+    )
+
+
+async def async_summarize_packed(texts: list[str], gpt_model: str = "gpt-4o-mini") -> list[str_struct]:
+    """
+    texts 전체를 한 번의 요청으로 요약한다.
+    모델이 보낸 개수와 다른 개수의 요약을 돌려주면, 청크별 단건 요청으로 대체한다.
+    요청은 공유 rate limiter(chat_limiter) 안에서 보내며, 실패한 요청만 재시도된다.
+    """
+    if len(texts) == 1:
+        return [await async_summarize_single(texts[0], gpt_model)]
+
+    prompt = build_packed_prompt(texts)
+    packed = await chat_limiter.run(
+        lambda: async_run_gpt(prompt, "make_summary_batch.json", strlist_struct, gpt_model=gpt_model),
+        tokens=count_tokens(prompt),
+    )
+    if packed is not None and len(packed.output) == len(texts):
+        return [str_struct(output=summary) for summary in packed.output]
+
+    # 개수가 맞지 않으면 어떤 요약이 어떤 청크의 것인지 알 수 없으므로 단건 요청으로 대체
+    return await asyncio.gather(*[async_summarize_single(text, gpt_model) for text in texts])
+
+
+async def async_summarize_batch(
+    texts: list[str],
+    pack_size: int = SUMMARY_PACK_SIZE,
+    gpt_model: str = "gpt-4o-mini",
+) -> list[str_struct]:
+    """
+    texts를 pack_size개씩 묶어 요약한다.
+    반환값의 순서는 texts의 순서와 동일하므로, 호출부에서 point ID와 zip 해서 사용한다.
+    """
+    groups = [texts[start : start + pack_size] for start in range(0, len(texts), pack_size)]
+    group_results = await asyncio.gather(*[async_summarize_packed(g, gpt_model) for g in groups])
+    return [summary for group in group_results for summary in group]
+
+
+# ===== CPU 전용 추출 요약 (LLM 호출 없음) =====
+
+def split_sentences(text: str) -> list[str]:
+    """
+    한국어/영어 문장 경계(. ! ? 。 및 줄바꿈)로 텍스트를 나눈다.
+    """
+    sentences = re.split(r"(?<=[.!?。])\s+|\n+", text)
+    return [s.strip() for s in sentences if s and s.strip()]
+
+
+def _char_bigrams(sentence: str) -> set[str]:
+    # 형태소 분석기 없이도 한국어에 잘 동작하도록 공백을 뺀 글자 bigram을 사용
+    compact = re.sub(r"\s+", "", sentence)
+    return {compact[i : i + 2] for i in range(len(compact) - 1)}
+
+
+def _truncate(sentence: str, max_chars: int) -> str:
+    return sentence if len(sentence) <= max_chars else sentence[: max_chars - 3] + "..."
+
+
+def lead_summary(text: str, max_chars: int = EXTRACTIVE_SUMMARY_MAX_CHARS, min_chars: int = 10) -> str:
+    """
+    min_chars 이상인 첫 문장을 요약으로 사용한다. (공지/게시글처럼 핵심이 앞에 오는 글에 적합)
+    """
+    sentences = split_sentences(text)
+    for sentence in sentences:
+        if len(sentence) >= min_chars:
+            return _truncate(sentence, max_chars)
+    return _truncate(sentences[0], max_chars) if sentences else ""
+
+
+def textrank_summary(
+    text: str,
+    max_chars: int = EXTRACTIVE_SUMMARY_MAX_CHARS,
+    damping: float = 0.85,
+    n_iter: int = 30,
+) -> str:
+    """
+    TextRank로 가장 중심적인 문장 하나를 골라 요약으로 사용한다.
+    문장 간 유사도는 글자 bigram 겹침을 문장 길이의 로그 합으로 나눈 값.
+    """
+    sentences = [s for s in split_sentences(text) if len(s) >= 5]
+    if len(sentences) <= 1:
+        return lead_summary(text, max_chars)
+
+    grams = [_char_bigrams(s) for s in sentences]
+    n = len(sentences)
+    weights = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            overlap = len(grams[i] & grams[j])
+            if overlap:
+                w = overlap / (math.log(len(grams[i]) + 1) + math.log(len(grams[j]) + 1))
+                weights[i][j] = weights[j][i] = w
+
+    out_sums = [sum(row) for row in weights]
+    scores = [1.0] * n
+    for _ in range(n_iter):
+        scores = [
+            (1 - damping) + damping * sum(
+                weights[j][i] / out_sums[j] * scores[j] for j in range(n) if weights[j][i]
+            )
+            for i in range(n)
+        ]
+
+    # 점수가 같으면 앞쪽 문장을 우선
+    best = max(range(n), key=lambda i: (scores[i], -i))
+    return _truncate(sentences[best], max_chars)
+
+
+async def async_summarize_extractive(texts: list[str], method=textrank_summary) -> list[str_struct]:
+    return [str_struct(output=method(text)) for text in texts]
+
+
+# backend 이름 -> 요약 함수 (texts -> list[str_struct])
+SUMMARY_BACKENDS = {
+    "gpt": async_summarize_batch,
+    "textrank": lambda texts: async_summarize_extractive(texts, textrank_summary),
+    "lead": lambda texts: async_summarize_extractive(texts, lead_summary),
+}
+
+
+def resolve_backend(source: str, override=None) -> str:
+    """
+    소스(word, pdf, mbox, everytime 등)에 사용할 요약 backend 이름을 정한다.
+    - override가 문자열이면 소스와 관계없이 그 backend를 사용
+    - override가 dict이면 해당 소스의 값을 우선 사용
+    - 그 외에는 config의 SUMMARY_BACKEND 설정을 따른다
+    """
+    if isinstance(override, str):
+        return override
+    if isinstance(override, dict) and source in override:
+        return override[source]
+    return SUMMARY_BACKEND.get(source, "gpt")
+
+
+async def async_summarize(texts: list[str], backends) -> list[str_struct]:
+    """
+    backend별로 texts를 나누어 요약한다.
+    - backends가 문자열이면 모든 텍스트에 같은 backend를 사용
+    - 리스트이면 texts[i]에 backends[i]를 사용 (소스별로 다른 backend를 쓰는 경우)
+    반환값의 순서는 texts의 순서와 동일하다.
+    """
+    if isinstance(backends, str):
+        backends = [backends] * len(texts)
+
+    groups = {}
+    for idx, backend in enumerate(backends):
+        if backend not in SUMMARY_BACKENDS:
+            raise ValueError(f"지원하지 않는 요약 backend입니다: {backend}")
+        groups.setdefault(backend, []).append(idx)
+
+    results = [None] * len(texts)
+    group_results = await asyncio.gather(
+        *[SUMMARY_BACKENDS[b]([texts[i] for i in indices]) for b, indices in groups.items()]
+    )
+    for indices, summaries in zip(groups.values(), group_results):
+        for i, summary in zip(indices, summaries):
+            results[i] = summary
+    return results
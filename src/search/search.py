@@ -53,6 +53,7 @@ def search(
             "doc_title": r.payload.get("doc_title"),
             "doc_source": r.payload.get("doc_source"),
             "raw_text": r.payload.get("raw_text"),
+            "page_num": r.payload.get("page_num"),   # PDF 청크만 존재
             # summary가 없는 경우 대비
             "summary": r.payload.get("summary", {}).get("output", "")
         })
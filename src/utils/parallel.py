@@ -0,0 +1,94 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, Optional
+
+import os
+
+
+def resolve_workers(max_workers: Optional[int]) -> int:
+    """
+    None이면 CPU 코어 수를 사용.
+    """
+    return max_workers or os.cpu_count() or 1
+
+
+def iter_ordered(
+    func: Callable,
+    items: Iterable,
+    max_workers: Optional[int] = None,
+    prefetch: Optional[int] = None,
+    on_crash: Optional[Callable] = None,
+) -> Iterator:
+    """
+    items의 각 항목에 func를 프로세스 풀에서 적용하고, 입력 순서대로 결과를 yield한다.
+    - executor.map과 달리 items를 한꺼번에 제출하지 않고, 진행 중인 작업을 prefetch개(기본 workers * 2)로 제한
+      → items가 큰 제너레이터여도, 결과 소비가 느려도 메모리가 일정하게 유지된다
+    - max_workers가 1이면 프로세스 풀 없이 현재 프로세스에서 순차 처리
+    func와 items의 항목은 pickle 가능해야 한다. (func는 모듈 최상위 함수)
+    func 안에서 난 예외는 해당 결과를 꺼낼 때 그대로 raise된다.
+
+    워커 프로세스가 죽으면(segfault, OOM killer 등 → BrokenProcessPool) on_crash가 있을 때
+    - 풀을 새로 만들고, 그때 진행 중이던 항목들을 하나씩 따로 다시 실행해 죽게 만든 항목을 찾는다
+    - 그 항목의 결과 자리에는 on_crash(항목, 예외)의 반환값을 yield하고, 나머지는 계속 처리한다
+    on_crash가 None이면 BrokenProcessPool을 그대로 raise한다.
+    """
+    max_workers = resolve_workers(max_workers)
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    prefetch = prefetch or max_workers * 2
+    item_iter = iter(items)
+    pending = deque()    # (항목, future, 혼자 실행했는지)
+    suspects = deque()   # 풀이 깨질 때 진행 중이던 항목 (하나씩 다시 실행)
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def _submit(item) -> Future:
+        try:
+            return executor.submit(func, item)
+        except BrokenProcessPool as exc:
+            # 결과를 꺼내기 전에 풀이 깨졌으면 제출부터 실패한다 → 결과를 꺼낼 때와 같이 처리
+            future = Future()
+            future.set_exception(exc)
+            return future
+
+    def _fill():
+        if suspects:
+            # 죽게 만든 항목을 가려내기 위해 하나씩만 실행
+            if not pending:
+                item = suspects.popleft()
+                pending.append((item, _submit(item), True))
+            return
+        while len(pending) < prefetch:
+            try:
+                item = next(item_iter)
+            except StopIteration:
+                return
+            pending.append((item, _submit(item), False))
+
+    try:
+        while True:
+            _fill()
+            if not pending:
+                return
+            item, future, isolated = pending.popleft()
+            if not isolated:
+                _fill()
+            try:
+                result = future.result()
+            except BrokenProcessPool as exc:
+                if on_crash is None:
+                    raise
+                executor.shutdown(wait=True, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+                if not isolated:
+                    # 어느 항목 때문에 죽었는지 모르므로, 진행 중이던 항목을 모두 입력 순서대로 다시 실행
+                    suspects.extend([item] + [entry[0] for entry in pending])
+                    pending.clear()
+                    continue
+                result = on_crash(item, exc)
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,177 @@
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from common.config import (
+    OPENAI_EMBED_RPM,
+    OPENAI_EMBED_TPM,
+    OPENAI_CHAT_RPM,
+    OPENAI_CHAT_TPM,
+    RATE_LIMIT_MAX_CONCURRENCY,
+    RATE_LIMIT_TARGET_LATENCY,
+)
+
+import time, random, asyncio, openai
+
+
+# 재시도할 가치가 있는 일시적 오류들 (그 외 오류는 바로 raise)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    429 응답의 retry-after(-ms) 헤더를 초 단위로 반환. 없으면 None.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class RateLimiter:
+    """
+    OpenAI API 호출용 공유 rate limiter.
+    - 최근 60초 동안의 요청 수(rpm)와 토큰 수(tpm)를 제한
+    - 429를 받으면 retry-after 동안 모든 호출을 멈추고, 실패한 항목만 재시도
+    - 동시 요청 수는 AIMD로 조절: 빠르게 성공하면 조금씩 늘리고, 느려지거나 429가 오면 줄인다
+
+    asyncio.Lock 등 이벤트 루프에 묶이는 객체를 쓰지 않으므로,
+    여러 번의 asyncio.run()에 걸쳐 같은 인스턴스를 공유해도 된다.
+    """
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        max_concurrency: int = 32,
+        min_concurrency: int = 1,
+        target_latency: float = 10.0,
+        max_attempts: int = 6,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.max_attempts = max_attempts
+
+        self.concurrency = float(min(8, max_concurrency))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.window = deque()   # (timestamp, tokens)
+        self.window_tokens = 0
+
+        self.n_requests = 0
+        self.n_retries = 0
+        self.n_rate_limited = 0
+
+    def _prune(self, now: float) -> None:
+        while self.window and now - self.window[0][0] >= 60:
+            _, tokens = self.window.popleft()
+            self.window_tokens -= tokens
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        rpm/tpm/동시성 한도 안에서 요청 하나를 보낼 수 있을 때까지 기다린다.
+        """
+        # 한 요청이 tpm보다 크면 영원히 기다리게 되므로 tpm으로 잘라서 계산
+        tokens = min(tokens, self.tpm)
+        while True:
+            now = time.monotonic()
+            self._prune(now)
+
+            wait = 0.0
+            if now < self.paused_until:
+                wait = self.paused_until - now
+            elif self.in_flight >= int(self.concurrency):
+                wait = 0.05
+            elif len(self.window) >= self.rpm or self.window_tokens + tokens > self.tpm:
+                wait = max(0.05, 60 - (now - self.window[0][0]))
+            else:
+                self.window.append((now, tokens))
+                self.window_tokens += tokens
+                self.in_flight += 1
+                return
+
+            await asyncio.sleep(min(wait, 1.0))
+
+    def release(self, latency: Optional[float] = None, rate_limited: bool = False) -> None:
+        self.in_flight -= 1
+        if rate_limited:
+            # 429 → 동시성 절반으로
+            self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+        elif latency is not None:
+            if latency > self.target_latency:
+                self.concurrency = max(self.min_concurrency, self.concurrency * 0.9)
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    async def run(self, make_call: Callable[[], Awaitable], tokens: int = 0):
+        """
+        make_call()로 만든 코루틴을 한도 안에서 실행하고, 일시적 오류면 이 항목만 재시도한다.
+        make_call은 재시도마다 새 코루틴을 만들어야 하므로 함수(lambda)로 넘긴다.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            await self.acquire(tokens)
+            start = time.monotonic()
+            latency, rate_limited, error = None, False, None
+            try:
+                result = await make_call()
+                latency = time.monotonic() - start
+            except RETRYABLE_ERRORS as e:
+                rate_limited, error = isinstance(e, openai.RateLimitError), e
+            finally:
+                # 다른 오류나 취소(CancelledError, TaskGroup이 형제 작업을 취소할 때)에도 슬롯은 반드시 돌려준다
+                self.release(latency=latency, rate_limited=rate_limited)
+
+            if error is None:
+                self.n_requests += 1
+                return result
+            if attempt == self.max_attempts:
+                raise error
+
+            self.n_retries += 1
+            delay = min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+            if rate_limited:
+                self.n_rate_limited += 1
+                retry_after = get_retry_after(error)
+                if retry_after is not None:
+                    delay = retry_after
+                # 다른 호출들도 같이 멈추도록 전역으로 pause
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.n_requests,
+            "retries": self.n_retries,
+            "rate_limited": self.n_rate_limited,
+            "concurrency": int(self.concurrency),
+        }
+
+
+# 업로드 스크립트(update.py, everytime.py)가 함께 쓰는 limiter
+embedding_limiter = RateLimiter(
+    rpm=OPENAI_EMBED_RPM,
+    tpm=OPENAI_EMBED_TPM,
+    max_concurrency=RATE_LIMIT_MAX_CONCURRENCY,
+    target_latency=RATE_LIMIT_TARGET_LATENCY,
+)
+chat_limiter = RateLimiter(
+    rpm=OPENAI_CHAT_RPM,
+    tpm=OPENAI_CHAT_TPM,
+    max_concurrency=RATE_LIMIT_MAX_CONCURRENCY,
+    target_latency=RATE_LIMIT_TARGET_LATENCY,
+)
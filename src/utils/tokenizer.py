@@ -0,0 +1,13 @@
+"""
+임베딩 모델(text-embedding-3-*)과 같은 tiktoken 토크나이저(cl100k_base).
+
+인코딩 파일은 처음 쓸 때 네트워크에서 내려받으므로, import 시점이 아니라 get_encoding()을 처음 호출할 때 불러온다.
+(검색 화면처럼 토큰 수를 세지 않는 곳은 이 모듈을 import해도 네트워크를 쓰지 않음)
+"""
+
+import functools, tiktoken
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding() -> tiktoken.Encoding:
+    return tiktoken.get_encoding("cl100k_base")
@@ -1,46 +1,145 @@
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit, urlunsplit, unquote
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from tqdm import tqdm
 
-import os, requests, asyncio, boto3
+from common.config import (
+    S3_MAX_POOL_CONNECTIONS,
+    S3_UPLOAD_CONCURRENCY,
+    S3_MULTIPART_THRESHOLD,
+    S3_MULTIPART_CHUNKSIZE,
+    S3_PART_CONCURRENCY,
+    PRESIGNED_URL_REFRESH_MARGIN,
+    HTTP_TIMEOUT,
+    HTTP_CHUNK_SIZE,
+)
 
+import os, re, time, hashlib, requests, asyncio, threading, boto3
 
-def download_file(url: str, save_dir: Optional[str] = None, default_filename: str = "temp_downloaded.docx") -> str:
+
+# 스레드마다 하나씩 쓰는 HTTP 세션 (연결 재사용, requests.Session은 스레드 간 공유를 보장하지 않음)
+_http = threading.local()
+
+
+def get_http_session() -> requests.Session:
+    if getattr(_http, "session", None) is None:
+        _http.session = requests.Session()
+    return _http.session
+
+
+def normalize_url(url: str) -> str:
     """
-    URL에서 파일을 다운로드하여 저장하고 저장된 파일의 경로를 반환합니다.
+    같은 문서를 가리키는 URL이 같은 문자열이 되도록 정규화한다. (문서 고유 키, manifest 비교용)
+    scheme/호스트는 소문자로, 기본 포트와 fragment는 빼고, 빈 경로는 "/"로 바꾼다.
     """
-    try:
-        # 1. URL에서 파일 다운로드
-        response = requests.get(url, timeout=15)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"   # IPv6
+    port = parts.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def response_filename(response, url: str) -> str:
+    """
+    응답의 Content-Disposition 파일명, 없으면 URL 경로의 파일명. (둘 다 없으면 빈 문자열)
+    """
+    disposition = response.headers.get("Content-Disposition", "")
+    match = re.search(r"filename\*=(?:UTF-8|utf-8)''([^;]+)", disposition) or re.search(
+        r'filename="?([^";]+)"?', disposition
+    )
+    if match:
+        return os.path.basename(unquote(match.group(1).strip()))
+    return os.path.basename(unquote(urlparse(url).path))
+
+
+def fetch_url(
+    url: str,
+    file_path: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    timeout=HTTP_TIMEOUT,
+    chunk_size: int = HTTP_CHUNK_SIZE,
+) -> dict:
+    """
+    URL을 내려받아 file_path에 저장한다.
+    - etag / last_modified를 넘기면 조건부 요청(If-None-Match / If-Modified-Since)을 보내고,
+      서버가 304(바뀌지 않음)로 답하면 파일을 쓰지 않는다
+    - 본문은 chunk_size 단위로 임시 파일에 쓰면서 sha256을 계산하므로, 파일 크기와 관계없이 메모리는 일정하다
+      (다 받은 뒤에 file_path로 바꾸므로 중간에 실패해도 이전 파일이 남는다)
+    반환값: {"modified", "etag", "last_modified", "hash", "size", "filename"}
+            (modified=False면 hash, size, filename은 None)
+    """
+    session = session or get_http_session()
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        result = {
+            "modified": response.status_code != 304,
+            "etag": response.headers.get("ETag", etag),
+            "last_modified": response.headers.get("Last-Modified", last_modified),
+            "hash": None,
+            "size": None,
+            "filename": None,
+        }
+        if not result["modified"]:
+            return result
         response.raise_for_status()
 
-        # 2. URL에서 파일명 추출
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        
-        # 파일명이 없으면 기본 파일명 사용
-        if not filename:
-            filename = default_filename
+        dir_name = os.path.dirname(file_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        h, size = hashlib.sha256(), 0
+        tmp_path = file_path + ".part"
+        try:
+            with open(tmp_path, "wb") as f:
+                for block in response.iter_content(chunk_size=chunk_size):
+                    f.write(block)
+                    h.update(block)
+                    size += len(block)
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        result.update(hash=h.hexdigest(), size=size, filename=response_filename(response, url))
+    return result
 
-        # 3. 저장 디렉토리 설정
-        if save_dir:
-            os.makedirs(save_dir, exist_ok=True)
-            file_path = os.path.join(save_dir, filename)
-        else:
-            file_path = filename
 
-        # 4. 파일 저장
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+def download_file(url: str, save_dir: Optional[str] = None, default_filename: str = "temp_downloaded.docx") -> str:
+    """
+    URL에서 파일을 다운로드하여 저장하고 저장된 파일의 경로를 반환합니다.
+    본문은 메모리에 한 번에 올리지 않고 파일로 스트리밍합니다. (fetch_url)
+    """
+    # 1. URL에서 파일명 추출 (파일명이 없으면 기본 파일명 사용)
+    filename = os.path.basename(urlparse(url).path) or default_filename
 
-        return file_path
+    # 2. 저장 디렉토리 설정
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+        file_path = os.path.join(save_dir, filename)
+    else:
+        file_path = filename
 
+    # 3. 파일 다운로드 + 저장
+    try:
+        fetch_url(url, file_path)
     except requests.exceptions.RequestException as e:
         raise Exception(f"파일 다운로드 실패: {str(e)}")
     except OSError as e:
         raise Exception(f"파일 저장 실패: {str(e)}")
-    
+
+    return file_path
 
 
 async def async_wrapper(tasks: list) -> list:
@@ -57,83 +156,143 @@ async def async_wrapper(tasks: list) -> list:
 
 
 
+# (access_key, secret_key, region_name) -> S3 클라이언트 (스레드 간 공유, 연결 풀 재사용)
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+
+def get_s3_client(access_key: Optional[str] = None, secret_key: Optional[str] = None, region_name: Optional[str] = None):
+    """
+    자격 증명/리전별로 하나씩 만든 S3 클라이언트를 재사용한다.
+    boto3 클라이언트는 스레드 간에 공유해도 안전하고, 연결 풀(S3_MAX_POOL_CONNECTIONS)을 유지하므로
+    호출마다 새로 만들 때의 생성 비용과 TLS 연결 비용이 들지 않는다.
+    access_key, secret_key가 None이면 환경변수(S3_ACCESS_KEY, S3_SECRET_ACCESS_KEY)를 사용.
+    """
+    access_key = access_key or os.getenv("S3_ACCESS_KEY")
+    secret_key = secret_key or os.getenv("S3_SECRET_ACCESS_KEY")
+    cache_key = (access_key, secret_key, region_name)
+
+    with _s3_clients_lock:
+        if cache_key not in _s3_clients:
+            # 기본 세션은 스레드 안전하지 않으므로 클라이언트마다 세션을 따로 만든다
+            session = boto3.session.Session(
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region_name,
+            )
+            _s3_clients[cache_key] = session.client(
+                "s3",
+                config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS, retries={"mode": "adaptive"}),
+            )
+        return _s3_clients[cache_key]
+
+
 def upload_s3(files:list, access_key:str, secret_key:str, region_name:str, bucket_name:str, prefix:str=""):
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region_name
+    """
+    파일 객체들(streamlit UploadedFile, open(..., "rb") 등)을 S3에 업로드한다.
+    - 파일은 S3_UPLOAD_CONCURRENCY개까지 동시에 업로드
+    - 큰 파일(S3_MULTIPART_THRESHOLD 이상)은 파일 전체를 메모리에 올리지 않고
+      S3_MULTIPART_CHUNKSIZE 단위로 읽어 multipart로 병렬 업로드
+    실패한 파일의 key 목록을 반환한다.
+    """
+    s3 = get_s3_client(access_key, secret_key, region_name)
+    transfer_config = TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=S3_PART_CONCURRENCY,
     )
 
+    def _upload(file) -> str:
+        # prefix가 있으면 파일명 앞에 추가
+        file_key = os.path.join(prefix, file.name) if prefix else file.name
+        if file.seekable():
+            file.seek(0)
+        s3.upload_fileobj(file, bucket_name, file_key, Config=transfer_config)
+        return file_key
+
+    failed = []
     # 전체 파일 개수 기준으로 tqdm Progress Bar 생성
     with tqdm(total=len(files), desc="파일 업로드 중", unit="개") as pbar:
-        for file in files:
-            # prefix가 있으면 파일명 앞에 추가
-            file_key = os.path.join(prefix, file.name) if prefix else file.name
-            file_bytes = file.read()
-            file_size_mb = len(file_bytes) / (1024 * 1024)  # MB 단위 크기
-
-            try:
-                s3.put_object(
-                    Bucket=bucket_name,
-                    Key=file_key,
-                    Body=file_bytes
-                )
-                # 업로드 후, tqdm에 파일명과 크기 정보를 Postfix로 표시
-                pbar.set_postfix({
-                    "File": file_key,
-                    "Size(MB)": f"{file_size_mb:.2f}"
-                })
-            except ClientError as e:
-                pbar.write(f"업로드 실패: {file_key}, 에러: {e}")
-
-            # 한 파일 처리 완료 후 1만큼 업데이트
-            pbar.update(1)
+        with ThreadPoolExecutor(max_workers=max(min(S3_UPLOAD_CONCURRENCY, len(files)), 1)) as executor:
+            futures = {executor.submit(_upload, file): file for file in files}
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    file_key = future.result()
+                    # 업로드 후, tqdm에 파일명과 크기 정보를 Postfix로 표시
+                    size = getattr(file, "size", None)
+                    pbar.set_postfix({
+                        "File": file_key,
+                        "Size(MB)": f"{size / (1024 * 1024):.2f}" if size is not None else "-"
+                    })
+                except ClientError as e:
+                    failed.append(file.name)
+                    pbar.write(f"업로드 실패: {file.name}, 에러: {e}")
+
+                # 한 파일 처리 완료 후 1만큼 업데이트
+                pbar.update(1)
+    return failed
+
+
+def iter_s3_objects(s3, bucket_name: str, prefix: str = ""):
+    """
+    prefix 아래의 S3 객체를 페이지 단위로 나눠 조회하며 하나씩 yield. (1000개 넘는 목록도 모두 조회)
+    각 항목은 list_objects_v2의 Contents 항목 (Key, ETag, Size, LastModified 등).
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix or ""):
+        yield from page.get("Contents", [])
+
+
+def read_s3_object(s3, bucket_name: str, key: str) -> bytes:
+    """
+    S3 객체 하나의 내용을 bytes로 읽는다.
+    """
+    return s3.get_object(Bucket=bucket_name, Key=key)["Body"].read()
 
 def list_s3_objects(bucket_name:str, region_name:str, access_key:str, secret_key:str, prefix:str=None) -> list:
     """
     S3 버킷 내 특정 prefix(폴더) 경로의 파일(Key) 목록을 반환.
     prefix가 None이면, 버킷 전체 목록을 반환.
+    1000개가 넘어도 페이지를 이어서 모두 조회한다.
     """
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region_name
-    )
-
-    existing_files = []
-    # prefix가 None 또는 빈 문자열이면 전체 목록
-    list_kwargs = {"Bucket": bucket_name}
-    if prefix:
-        list_kwargs["Prefix"] = prefix
+    s3 = get_s3_client(access_key, secret_key, region_name)
+    return [obj["Key"] for obj in iter_s3_objects(s3, bucket_name, prefix)]
 
-    response = s3.list_objects_v2(**list_kwargs)
-    if "Contents" in response:
-        existing_files = [obj["Key"] for obj in response["Contents"]]
-    
-    return existing_files
 
+# (bucket, region, key, expiration) -> (url, 만료 시각)
+_presigned_urls = {}
+_presigned_urls_lock = threading.Lock()
 
 
 def generate_presigned_url(bucket_name, region_name, access_key, secret_key, file_key, expiration=36000):
     """
     S3 객체에 접근할 수 있는 Presigned URL을 생성하여 반환합니다.
-    expiration(초 단위) 동안 유효합니다 (기본: 3600초 = 1시간).
+    expiration(초 단위) 동안 유효합니다 (기본: 36000초 = 10시간).
+    같은 객체의 URL은 만료 PRESIGNED_URL_REFRESH_MARGIN초 전까지 캐시해서 재사용합니다.
+    (페이지를 다시 그릴 때마다 파일 수만큼 새로 서명하지 않도록)
     """
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region_name
-    )
+    cache_key = (bucket_name, region_name, file_key, expiration)
+    now = time.time()
+    with _presigned_urls_lock:
+        cached = _presigned_urls.get(cache_key)
+        if cached and cached[1] - PRESIGNED_URL_REFRESH_MARGIN > now:
+            return cached[0]
+
+    s3 = get_s3_client(access_key, secret_key, region_name)
     try:
         url = s3.generate_presigned_url(
             ClientMethod='get_object',
             Params={'Bucket': bucket_name, 'Key': file_key},
             ExpiresIn=expiration
         )
-        return url
     except ClientError as e:
         print(f"Presigned URL 생성 실패: {e}")
-        return None
\ No newline at end of file
+        return None
+
+    with _presigned_urls_lock:
+        # 만료된 URL은 정리
+        for key in [k for k, (_, expires_at) in _presigned_urls.items() if expires_at <= now]:
+            del _presigned_urls[key]
+        _presigned_urls[cache_key] = (url, now + expiration)
+    return url
@@ -0,0 +1,25 @@
+"""
+임베딩 응답 → numpy 배열 변환.
+
+OpenAI 클라이언트나 토크나이저를 import하지 않으므로, 벤치마크처럼 API 키 없이 실행하는 곳에서도 쓸 수 있다.
+"""
+
+import numpy as np
+
+import base64
+
+
+def decode_embeddings(texts: list[str], groups: list[list[int]], responses) -> np.ndarray:
+    """
+    묶음별 응답(encoding_format="base64")을 (len(texts), dim) float32 배열 하나로 모은다.
+    base64 문자열을 바로 float32로 읽으므로, 벡터마다 파이썬 float 리스트를 만들지 않는다.
+    """
+    results = None
+    for group, response in zip(groups, responses):
+        # 응답 순서가 아닌 index 필드로 원래 위치에 매핑
+        for item in response.data:
+            vector = np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+            if results is None:
+                results = np.empty((len(texts), vector.shape[0]), dtype=np.float32)
+            results[group[item.index]] = vector
+    return results if results is not None else np.empty((0, 0), dtype=np.float32)
@@ -2,12 +2,10 @@ import sys, os, asyncio, json
 sys.path.append(os.path.abspath("")) 
 
 from dotenv import load_dotenv
-from src.utils import upload_s3  # 이미 작성된 업로드 함수
+from src.utils.utils import upload_s3  # 이미 작성된 업로드 함수
 from common.config import POSTECH_BUCKET_NAME, POSTECH_REGION_NAME  
 
 import streamlit as st
-import boto3
-from botocore.exceptions import ClientError
 
 load_dotenv()
 
@@ -48,7 +46,8 @@ def make_page():
                 access_key=access_key,
                 secret_key=secret_key,
                 region_name=POSTECH_REGION_NAME,
-                bucket_name=POSTECH_BUCKET_NAME+"/staged"
+                bucket_name=POSTECH_BUCKET_NAME,
+                prefix="staged/"
             )
         st.success("파일 업로드가 완료되었습니다!")
         
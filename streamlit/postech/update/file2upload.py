@@ -4,14 +4,50 @@ sys.path.append(os.path.abspath(""))
 
 from dotenv import load_dotenv
 from src.utils.utils import upload_s3, list_s3_objects, generate_presigned_url
-from common.config import POSTECH_BUCKET_NAME, POSTECH_REGION_NAME  
-from update import upload
+from src.rag.jobs import JobQueue, ensure_workers
+from common.config import (
+    POSTECH_BUCKET_NAME,
+    POSTECH_REGION_NAME,
+    POSTECH_COLLECTION_PROD,
+    JOB_DB_PATH,
+    JOB_MAX_WORKERS,
+    JOB_POLL_INTERVAL,
+)
 
 import streamlit as st
 import pandas as pd
 
 load_dotenv()
 
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def show_jobs():
+    """
+    최근 업로드 작업의 상태, 진행률(업서트한 청크 수), 처리량을 주기적으로 갱신해서 보여준다.
+    """
+    queue = JobQueue(JOB_DB_PATH)
+    try:
+        jobs = queue.list_jobs(limit=20)
+    finally:
+        queue.close()
+
+    if not jobs:
+        st.write("등록된 업로드 작업이 없습니다.")
+        return
+
+    df = pd.DataFrame({
+        "작업": [f"#{job['id']}" for job in jobs],
+        "파일": [", ".join(job["files"]) for job in jobs],
+        "상태": [job["status"] for job in jobs],
+        "업서트한 청크": [job["progress"] for job in jobs],
+        "청크/s": [round(job["throughput"], 1) for job in jobs],
+        "경과(초)": [round(job["elapsed"]) for job in jobs],
+    })
+    st.dataframe(df, hide_index=True, use_container_width=True)
+    for job in jobs:
+        if job["status"] == "failed":
+            with st.expander(f"작업 #{job['id']} 실패 로그"):
+                st.code(job["error"])
+
 def make_page():
     st.set_page_config(page_title="Posplexity upload", layout="centered")
 
@@ -107,46 +143,49 @@ def make_page():
         files_to_upload = [f for f in uploaded_files if f.name not in existing_files]
 
         if files_to_upload:
+            job_id = None
             with st.spinner("업로드 중입니다... 잠시만 기다려 주세요."):
                 # 1. S3 업로드
-                upload_s3(
+                failed = set(upload_s3(
                     files=files_to_upload,
                     access_key=access_key,
                     secret_key=secret_key,
                     region_name=POSTECH_REGION_NAME,
                     bucket_name=POSTECH_BUCKET_NAME,
                     prefix="uploaded/"
+                ))
+
+                # 2. S3에 올라간 파일만 Qdrant 업로드 작업으로 등록 (워커 프로세스가 처리, src/rag/jobs.py)
+                #    sync_s3와 같은 s3://버킷/키 이름과 manifest로 기록해서, 이후 동기화 때 다시 올리지 않게 한다
+                uploaded = [f for f in files_to_upload if f.name not in failed]
+                if uploaded:
+                    queue = JobQueue(JOB_DB_PATH)
+                    try:
+                        job_id = queue.enqueue(
+                            [(f.name, f.getvalue()) for f in uploaded],
+                            collection=POSTECH_COLLECTION_PROD,
+                            dev=False,
+                            s3_prefix="uploaded/",
+                            bucket_name=POSTECH_BUCKET_NAME,
+                        )
+                    finally:
+                        queue.close()
+                    ensure_workers(JOB_DB_PATH, JOB_MAX_WORKERS)
+
+            if failed:
+                st.error(
+                    "다음 파일은 S3 업로드에 실패해서 등록하지 않았습니다. 다시 시도해 주세요:\n"
+                    + "\n".join(f"- {name}" for name in sorted(failed))
                 )
-
-                # 2. Local 저장
-                tmp_dir = "./data/tmp"
-                if not os.path.exists(tmp_dir):
-                    os.makedirs(tmp_dir)
-
-                local_file_paths = []
-                for f in files_to_upload:
-                    local_path = f"{tmp_dir}/{f.name[:50]}"
-                    with open(local_path, "wb") as out:
-                        out.write(f.getvalue())
-                    local_file_paths.append(local_path)
-
-            with st.spinner("Qdrant 업로드 중입니다... 창을 종료하지 마세요."):
-                # 3. Qdrant 업로드
-                upload(
-                    db_path=tmp_dir,
-                    recreate=False, 
-                    dev=False
-                )
-
-                for file in os.listdir(tmp_dir):
-                    file_path = os.path.join(tmp_dir, file)
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-
-            st.success("파일 업로드가 완료되었습니다!")
-            st.rerun()
+            if job_id is not None:
+                st.success(f"업로드 작업 #{job_id}을 등록했습니다. 창을 닫아도 업로드는 계속 진행됩니다.")
         else:
             st.info("업로드할 새로운 파일이 없습니다.")
 
+    # 업로드 작업 상태
+    st.write("---")
+    st.subheader("업로드 작업 상태")
+    show_jobs()
+
 if __name__ == "__main__":
     make_page()
\ No newline at end of file
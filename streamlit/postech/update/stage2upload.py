@@ -2,13 +2,14 @@ import sys, os
 sys.path.append(os.path.abspath("")) 
 
 from dotenv import load_dotenv
-from src.utils import upload_s3  # 이미 작성된 업로드 함수 (copy/move 등을 활용)
-from common.config import POSTECH_BUCKET_NAME, POSTECH_REGION_NAME
+from src.utils.utils import get_s3_client, iter_s3_objects
+from src.rag.cache import ParseCache
+from src.rag.loader import parse_source
+from common.config import POSTECH_BUCKET_NAME, POSTECH_REGION_NAME, PARSE_CACHE_PATH, PARSE_CACHE_MAX_BYTES
 
 import streamlit as st
 from botocore.exceptions import ClientError
 
-import PyPDF2, docx, boto3, io
 
 load_dotenv()
 
@@ -17,19 +18,12 @@ def list_staged_files(bucket_name, region_name, access_key, secret_key, prefix="
     S3 버킷 내 특정 prefix(폴더)에 있는 파일(Key) 목록을 반환하는 함수.
     예: prefix="staged" => "mybucket/staged/..." 내 파일만 가져오기
     """
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region_name
-    )
+    s3 = get_s3_client(access_key, secret_key, region_name)
 
     file_list = []
     try:
-        response = s3.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
-        if "Contents" in response:
-            # 'staged/' 폴더 그 자체만 잡히는 경우도 있으므로, Key != prefix 조건으로 필터링
-            file_list = [obj["Key"] for obj in response["Contents"] if obj["Key"] != prefix]
+        # 'staged/' 폴더 그 자체만 잡히는 경우도 있으므로, Key != prefix 조건으로 필터링
+        file_list = [obj["Key"] for obj in iter_s3_objects(s3, bucket_name, prefix) if obj["Key"] != prefix]
     except ClientError as e:
         st.error(f"S3 파일 목록 조회 실패: {e}")
     
@@ -39,12 +33,7 @@ def download_s3_file(bucket_name, region_name, access_key, secret_key, key):
     """
     S3에서 지정한 key 파일을 바이트로 다운로드하여 반환.
     """
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region_name
-    )
+    s3 = get_s3_client(access_key, secret_key, region_name)
 
     try:
         obj = s3.get_object(Bucket=bucket_name, Key=key)
@@ -53,45 +42,28 @@ def download_s3_file(bucket_name, region_name, access_key, secret_key, key):
         st.error(f"파일 다운로드 실패: {e}")
         return None
 
-def parse_pdf(file_bytes: bytes) -> str:
-    """
-    PDF 바이트를 입력받아 텍스트를 추출해서 반환
-    (PyPDF2)
-    """
-    text = ""
-    try:
-        with io.BytesIO(file_bytes) as pdf_file:  # 바이트를 파일 객체로 변환
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() or ""
-    except Exception as e:
-        text = f"[PDF 파싱 오류] {e}"
-    return text
-
-def parse_docx(file_bytes: bytes) -> str:
+def parse_preview(file_bytes: bytes, file_name: str) -> str:
     """
-    DOCX 바이트를 입력받아 텍스트를 추출해서 반환
-    (간단 예시: python-docx)
+    업로드 파이프라인과 같은 파서(src/rag/loader.parse_source)로 메모리의 파일을 바로 파싱해
+    미리보기 텍스트를 반환. 파싱 결과는 로컬 파싱 캐시(PARSE_CACHE_PATH)를 업로드와 공유하므로,
+    미리보기한 파일은 업로드할 때 다시 파싱하지 않는다.
     """
-    text = ""
+    # streamlit은 요청마다 다른 스레드에서 실행되므로, 캐시 연결은 호출마다 열고 닫는다
+    cache = ParseCache(PARSE_CACHE_PATH, PARSE_CACHE_MAX_BYTES) if PARSE_CACHE_PATH else None
     try:
-        # python-docx는 파일 경로만 받으므로,
-        # 바이트를 임시 파일로 만들어서 open해야 함
-        # 또는 io.BytesIO(file_bytes)를 바로 넘겨도 되지만, 아래 방식을 예시로 작성
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-            tmp.write(file_bytes)
-            tmp_path = tmp.name
-
-        doc = docx.Document(tmp_path)
-        paragraphs = [p.text for p in doc.paragraphs]
-        text = "\n".join(paragraphs)
-
-        # 임시 파일 삭제
-        os.remove(tmp_path)
+        _, parsed = parse_source((os.path.basename(file_name), file_bytes), cache)
     except Exception as e:
-        text = f"[DOCX 파싱 오류] {e}"
-    return text
+        return f"[파싱 오류] {e}"
+    finally:
+        if cache:
+            cache.close()
+
+    # PDF는 페이지 사이를 빈 줄로 구분해서 보여준다
+    if "pages" in parsed:
+        text = "\n\n".join(page["text"] for page in parsed["pages"] if page["text"])
+    else:
+        text = parsed["raw_text"].strip()
+    return f"출처: {parsed['doc_source']}\n\n{text}"
 
 def copy_s3_object(
     bucket_name,
@@ -106,12 +78,7 @@ def copy_s3_object(
     copy_source = {'Bucket': bucket_name, 'Key': source_key}
     s3.copy(CopySource=copy_source, Bucket=bucket_name, Key=target_key)
     """
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region_name
-    )
+    s3 = get_s3_client(access_key, secret_key, region_name)
     copy_source = {
         'Bucket': bucket_name,
         'Key': source_key
@@ -169,10 +136,10 @@ def make_page():
         _, ext = os.path.splitext(selected_file.lower())
         if ext == ".pdf":
             with st.spinner("PDF 텍스트 추출 중..."):
-                parsed_text = parse_pdf(file_bytes)
+                parsed_text = parse_preview(file_bytes, selected_file)
         elif ext == ".docx":
             with st.spinner("DOCX 텍스트 추출 중..."):
-                parsed_text = parse_docx(file_bytes)
+                parsed_text = parse_preview(file_bytes, selected_file)
         else:
             st.warning("PDF / DOCX 형식만 지원 중입니다.")
             return
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+import io, sys, os, hashlib, functools
+
+# 저장소 루트에서 실행하는 스크립트들과 같이 common/, src/를 import할 수 있도록
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# OpenAI 클라이언트는 import 시점에 API 키를 요구하므로, 실제 호출이 없는 테스트에서는 더미 키를 쓴다
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+TEST_DIM = 8
+
+
+def tokenizer_available() -> bool:
+    """
+    청커가 쓰는 tiktoken 인코딩(cl100k_base)은 처음 쓸 때 내려받으므로, 오프라인이면 업로드 파이프라인 테스트를 건너뛴다.
+    """
+    try:
+        import tiktoken
+
+        tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return False
+    return True
+
+
+requires_tokenizer = pytest.mark.skipif(not tokenizer_available(), reason="tiktoken cl100k_base 인코딩을 불러올 수 없음")
+
+
+def fake_vector(text: str) -> list[float]:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [b / 255 for b in digest[:TEST_DIM]]
+
+
+def make_docx(source_url: str, paragraphs: list[str]) -> bytes:
+    """
+    첫 줄이 출처 URL인 docx 파일 (parse_word 형식)
+    """
+    import docx
+
+    document = docx.Document()
+    document.add_paragraph(source_url)
+    for text in paragraphs:
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def sentences(topic: str, n: int = 6) -> list[str]:
+    """
+    저정보 청크로 걸러지지 않을 만큼의 서로 다른 문장들
+    """
+    return [f"{topic} 안내 {i}번째 항목은 신청 기간과 제출 서류, 문의처가 서로 다릅니다. ({topic}-{i})" for i in range(n)]
+
+
+@pytest.fixture
+def ingest_env(monkeypatch, tmp_path):
+    """
+    업로드 파이프라인을 외부 서비스 없이 실행하는 환경.
+    - Qdrant : 인메모리 QdrantClient (TEST_DIM 차원 컬렉션)
+    - 임베딩 : 본문 해시로 만든 가짜 벡터 (OpenAI 호출 없음)
+    - manifest, 저널, 파싱 캐시 : tmp_path 아래 (파싱은 프로세스 풀 없이 순차 처리)
+    """
+    from qdrant_client import QdrantClient, models
+    from common.config import POSTECH_COLLECTION_EXP
+
+    import numpy as np
+    import update, src.rag.pipeline as pipeline, src.rag.loader as loader
+
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        POSTECH_COLLECTION_EXP,
+        vectors_config=models.VectorParams(size=TEST_DIM, distance=models.Distance.COSINE),
+    )
+
+    async def _fake_embedding_batch(texts, cache=None):
+        return np.array([fake_vector(t) for t in texts], dtype=np.float32).reshape(len(texts), TEST_DIM)
+
+    monkeypatch.setattr(update, "qdrant_client", client)
+    monkeypatch.setattr(pipeline, "qdrant_client", client)
+    monkeypatch.setattr(pipeline, "async_cached_embedding_batch", _fake_embedding_batch)
+    monkeypatch.setattr(update, "MANIFEST_DIR", str(tmp_path / "manifest"))
+    monkeypatch.setattr(update, "JOURNAL_DIR", str(tmp_path / "journal"))
+    monkeypatch.setattr(update, "iter_load_files", functools.partial(loader.iter_load_files, max_workers=1))
+    monkeypatch.setattr(loader, "PARSE_CACHE_PATH", None)
+    monkeypatch.setattr(loader, "_parse_cache", None)
+
+    def _points() -> list:
+        points, offset = [], None
+        while True:
+            batch, offset = client.scroll(POSTECH_COLLECTION_EXP, limit=256, offset=offset, with_payload=True)
+            points.extend(batch)
+            if offset is None:
+                return points
+
+    return SimpleNamespace(client=client, collection=POSTECH_COLLECTION_EXP, tmp_path=tmp_path, points=_points)
@@ -0,0 +1,218 @@
+from types import SimpleNamespace
+
+from qdrant_client import QdrantClient, models
+
+from common.types import str_struct
+
+import numpy as np
+
+import pytest
+
+import os, json
+
+import src.rag.batch as batch
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIM = 4
+
+
+def _units() -> list[dict]:
+    units = []
+    for doc_id, path in enumerate(["/db/a.docx", "/db/b.docx"]):
+        for chunk_id in range(3):
+            units.append({
+                "point_id": f"00000000-0000-0000-0000-0000000{doc_id}000{chunk_id}",
+                "doc_id": doc_id,
+                "chunk_id": chunk_id,
+                "body": f"{path} {chunk_id}",
+                "payload": {"doc_title": os.path.basename(path), "raw_text": f"{path} {chunk_id}"},
+                "doc_key": f"file:{os.path.basename(path)}",
+                "doc_path": path,
+            })
+    return units
+
+
+def _write_results(path: str, lines: list[dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(line) + "\n" for line in lines))
+
+
+def _embedding_result(custom_id: str) -> dict:
+    body = {"data": [{"embedding": [float(len(custom_id))] + [0.5] * (DIM - 1)}]}
+    return {"custom_id": custom_id, "response": {"status_code": 200, "body": body}}
+
+
+def _summary_result(custom_id: str) -> dict:
+    content = json.dumps({"output": f"summary {custom_id}"})
+    body = {"choices": [{"message": {"content": content}}]}
+    return {"custom_id": custom_id, "response": {"status_code": 200, "body": body}}
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)   # 프롬프트 파일(src/llm/prompt)은 저장소 루트 기준 경로
+    job_dir = str(tmp_path / "job")
+    batch.write_batch_requests(_units(), job_dir, hashes={"/db/a.docx": "hash-a", "/db/b.docx": "hash-b"})
+    return job_dir
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    client = QdrantClient(":memory:")
+    client.create_collection("test", vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE))
+    monkeypatch.setattr(batch, "qdrant_client", client)
+    return client
+
+
+def test_upsert_batch_results(job_dir, qdrant):
+    results_dir = os.path.join(job_dir, "results")
+    os.makedirs(results_dir)
+    custom_ids = [batch.make_custom_id(u["doc_id"], u["chunk_id"]) for u in _units()]
+    # b.docx의 마지막 청크는 임베딩 결과가 없고, a.docx의 첫 청크 요약 요청은 실패
+    _write_results(
+        os.path.join(results_dir, "embeddings-000.jsonl"),
+        [_embedding_result(cid) for cid in custom_ids if cid != "1-2"],
+    )
+    _write_results(
+        os.path.join(results_dir, "summaries-000.jsonl"),
+        [{"custom_id": "0-0", "response": {"status_code": 500, "body": {}}}]
+        + [_summary_result(cid) for cid in custom_ids if cid != "0-0"],
+    )
+
+    stats = batch.upsert_batch_results(job_dir, "test", batch_size=2, fallback=False)
+    assert stats == {"upserted": 4, "skipped": 0, "missing": 2, "invalid": 0, "fallback": 0}
+
+    points = {p.id: p for p in qdrant.scroll("test", limit=100, with_payload=True)[0]}
+    assert len(points) == 4
+    point = points["00000000-0000-0000-0000-000000000001"]
+    assert point.payload["summary"] == {"output": "summary 0-1"}
+
+    # 다시 실행해도 이미 업서트한 청크는 건너뛴다
+    assert batch.upsert_batch_results(job_dir, "test", fallback=False)["skipped"] == 4
+
+    # 일부 청크가 빠진 파일은 manifest에 기록하지 않는다
+    assert batch.upserted_manifest_entries(job_dir) == {}
+
+    # 빠진 결과를 채우면 두 파일 모두 기록된다
+    _write_results(
+        os.path.join(results_dir, "embeddings-000.jsonl"), [_embedding_result(cid) for cid in custom_ids]
+    )
+    _write_results(os.path.join(results_dir, "summaries-000.jsonl"), [_summary_result(cid) for cid in custom_ids])
+    assert batch.upsert_batch_results(job_dir, "test", fallback=False)["upserted"] == 2
+    entries = batch.upserted_manifest_entries(job_dir)
+    assert set(entries) == {"/db/a.docx", "/db/b.docx"}
+    assert entries["/db/a.docx"]["hash"] == "hash-a"
+    assert entries["/db/a.docx"]["doc_keys"] == ["file:a.docx"]
+    assert len(entries["/db/b.docx"]["point_ids"]) == 3
+
+
+def test_failed_and_invalid_items_fall_back_to_realtime_api(job_dir, qdrant, monkeypatch):
+    results_dir = os.path.join(job_dir, "results")
+    os.makedirs(results_dir)
+    custom_ids = [batch.make_custom_id(u["doc_id"], u["chunk_id"]) for u in _units()]
+    _write_results(
+        os.path.join(results_dir, "embeddings-000.jsonl"),
+        [_embedding_result(cid) for cid in custom_ids if cid != "1-2"],
+    )
+    # 0-0은 요청 자체가 실패(에러 파일), 0-1은 스키마에 맞지 않는 JSON, 0-2는 거부(content 없음)
+    refused = {"choices": [{"message": {"content": None, "refusal": "no"}}]}
+    _write_results(
+        os.path.join(results_dir, "summaries-000.jsonl"),
+        [
+            {"custom_id": "0-1", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "{not json"}}]}}},
+            {"custom_id": "0-2", "response": {"status_code": 200, "body": refused}},
+        ]
+        + [_summary_result(cid) for cid in custom_ids if cid not in ("0-0", "0-1", "0-2")],
+    )
+    _write_results(
+        os.path.join(results_dir, "summaries-000.jsonl.errors.jsonl"),
+        [{"custom_id": "0-0", "error": {"code": "server_error"}}],
+    )
+
+    embedded, summarized = [], []
+
+    def _fake_embedding_batch(texts):
+        embedded.extend(texts)
+        return np.full((len(texts), DIM), 0.25, dtype=np.float32)
+
+    async def _fake_summarize(texts, backends):
+        summarized.extend(texts)
+        return [str_struct(output=f"realtime {text}") for text in texts]
+
+    monkeypatch.setattr(batch, "openai_embedding_batch", _fake_embedding_batch)
+    monkeypatch.setattr(batch, "async_summarize", _fake_summarize)
+
+    stats = batch.upsert_batch_results(job_dir, "test", batch_size=2)
+    assert stats == {"upserted": 6, "skipped": 0, "missing": 0, "invalid": 2, "fallback": 4}
+    # 임베딩은 결과가 없는 청크만, 요약은 실패하거나 잘못된 응답의 청크만 다시 요청
+    assert embedded == ["/db/b.docx 2"]
+    assert sorted(summarized) == ["/db/a.docx 0", "/db/a.docx 1", "/db/a.docx 2"]
+
+    points = {p.id: p for p in qdrant.scroll("test", limit=100, with_payload=True)[0]}
+    assert len(points) == 6
+    assert points["00000000-0000-0000-0000-000000000001"].payload["summary"] == {"output": "realtime /db/a.docx 1"}
+    assert set(batch.upserted_manifest_entries(job_dir)) == {"/db/a.docx", "/db/b.docx"}
+
+
+class FakeOpenAI:
+    """
+    batches.retrieve / files.content만 흉내 낸다. (batch_id → 상태, file_id → 결과 줄)
+    """
+
+    def __init__(self, batches: dict, files: dict):
+        self.batches = SimpleNamespace(retrieve=lambda batch_id: batches[batch_id])
+        self.files = SimpleNamespace(content=lambda file_id: SimpleNamespace(
+            write_to_file=lambda path: _write_results(path, files[file_id])
+        ))
+
+
+def _batch(batch_id, status, output_file_id=None, error_file_id=None, errors=None):
+    return SimpleNamespace(
+        id=batch_id,
+        status=status,
+        output_file_id=output_file_id,
+        error_file_id=error_file_id,
+        errors=SimpleNamespace(data=errors or []),
+    )
+
+
+def test_collect_terminal_states(job_dir, monkeypatch):
+    state = batch.load_state(job_dir)
+    state["parts"]["embeddings-000.jsonl"].update(batch_id="b-emb", file_id="f-emb")
+    state["parts"]["summaries-000.jsonl"].update(batch_id="b-sum", file_id="f-sum")
+    batch.save_state(job_dir, state)
+
+    # 임베딩 batch는 만료(일부 결과 있음), 요약 batch는 모든 요청이 실패해 에러 파일만 있음
+    monkeypatch.setattr(batch, "client", FakeOpenAI(
+        {
+            "b-emb": _batch("b-emb", "expired", output_file_id="out-1"),
+            "b-sum": _batch("b-sum", "completed", error_file_id="err-1"),
+        },
+        {"out-1": [_embedding_result("0-0")], "err-1": [{"custom_id": "0-0", "error": {"code": "bad"}}]},
+    ))
+    assert batch.collect_batch_job(job_dir) is False
+    assert batch.needs_resubmit(job_dir) == ["embeddings-000.jsonl"]
+
+    state = batch.load_state(job_dir)
+    emb, summ = state["parts"]["embeddings-000.jsonl"], state["parts"]["summaries-000.jsonl"]
+    assert "batch_id" not in emb and emb["failed_batches"][0]["status"] == "expired"
+    assert summ["status"] == "completed" and os.path.exists(summ["error_file"])
+
+    # 다시 제출하면 batch_id가 새로 생긴다
+    monkeypatch.setattr(batch, "client", SimpleNamespace(
+        files=SimpleNamespace(create=lambda file, purpose: SimpleNamespace(id="f-emb-2")),
+        batches=SimpleNamespace(create=lambda **kwargs: SimpleNamespace(id="b-emb-2", status="validating")),
+    ))
+    assert batch.submit_batch_job(job_dir)["parts"]["embeddings-000.jsonl"]["batch_id"] == "b-emb-2"
+
+    monkeypatch.setattr(batch, "client", FakeOpenAI(
+        {"b-emb-2": _batch("b-emb-2", "completed", output_file_id="out-2")},
+        {"out-2": [_embedding_result("0-1")]},
+    ))
+    assert batch.collect_batch_job(job_dir) is True
+
+    # 만료된 batch의 일부 결과도 업서트 대상에 포함된다
+    part = batch.load_state(job_dir)["parts"]["embeddings-000.jsonl"]
+    results = list(batch.iter_part_results(job_dir, "embeddings-000.jsonl", part))
+    assert [cid for cid, _ in results] == ["0-0", "0-1"]
@@ -0,0 +1,31 @@
+from src.rag.dedup import NearDuplicateFilter, iter_dedup_units
+
+
+NOTICE = "2024학년도 2학기 수강신청 일정 안내: 수강신청은 8월 12일부터 14일까지 포털에서 진행됩니다."
+
+
+def _unit(point_id: str, doc_path: str, body: str) -> dict:
+    return {"point_id": point_id, "doc_path": doc_path, "doc_key": point_id, "body": body}
+
+
+def test_duplicates_are_dropped_only_within_one_file():
+    units = [
+        _unit("a0", "/db/a.pdf", NOTICE),
+        _unit("a1", "/db/a.pdf", NOTICE),                 # 같은 파일 안의 완전 중복
+        _unit("a2", "/db/a.pdf", NOTICE + " 문의: 학사팀"),  # 같은 파일 안의 유사 중복
+        _unit("b0", "/db/b.pdf", NOTICE),                 # 다른 파일: 원본이 바뀌어도 사라지지 않도록 남긴다
+        _unit("b1", "/db/b.pdf", "짧음"),
+    ]
+    stats = {}
+    kept = [u["point_id"] for u in iter_dedup_units(units, stats)]
+    assert kept == ["a0", "b0"]
+    assert stats == {"kept": 2, "low_info": 1, "exact_dup": 1, "near_dup": 1}
+
+
+def test_filter_state_is_bounded():
+    dedup = NearDuplicateFilter(max_entries=10)
+    for i in range(25):
+        dedup.find(f"k{i}", f"{NOTICE} 번호 {i} " + "가나다라마바사" * i)
+    assert len(dedup.signatures) <= 10
+    assert len(dedup.exact) <= 10
+    assert sum(len(keys) for keys in dedup.buckets.values()) <= 10 * dedup.bands
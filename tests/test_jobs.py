@@ -0,0 +1,64 @@
+from src.rag.jobs import JobQueue, ensure_workers, pid_alive
+
+import src.rag.jobs as jobs
+
+import sys, time, subprocess
+
+
+def _sleeper(monkeypatch, seconds: float) -> list:
+    """
+    워커 대신 잠깐 자고 끝나는 프로세스를 띄운다. (실제 워커는 업로드 모듈을 import하므로)
+    """
+    spawned = []
+    popen = subprocess.Popen
+
+    def _popen(args, **kwargs):
+        process = popen([sys.executable, "-c", f"import time; time.sleep({seconds})"], **kwargs)
+        spawned.append(process)
+        return process
+
+    monkeypatch.setattr(jobs.subprocess, "Popen", _popen)
+    return spawned
+
+
+def test_ensure_workers_does_not_exceed_max_workers(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(db_path)
+    for i in range(3):
+        queue.enqueue([(f"{i}.pdf", b"%PDF")], collection="test")
+
+    spawned = _sleeper(monkeypatch, 30)
+    try:
+        # 워커가 스스로 등록하기 전에 다시 호출되어도 더 띄우지 않는다
+        assert ensure_workers(db_path, 2) == 2
+        assert ensure_workers(db_path, 2) == 0
+        assert sorted(queue.live_workers()) == sorted(p.pid for p in spawned)
+    finally:
+        for process in spawned:
+            process.kill()
+            process.wait()
+        queue.close()
+
+
+def test_exited_workers_are_not_counted(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(db_path)
+    queue.enqueue([("a.pdf", b"%PDF")], collection="test")
+
+    spawned = _sleeper(monkeypatch, 0)
+    try:
+        assert ensure_workers(db_path, 1) == 1
+        pid = queue.live_workers()[0]
+
+        # 끝난 워커는 (좀비로 남지 않고) 죽은 것으로 보고, 다음 호출에서 새로 띄운다
+        deadline = time.time() + 10
+        while pid_alive(pid) and time.time() < deadline:
+            time.sleep(0.05)
+        assert not pid_alive(pid)
+        assert ensure_workers(db_path, 1) == 1
+    finally:
+        # Popen 객체가 실행 중인 채로 정리되면 ResourceWarning이 나므로 테스트 안에서 기다린다
+        for process in spawned:
+            process.kill()
+            process.wait()
+        queue.close()
@@ -0,0 +1,29 @@
+from src.rag.journal import IngestJournal, print_status
+
+
+def _unit(i: int) -> dict:
+    return {"point_id": f"p{i}", "body": f"본문 {i}"}
+
+
+def test_status_shows_upserted_over_total(tmp_path, capsys):
+    path = str(tmp_path / "upload.jsonl")
+    journal = IngestJournal(path)
+    journal.start_run(files=2)
+    journal.record_upserted([_unit(0), _unit(1)])
+
+    # 입력을 다 읽기 전에는 전체 수를 모른다
+    print_status(path)
+    assert capsys.readouterr().out.splitlines()[0].endswith("업서트 2")
+
+    journal.record_total(5)
+    journal.record_upserted([_unit(2)])
+    journal.close()
+    print_status(path)
+    assert "업서트 3/5" in capsys.readouterr().out
+
+    # 이어서 실행하면 새 실행의 전체 수가 기록될 때까지 이전 값을 쓰지 않는다
+    journal = IngestJournal(path)
+    journal.start_run(files=2)
+    journal.close()
+    print_status(path)
+    assert capsys.readouterr().out.splitlines()[0].endswith("업서트 3")
@@ -0,0 +1,48 @@
+from conftest import requires_tokenizer, make_docx, sentences
+from concurrent.futures.process import BrokenProcessPool
+
+from src.utils.parallel import iter_ordered
+
+import os, pytest
+
+
+def _times_ten(x: int) -> int:
+    if x == 3:
+        os._exit(1)   # segfault / OOM killer처럼 워커 프로세스가 예외 없이 죽음
+    return x * 10
+
+
+def _crashed(item, error):
+    return ("crashed", item, type(error).__name__)
+
+
+def test_crashed_worker_is_isolated_and_rest_continue():
+    results = list(iter_ordered(_times_ten, range(8), max_workers=2, on_crash=_crashed))
+    assert results == [0, 10, 20, ("crashed", 3, "BrokenProcessPool"), 40, 50, 60, 70]
+
+
+def test_crash_raises_without_handler():
+    with pytest.raises(BrokenProcessPool):
+        list(iter_ordered(_times_ten, range(8), max_workers=2))
+
+
+@requires_tokenizer
+def test_iter_load_files_records_crashed_file_as_failed(monkeypatch):
+    from src.rag import loader
+
+    real_load_file = loader.load_file
+
+    def _load_file(source):
+        if loader.split_source(source)[0] == "crash.docx":
+            os._exit(1)
+        return real_load_file(source)
+
+    # 워커는 fork로 만들어지므로 바꾼 load_file을 그대로 쓴다
+    monkeypatch.setattr(loader, "load_file", _load_file)
+    monkeypatch.setattr(loader, "PARSE_CACHE_PATH", None)
+    sources = [(name, make_docx(f"https://example.com/{name}", sentences(name))) for name in ("a.docx", "crash.docx", "b.docx")]
+    results = list(loader.iter_load_files(sources, max_workers=2))
+
+    assert [r["path"] for r in results] == ["a.docx", "crash.docx", "b.docx"]
+    assert results[0]["doc"] and results[2]["doc"]
+    assert results[1]["doc"] is None and "비정상 종료" in results[1]["error"]
@@ -0,0 +1,62 @@
+from conftest import requires_tokenizer
+
+import importlib.util
+
+import pytest
+
+from src.rag import parse
+
+
+@pytest.fixture
+def missing_modules(monkeypatch):
+    """
+    지정한 모듈이 설치되지 않은 것처럼 find_spec이 None을 반환하게 한다.
+    """
+    missing = set()
+    real_find_spec = importlib.util.find_spec
+
+    def fake_find_spec(name, *args, **kwargs):
+        if name in missing:
+            return None
+        return real_find_spec(name, *args, **kwargs)
+
+    monkeypatch.setattr(importlib.util, "find_spec", fake_find_spec)
+    return missing
+
+
+def test_iter_mbox_fails_before_parsing_without_lxml(missing_modules):
+    missing_modules.add("lxml")
+    with pytest.raises(ImportError, match="lxml"):
+        # 제너레이터이므로 첫 next()에서 확인된다. 입력은 읽기 전에 실패해야 한다
+        next(parse.iter_mbox(b"", html_backend="lxml", max_workers=2))
+
+
+def test_require_backend_ignores_builtin_backends(missing_modules):
+    missing_modules.add("lxml")
+    parse.require_backend("stdlib")
+    parse.require_backend("bs4")
+
+
+@requires_tokenizer
+def test_iter_load_files_fails_before_pool_without_pypdf(missing_modules, monkeypatch):
+    from src.rag import loader
+
+    missing_modules.add("pypdf")
+    monkeypatch.setattr(loader, "PDF_BACKEND", "pypdf")
+
+    def fetch():
+        raise AssertionError("backend 확인 전에 입력을 읽으면 안 된다")
+
+    with pytest.raises(ImportError, match="pypdf"):
+        next(loader.iter_load_files([("s3://bucket/report.pdf", fetch)], max_workers=2))
+
+
+@requires_tokenizer
+def test_iter_load_files_skips_pdf_check_without_pdfs(missing_modules, monkeypatch):
+    from src.rag import loader
+
+    missing_modules.add("pypdf")
+    monkeypatch.setattr(loader, "PDF_BACKEND", "pypdf")
+    # docx만 있으면 PDF backend가 없어도 시작할 수 있다 (빈 입력은 바로 실패로 기록)
+    results = list(loader.iter_load_files([("memo.docx", b"")], max_workers=1))
+    assert results[0]["error"]
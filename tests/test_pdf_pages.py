@@ -0,0 +1,36 @@
+from conftest import requires_tokenizer
+
+from src.rag import parse
+
+
+def _fake_backend(source):
+    yield 1, ["https://example.com/notice", "첫 페이지 안내입니다."], False
+    yield 2, [], True
+    yield 3, ["셋째 페이지 <표> 내용입니다."], True
+
+
+def test_parse_pdf_returns_pages(monkeypatch):
+    monkeypatch.setitem(parse.PDF_BACKENDS, "fake", _fake_backend)
+    parsed = parse.parse_pdf(b"%PDF", backend="fake", filename="notice.pdf")
+
+    assert parsed["doc_source"] == "https://example.com/notice"
+    assert "raw_text" not in parsed
+    assert parsed["pages"] == [
+        {"page_num": 1, "text": "첫 페이지 안내입니다.", "has_images": False},
+        {"page_num": 2, "text": "", "has_images": True},
+        {"page_num": 3, "text": "셋째 페이지 표 내용입니다.", "has_images": True},
+    ]
+
+
+@requires_tokenizer
+def test_chunk_pdf_keeps_page_numbers(monkeypatch):
+    from common.types import Document
+    from src.rag.chunk import chunk_pdf
+
+    monkeypatch.setitem(parse.PDF_BACKENDS, "fake", _fake_backend)
+    doc = Document(**parse.parse_pdf(b"%PDF", backend="fake", filename="notice.pdf"))
+    chunks = chunk_pdf(doc)
+
+    # 빈 페이지는 건너뛰고, 청크마다 원래 페이지 번호가 남는다
+    assert [(c.chunk_id, c.page_num) for c in chunks] == [(0, 1), (1, 3)]
+    assert chunks[1].body == "셋째 페이지 표 내용입니다."
@@ -0,0 +1,42 @@
+from src.utils.ratelimit import RateLimiter
+
+import asyncio
+
+
+def test_cancelled_calls_release_slots():
+    """
+    TaskGroup이 실패한 작업의 형제들을 취소해도 limiter 슬롯이 남지 않아야 한다.
+    """
+    limiter = RateLimiter(rpm=1000, tpm=1000000, max_concurrency=8)
+
+    async def _fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def _run():
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(7):
+                    tg.create_task(limiter.run(lambda: asyncio.sleep(10)))
+                tg.create_task(limiter.run(_fail))
+        except* ValueError:
+            pass
+
+    for _ in range(3):
+        asyncio.run(asyncio.wait_for(_run(), timeout=5))
+        assert limiter.in_flight == 0
+
+
+def test_failed_call_releases_slot():
+    limiter = RateLimiter(rpm=1000, tpm=1000000)
+
+    async def _fail():
+        raise KeyError("x")
+
+    try:
+        asyncio.run(limiter.run(_fail))
+    except KeyError:
+        pass
+    assert limiter.in_flight == 0
+    assert asyncio.run(limiter.run(lambda: asyncio.sleep(0, result=1))) == 1
+    assert limiter.in_flight == 0
@@ -0,0 +1,139 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from conftest import requires_tokenizer, make_docx, sentences
+
+import pytest
+
+import threading
+
+
+class DocServer:
+    """
+    경로별 (본문, ETag, Content-Disposition 파일명)을 내려주는 로컬 HTTP 서버. If-None-Match가 맞으면 304.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.requests = []   # (경로, If-None-Match, 응답 코드)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                doc = server.docs.get(self.path)
+                if doc is None:
+                    server.requests.append((self.path, None, 404))
+                    self.send_error(404)
+                    return
+                body, etag, filename = doc
+                if_none_match = self.headers.get("If-None-Match")
+                if if_none_match == etag:
+                    server.requests.append((self.path, if_none_match, 304))
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                server.requests.append((self.path, if_none_match, 200))
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                if filename:
+                    self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def put(self, path: str, topic: str, version: int = 1, filename: str = None) -> str:
+        body = make_docx(f"https://example.com/{topic}", sentences(f"{topic}-v{version}"))
+        self.docs[path] = (body, f'"{topic}-{version}"', filename)
+        return self.base + path
+
+    def statuses(self) -> list[int]:
+        statuses = [status for _, _, status in self.requests]
+        self.requests.clear()
+        return statuses
+
+
+@pytest.fixture
+def server():
+    server = DocServer()
+    yield server
+    server.httpd.shutdown()
+    # 리스닝 소켓을 닫지 않으면 GC 때 ResourceWarning이 나서 다른 모듈의 import 도중 __warningregistry__가 끼어든다
+    server.httpd.server_close()
+
+
+def _refresh(update, urls, tmp_path, **kwargs):
+    return update.refresh_urls(
+        urls,
+        dev=True,
+        download_dir=str(tmp_path / "downloads"),
+        use_cache=False,
+        summary_backend="lead",
+        dedup=False,
+        **kwargs,
+    )
+
+
+def _by_source(points) -> dict:
+    result = {}
+    for point in points:
+        result.setdefault(point.payload["doc_source"], set()).add(point.payload["doc_title"])
+    return result
+
+
+@requires_tokenizer
+def test_refresh_urls(ingest_env, server):
+    import update
+
+    # 같은 파일명(report.docx)을 내려주는 세 URL
+    direct = server.put("/notice/report.docx", "notice")
+    archived = server.put("/archive/report.docx", "archive")
+    attachment = server.put("/download?id=3", "attach", filename="report.docx")
+    urls = [direct, archived, attachment]
+
+    assert _refresh(update, urls, ingest_env.tmp_path) == {"new": 3, "changed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+    assert _by_source(ingest_env.points()) == {
+        "https://example.com/notice": {"report.docx"},
+        "https://example.com/archive": {"report.docx"},
+        "https://example.com/attach": {"report.docx"},
+    }
+    n_points = len(ingest_env.points())
+    server.statuses()
+
+    # 바뀌지 않았으면 ETag로 조건부 요청 → 304, 아무것도 다시 올리지 않음
+    assert _refresh(update, urls, ingest_env.tmp_path) == {"new": 0, "changed": 0, "unchanged": 3, "removed": 0, "failed": 0}
+    assert server.statuses() == [304, 304, 304]
+    assert len(ingest_env.points()) == n_points
+
+    # 한쪽 본문이 바뀌면 그 문서만 다시 올리고, 같은 파일명의 다른 문서는 그대로
+    server.put("/download?id=3", "attach", version=2, filename="report.docx")
+    stats = _refresh(update, urls, ingest_env.tmp_path)
+    assert stats == {"new": 0, "changed": 1, "unchanged": 2, "removed": 0, "failed": 0}
+    assert sorted(server.statuses()) == [200, 304, 304]
+    assert set(_by_source(ingest_env.points())) == {
+        "https://example.com/notice", "https://example.com/archive", "https://example.com/attach"
+    }
+    bodies = [p.payload["raw_text"] for p in ingest_env.points() if p.payload["doc_source"] == "https://example.com/attach"]
+    assert bodies and all("attach-v2" in body for body in bodies)
+
+    # 대소문자/fragment만 다른 URL은 같은 문서, remove_missing이면 목록에 없는 URL의 Point 삭제
+    stats = _refresh(update, [direct.replace("http://", "HTTP://") + "#top"], ingest_env.tmp_path, remove_missing=True)
+    assert stats == {"new": 0, "changed": 0, "unchanged": 1, "removed": 2, "failed": 0}
+    assert set(_by_source(ingest_env.points())) == {"https://example.com/notice"}
+
+
+@requires_tokenizer
+def test_refresh_urls_failures_are_retried(ingest_env, server):
+    import update
+
+    missing = server.base + "/missing.docx"
+    assert _refresh(update, [missing], ingest_env.tmp_path)["failed"] == 1
+
+    server.put("/missing.docx", "late")
+    assert _refresh(update, [missing], ingest_env.tmp_path)["new"] == 1
+    assert set(_by_source(ingest_env.points())) == {"https://example.com/late"}
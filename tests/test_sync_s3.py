@@ -0,0 +1,106 @@
+from conftest import requires_tokenizer, make_docx, sentences
+
+import pytest
+
+
+BUCKET = "posplexity-test"
+
+
+@pytest.fixture
+def s3():
+    moto = pytest.importorskip("moto")
+    import boto3
+
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def _put(s3, key: str, topic: str) -> None:
+    s3.put_object(Bucket=BUCKET, Key=key, Body=make_docx(f"https://example.com/{topic}", sentences(topic)))
+
+
+def _sources(points) -> dict:
+    counts = {}
+    for point in points:
+        counts[point.payload["doc_source"]] = counts.get(point.payload["doc_source"], 0) + 1
+    return counts
+
+
+def _sync(update, s3, **kwargs):
+    return update.sync_s3(
+        dev=True, bucket_name=BUCKET, s3_client=s3, use_cache=False, summary_backend="lead", dedup=False, **kwargs
+    )
+
+
+@requires_tokenizer
+def test_same_basename_under_different_prefixes(ingest_env, s3):
+    import update
+
+    _put(s3, "uploaded/x.docx", "uploaded")
+    _put(s3, "final/x.docx", "final")
+    stats = _sync(update, s3)
+    assert stats == {"new": 2, "changed": 0, "unchanged": 0, "removed": 0}
+
+    counts = _sources(ingest_env.points())
+    assert set(counts) == {"https://example.com/uploaded", "https://example.com/final"}
+
+    # 한쪽을 바꾸거나 지워도 다른 prefix의 같은 파일명 문서는 그대로 남아야 한다
+    _put(s3, "final/x.docx", "final-v2")
+    assert _sync(update, s3) == {"new": 0, "changed": 1, "unchanged": 1, "removed": 0}
+    assert set(_sources(ingest_env.points())) == {"https://example.com/uploaded", "https://example.com/final-v2"}
+
+    s3.delete_object(Bucket=BUCKET, Key="final/x.docx")
+    assert _sync(update, s3) == {"new": 0, "changed": 0, "unchanged": 1, "removed": 1}
+    assert _sources(ingest_env.points()) == {"https://example.com/uploaded": counts["https://example.com/uploaded"]}
+
+
+@requires_tokenizer
+def test_unchanged_objects_are_not_downloaded(ingest_env, s3, monkeypatch):
+    import update
+
+    _put(s3, "uploaded/a.docx", "a")
+    _sync(update, s3)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("바뀌지 않은 객체를 내려받음")
+
+    monkeypatch.setattr(update, "read_s3_object", _fail)
+    assert _sync(update, s3) == {"new": 0, "changed": 0, "unchanged": 1, "removed": 0}
+    assert _sync(update, s3, dry_run=True)["unchanged"] == 1
+
+
+@requires_tokenizer
+def test_admin_upload_then_sync_keeps_one_copy(ingest_env, s3):
+    import update
+
+    # 관리자 페이지: S3 uploaded/에 올린 뒤 같은 버퍼로 업로드 작업 실행
+    data = make_docx("https://example.com/admin", sentences("admin"))
+    s3.put_object(Bucket=BUCKET, Key="uploaded/admin.docx", Body=data)
+    update.ingest_s3_uploads(
+        [("admin.docx", data)], "uploaded/",
+        dev=True, bucket_name=BUCKET, s3_client=s3, use_cache=False, summary_backend="lead", dedup=False,
+    )
+    points = ingest_env.points()
+    assert points
+
+    # 이후 동기화는 같은 객체를 유지된 것으로 보고, Point는 한 벌만 남는다
+    assert _sync(update, s3) == {"new": 0, "changed": 0, "unchanged": 1, "removed": 0}
+    assert sorted(p.id for p in ingest_env.points()) == sorted(p.id for p in points)
+
+
+@requires_tokenizer
+def test_sync_takes_over_legacy_admin_upload(ingest_env, s3):
+    import update
+
+    # 예전 관리자 업로드: file:<파일명> doc_key와 파일명 기준 manifest로 올라간 문서
+    data = make_docx("https://example.com/legacy", sentences("legacy"))
+    s3.put_object(Bucket=BUCKET, Key="uploaded/legacy.docx", Body=data)
+    update.upload(files=[("legacy.docx", data)], dev=True, use_cache=False, summary_backend="lead", dedup=False)
+    n_points = len(ingest_env.points())
+
+    assert _sync(update, s3)["new"] == 1
+    points = ingest_env.points()
+    assert len(points) == n_points
+    assert update.load_manifest(f"{update.MANIFEST_DIR}/{ingest_env.collection}.json") == {}
@@ -0,0 +1,18 @@
+import os, sys, subprocess
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_load_encoding():
+    # 인코딩 파일은 네트워크에서 내려받으므로, 검색 화면이 import하는 모듈은 import만으로 불러오면 안 된다
+    code = (
+        "import tiktoken\n"
+        "def _fail(*args, **kwargs):\n"
+        "    raise RuntimeError('get_encoding called at import time')\n"
+        "tiktoken.get_encoding = _fail\n"
+        "import src.rag.embedding, src.rag.chunk, src.search.search\n"
+    )
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "test"))
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,54 @@
+from conftest import requires_tokenizer, make_docx, sentences
+
+
+def _write(directory, name: str, topic: str) -> None:
+    (directory / name).write_bytes(make_docx(f"https://example.com/{topic}", sentences(topic)))
+
+
+def _sources(points) -> set:
+    return {point.payload["doc_source"] for point in points}
+
+
+@requires_tokenizer
+def test_upload_directory_is_synced(ingest_env, tmp_path):
+    import update
+
+    db_path = tmp_path / "db"
+    db_path.mkdir()
+    _write(db_path, "a.docx", "a")
+    _write(db_path, "b.docx", "b")
+
+    def _upload():
+        update.upload(db_path=str(db_path), use_cache=False, summary_backend="lead", dedup=False)
+
+    _upload()
+    assert _sources(ingest_env.points()) == {"https://example.com/a", "https://example.com/b"}
+
+    # 바뀐 파일은 다시 올리고, 사라진 파일의 Point는 기본으로 삭제한다
+    _write(db_path, "a.docx", "a2")
+    (db_path / "b.docx").unlink()
+    _upload()
+    assert _sources(ingest_env.points()) == {"https://example.com/a2"}
+
+    # 다른 디렉토리를 올려도 이전 디렉토리의 파일은 사라진 것으로 보지 않는다
+    other = tmp_path / "other"
+    other.mkdir()
+    _write(other, "c.docx", "c")
+    update.upload(db_path=str(other), use_cache=False, summary_backend="lead", dedup=False)
+    assert _sources(ingest_env.points()) == {"https://example.com/a2", "https://example.com/c"}
+
+
+@requires_tokenizer
+def test_upload_records_total_units_in_journal(ingest_env, tmp_path, capsys):
+    import os, update
+    from src.rag.journal import print_status
+
+    db_path = tmp_path / "db"
+    db_path.mkdir()
+    _write(db_path, "a.docx", "a")
+    update.upload(db_path=str(db_path), use_cache=False, summary_backend="lead", dedup=False)
+    n_points = len(ingest_env.points())
+
+    capsys.readouterr()
+    print_status(os.path.join(update.JOURNAL_DIR, f"{ingest_env.collection}-upload.jsonl"))
+    assert f"업서트 {n_points}/{n_points}" in capsys.readouterr().out
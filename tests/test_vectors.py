@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+from src.utils.vectors import decode_embeddings
+
+import numpy as np
+
+import base64
+
+
+def _response(vectors: dict) -> SimpleNamespace:
+    return SimpleNamespace(data=[
+        SimpleNamespace(index=i, embedding=base64.b64encode(v.astype(np.float32).tobytes()).decode())
+        for i, v in vectors.items()
+    ])
+
+
+def test_decode_embeddings_maps_by_index():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((5, 3)).astype(np.float32)
+    groups = [[0, 2, 4], [1, 3]]
+    # 응답 안의 순서가 섞여 있어도 index로 원래 위치를 찾는다
+    responses = [
+        _response({2: vectors[4], 0: vectors[0], 1: vectors[2]}),
+        _response({1: vectors[3], 0: vectors[1]}),
+    ]
+    block = decode_embeddings(list("abcde"), groups, responses)
+    assert block.dtype == np.float32
+    assert np.array_equal(block, vectors)
+
+
+def test_decode_embeddings_empty():
+    assert decode_embeddings([], [], []).shape == (0, 0)
@@ -1,54 +1,293 @@
 from tqdm import tqdm
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, Optional
 from qdrant_client import models
-from qdrant_client.models import PointStruct, ScrollResult
-from common.types import Document, str_struct
+from common.types import Document, Chunk
 from common.globals import qdrant_client
 from common.config import (
     POSTECH_COLLECTION_EXP,
     POSTECH_COLLECTION_PROD,
     MAX_CHUNK_LENGTH,
     EMBED_BATCH_SIZE,
+    EMBED_CACHE_PATH,
+    BATCH_DIR,
+    MANIFEST_DIR,
+    JOURNAL_DIR,
+    DEDUP_ENABLED,
+    SUMMARY_PACK_SIZE,
+    POSTECH_BUCKET_NAME,
+    POSTECH_REGION_NAME,
+    S3_SYNC_PREFIXES,
+    URL_DOWNLOAD_DIR,
+    URL_REFRESH_CONCURRENCY,
 )
-from src.llm.gpt.inference import async_run_gpt
-from src.rag.parse import parse_word, parse_pdf, parse_mbox  
-from src.rag.chunk import chunk_word, chunk_pdf, chunk_text  
-from src.rag.embedding import async_openai_embedding
-from src.utils.utils import async_wrapper
+from src.rag.parse import iter_mbox
+from src.rag.chunk import chunk_text
+from src.rag.loader import iter_load_files, split_source, resolve_source
+from src.rag.cache import EmbeddingCache
+from src.utils.ratelimit import embedding_limiter, chat_limiter
+from src.rag.summary import async_summarize, resolve_backend
+from src.rag.ids import make_point_id, source_doc_key
+from src.rag.pipeline import run_pipeline, batched
+from src.rag.manifest import load_manifest, save_manifest, diff_manifest, diff_hashes, data_hash, file_hash
+from src.rag.journal import IngestJournal
+from src.utils.utils import get_s3_client, iter_s3_objects, read_s3_object, fetch_url, normalize_url
+from src.rag.dedup import iter_dedup_units
+from src.rag.batch import (
+    batch_job_exists,
+    write_batch_requests,
+    submit_batch_job,
+    collect_batch_job,
+    needs_resubmit,
+    upsert_batch_results,
+    upserted_manifest_entries,
+)
+
+import os, time, asyncio, hashlib, functools, traceback
+
+
+def list_files(db_path: str) -> list[str]:
+    """
+    db_path 안의 업로드 대상 파일(.docx, .pdf, mbox)의 절대경로 목록.
+    """
+    paths_list = []
+    for file in sorted(os.listdir(db_path)):
+        # .docx, .pdf, .mbox 모두 처리
+        if file.endswith(".docx") or file.endswith(".pdf") or file.endswith("mbox"):
+            paths_list.append(os.path.abspath(os.path.join(db_path, file)))
+    return paths_list
+
+
+def read_upload_files(files: Iterable) -> list[tuple[str, bytes]]:
+    """
+    업로드 버퍼들을 (파일명, bytes) 목록으로 바꾼다.
+    files의 항목은 (파일명, bytes) 튜플 또는 name/getvalue()가 있는 객체 (streamlit UploadedFile 등).
+    """
+    buffers = []
+    for f in files:
+        name, data = f if isinstance(f, tuple) else (f.name, f.getvalue())
+        buffers.append((os.path.basename(name), bytes(data)))
+    return buffers
+
+
+def iter_documents(
+    paths_list: list,
+    parse_stats: Optional[dict] = None,
+    doc_keys: Optional[dict] = None,
+) -> Iterator[Document]:
+    """
+    파일들을 파싱, 청킹해서 Document를 입력 순서대로 yield하는 제너레이터.
+    paths_list의 항목은 파일 경로, (파일명, bytes) (디스크에 쓰지 않은 업로드 버퍼),
+    (이름, bytes를 반환하는 함수) (S3 객체 등, 파싱 직전에 읽음).
+    - docx/pdf는 프로세스 풀에서 병렬로 파싱 (src/rag/loader.py, PARSE_MAX_WORKERS)
+    - mbox는 메일 단위로 yield하므로, 아카이브 크기와 관계없이 한 번에 메일 하나만 메모리에 올라간다
+    - 파싱에 실패한 파일은 건너뛰고 나머지 파일을 계속 처리한다
+    - doc_key : Point ID를 만드는 문서 고유 키 (파일은 파일명, S3 객체/URL은 doc_keys의 전체 이름, 메일은 Message-ID)
+    - doc_id  : 이번 실행 안에서의 문서 순번 (Batch API custom_id 등에 사용)
+
+    parse_stats dict를 넘기면 파일별 파싱 시간(elapsed)과 실패(failed)를 기록한다.
+    doc_keys({소스 이름: doc_key})를 넘기면 docx/pdf 문서의 doc_key를 파일명 대신 그 값으로 쓴다. (S3 객체, URL)
+    """
+    if parse_stats is None:
+        parse_stats = {}
+    parse_stats.setdefault("elapsed", {})
+    parse_stats.setdefault("failed", {})
+
+    loaded = iter_load_files([p for p in paths_list if not split_source(p)[0].endswith("mbox")])
+    doc_id = 0
 
-import os, asyncio
+    for source in paths_list:
+        file_path, data = split_source(source)
+        if file_path.endswith("mbox"):
+            # iter_mbox()는 메일(Document)을 하나씩 yield
+            elapsed = 0.0
+            try:
+                mails = iter_mbox(file_path if data is None else resolve_source(source)[1])
+            except Exception:
+                parse_stats["failed"][file_path] = traceback.format_exc(limit=3)
+                parse_stats["elapsed"][file_path] = elapsed
+                continue
+            while True:
+                start = time.perf_counter()
+                try:
+                    doc = next(mails, None)
+                    if doc is not None:
+                        doc.doc_type = "mbox"
+                        doc.doc_path = file_path
+                        doc.doc_id = doc_id
+                        doc.chunk_list = chunk_text(doc)
+                except Exception:
+                    parse_stats["failed"][file_path] = traceback.format_exc(limit=3)
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                if doc is None:
+                    break
 
+                doc_id += 1
+                yield doc
+            parse_stats["elapsed"][file_path] = elapsed
+            continue
 
-def get_max_point_id(collection_name: str) -> int:
+        result = next(loaded)
+        parse_stats["elapsed"][file_path] = result["elapsed"]
+        if result["error"]:
+            parse_stats["failed"][file_path] = result["error"]
+            continue
+
+        doc = result["doc"]
+        doc.doc_id = doc_id
+        if doc_keys and file_path in doc_keys:
+            doc.doc_key = doc_keys[file_path]
+        for chunk in doc.chunk_list:
+            chunk.doc_id = doc_id
+        doc_id += 1
+        yield doc
+
+
+def report_parse_stats(parse_stats: dict, top_k: int = 5) -> None:
     """
-    해당 collection에 존재하는 Point 중 가장 큰 ID를 반환.
-    만약 컬렉션이 비어있으면 0을 반환.
+    파싱 시간 합계, 가장 느린 파일들, 실패한 파일을 출력한다.
     """
-    max_id = 0
-    scroll_offset = None
+    elapsed = parse_stats.get("elapsed", {})
+    failed = parse_stats.get("failed", {})
+    if not elapsed:
+        return
+
+    print(f"파싱: 파일 {len(elapsed)}개, 파일별 파싱 시간 합계 {sum(elapsed.values()):.1f}초")
+    for path, seconds in sorted(elapsed.items(), key=lambda kv: kv[1], reverse=True)[:top_k]:
+        print(f"  {seconds:7.2f}s  {os.path.basename(path)}")
+    for path, error in failed.items():
+        print(f"파싱 실패: {path} ({error.strip().splitlines()[-1]})")
+
+
+def load_documents(paths_list: list[str]) -> list[Document]:
+    """
+    iter_documents의 결과를 리스트로 반환. (Batch API 요청 파일 생성처럼 전체가 필요한 경우)
+    """
+    return list(iter_documents(paths_list))
+
+
+def make_payload(doc: Document, chunk: Chunk) -> dict:
+    """
+    Qdrant Point에 저장할 payload (요약 제외).
+    PDF 청크는 출처 표시에 쓰이는 페이지 번호(page_num)도 함께 저장한다.
+    """
+    payload = {
+        "doc_title": doc.doc_title,
+        "doc_source": doc.doc_source,
+        "raw_text": chunk.body[:MAX_CHUNK_LENGTH],
+    }
+    if chunk.page_num is not None:
+        payload["page_num"] = chunk.page_num
+    return payload
+
 
-    while True:
-        # 한 번에 100개씩 스크롤
-        result: ScrollResult = qdrant_client.scroll(
+def make_units(docs_list: list[Document], summary_backend=None) -> list[dict]:
+    """
+    청크마다 업로드 단위(unit)를 만든다. (src/rag/pipeline.py, src/rag/batch.py 공용 형식)
+    """
+    units = []
+    for doc in docs_list:
+        backend = resolve_backend(doc.doc_type, summary_backend)
+        for chunk in doc.chunk_list:
+            units.append({
+                "point_id": make_point_id(doc.doc_key, chunk.chunk_id),
+                "doc_id": doc.doc_id,
+                "chunk_id": chunk.chunk_id,
+                "body": chunk.body,
+                "payload": make_payload(doc, chunk),
+                "summary_backend": backend,
+                "doc_key": doc.doc_key,
+                "doc_path": doc.doc_path,
+            })
+    return units
+
+
+def iter_units(docs: Iterable[Document], summary_backend=None) -> Iterator[dict]:
+    """
+    문서를 하나씩 받아 업로드 단위(unit)를 yield한다.
+    unit을 만든 뒤에는 Document(원문, 청크 리스트)를 더 이상 참조하지 않으므로 바로 해제된다.
+    """
+    for doc in docs:
+        yield from make_units([doc], summary_backend)
+
+
+def report_dedup_stats(dedup_stats: dict) -> None:
+    """
+    걸러낸 청크 수와 그만큼 절약한 API 호출 수를 출력한다.
+    걸러낸 청크마다 임베딩 입력 1개, 요약 입력 1개(gpt backend면 SUMMARY_PACK_SIZE개당 요청 1개)가 절약된다.
+    """
+    if not dedup_stats:
+        return
+    n_dropped = dedup_stats["low_info"] + dedup_stats["exact_dup"] + dedup_stats["near_dup"]
+    n_total = n_dropped + dedup_stats["kept"]
+    print(
+        f"중복 제거: 전체 청크 {n_total}개 중 {n_dropped}개 제외 "
+        f"(저정보 {dedup_stats['low_info']} / 완전 중복 {dedup_stats['exact_dup']} / 유사 중복 {dedup_stats['near_dup']})"
+    )
+    print(
+        f"  절약한 API 호출: 임베딩 입력 {n_dropped}개, "
+        f"요약 입력 {n_dropped}개 (packed 요약 기준 약 {-(-n_dropped // SUMMARY_PACK_SIZE)}회 요청)"
+    )
+
+
+def delete_file_points(collection_name: str, manifest: dict, file_paths: list[str]) -> int:
+    """
+    manifest에 기록된 파일들의 Point를 컬렉션에서 삭제하고 manifest에서도 제거한다.
+    삭제한 Point 개수를 반환.
+    """
+    point_ids = []
+    for path in file_paths:
+        entry = manifest.pop(path, None)
+        if entry:
+            point_ids.extend(entry["point_ids"])
+    delete_points(collection_name, point_ids)
+    return len(point_ids)
+
+
+def delete_points(collection_name: str, point_ids: list[str]) -> None:
+    for start in range(0, len(point_ids), 1000):
+        qdrant_client.delete(
             collection_name=collection_name,
-            offset=scroll_offset,
-            limit=100,
-            with_vectors=False,
+            points_selector=models.PointIdsList(points=point_ids[start : start + 1000]),
         )
-        for point in result[0]:
-            if point.id > max_id:
-                max_id = point.id
 
-        if result[1] is None:
-            break
-        scroll_offset = result[1]
 
-    return max_id
+def upload(
+    db_path: Optional[str] = None,
+    recreate: bool = False,
+    dev: bool = True,
+    use_cache: bool = True,
+    summary_backend=None,
+    remove_missing: bool = True,
+    force: bool = False,
+    dedup: bool = DEDUP_ENABLED,
+    files: Optional[Iterable] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+):
+    """
+    db_path의 문서들을 임베딩/요약해서 Qdrant에 업로드한다.
+    files를 넘기면 db_path 대신 메모리에 있는 업로드 버퍼((파일명, bytes) 또는 streamlit UploadedFile)를
+    임시 파일 없이 바로 파싱해서 업로드한다. (manifest 키는 파일명)
+    on_progress(n)은 청크 n개의 업서트가 끝날 때마다 호출된다. (백그라운드 작업 진행률, src/rag/jobs.py)
+    Point ID는 (문서 고유 키, chunk_id)로 만든 UUIDv5이므로, 같은 문서를 다시 올려도 덮어쓴다.
+    use_cache=True면 로컬 임베딩 캐시(EMBED_CACHE_PATH)를 먼저 조회한다.
+    summary_backend: 요약 backend ("gpt", "textrank", "lead") 또는 {doc_type: backend} dict.
+                     None이면 config의 SUMMARY_BACKEND를 따른다.
+
+    증분 업로드 (MANIFEST_DIR/<컬렉션>.json)
+    - 내용이 그대로인 파일은 건너뛴다
+    - 내용이 바뀐 파일은 기존 Point를 삭제한 뒤 다시 업로드한다
+    - db_path에서 사라진 파일의 Point도 삭제한다 (remove_missing=False면 남겨 둔다, 업로드 버퍼로 올릴 때는 해당 없음)
+    - force=True면 모든 파일을 바뀐 것으로 보고 다시 업로드한다
 
+    dedup=True면 임베딩 전에 저정보 청크와 같은 파일 안의 (유사) 중복 청크를 걸러낸다 (src/rag/dedup.py)
 
-def upload(db_path: str, recreate: bool = False, dev: bool = True):
-    """
-    기존에 있던 vector ID와 겹치지 않도록,
-    가장 큰 Point ID 다음부터 사용해서 새 Document를 업로드한다.
+    체크포인트 저널 (JOURNAL_DIR/<컬렉션>-upload.jsonl)
+    - 업로드가 중간에 중단되면, 다시 실행했을 때 이미 업서트된 청크는 건너뛰고
+      요약까지 끝난 청크는 저장된 요약을 재사용한다 (진행 상황: python -m src.rag.journal)
     """
     # dev / prod
     if dev:
@@ -66,124 +305,542 @@ def upload(db_path: str, recreate: bool = False, dev: bool = True):
             ),
         )
 
-    # 1-1. 기존에 있는 최대 ID 구하기 (컬렉션이 비어 있으면 0)
-    existing_max_id = get_max_point_id(COLLECTION_NAME)
-    next_doc_id_start = (existing_max_id // 1000) + 1
+    # 1-1. manifest와 비교해 새로 업로드할 파일 고르기
+    manifest_path = os.path.join(MANIFEST_DIR, f"{COLLECTION_NAME}.json")
+    manifest = {} if recreate else load_manifest(manifest_path)
+    if files is None:
+        buffers = None
+        diff = diff_manifest(manifest, list_files(db_path), db_path)
+    else:
+        buffers = dict(read_upload_files(files))
+        diff = diff_hashes(manifest, {name: data_hash(data) for name, data in buffers.items()})
+    if force:
+        diff["changed"] += diff["unchanged"]
+        diff["unchanged"] = []
+    print(
+        f"신규 {len(diff['new'])}개 / 변경 {len(diff['changed'])}개 / "
+        f"유지 {len(diff['unchanged'])}개 / 삭제 {len(diff['removed'])}개"
+    )
 
-    # 2. load file list
-    paths_list = []
-    docs_list = []
+    # 1-2. 바뀐(또는 사라진) 파일의 기존 Point 삭제
+    stale_paths = diff["changed"] + (diff["removed"] if remove_missing else [])
+    if stale_paths:
+        n_deleted = delete_file_points(COLLECTION_NAME, manifest, stale_paths)
+        save_manifest(manifest_path, manifest)
+        print(f"기존 Point {n_deleted}개 삭제")
 
-    for file in os.listdir(db_path):
-        # .docx, .pdf, .mbox 모두 처리
-        if file.endswith(".docx") or file.endswith(".pdf") or file.endswith("mbox"):
-            paths_list.append(os.path.join(db_path, file))
-
-    # 3. parse files
-    #    파일 형식별로 parse
-    for file_path in paths_list:
-        if file_path.endswith(".docx"):
-            doc = Document(**parse_word(file_path))
-            doc.doc_type = "word"
-            docs_list.append(doc)
-        elif file_path.endswith(".pdf"):
-            doc = Document(**parse_pdf(file_path))
-            doc.doc_type = "pdf"
-            docs_list.append(doc)
-        elif file_path.endswith("mbox"):
-            # parse_mbox()는 여러 메일(Document)들을 반환하므로 반복 처리
-            mbox_docs = parse_mbox(file_path)
-            for d in mbox_docs:
-                d.doc_type = "mbox"
-                docs_list.append(d)
-
-    # 4. chunk files
-    for doc in docs_list:
-        if doc.doc_type == "word":
-            doc.chunk_list = chunk_word(doc)
-        elif doc.doc_type == "pdf":
-            doc.chunk_list = chunk_pdf(doc)
-        elif doc.doc_type == "mbox":
-            # 단순 텍스트를 chunking
-            doc.chunk_list = chunk_text(doc)
-
-    # 5. 문서별로 doc_id 할당
-    for i, doc in enumerate(docs_list):
-        doc.doc_id = next_doc_id_start + i
-
-    # doc & chunk 쌍 만들기
-    doc_chunk_pairs = []
-    for doc in docs_list:
-        for chunk in doc.chunk_list:
-            doc_chunk_pairs.append((doc, chunk))
+    # 2. 새로 올릴 파일만 파싱 → 업로드 (업로드 버퍼는 (파일명, bytes) 그대로 파서에 넘긴다)
+    target_paths = diff["new"] + diff["changed"]
+    targets = target_paths if buffers is None else [(name, buffers[name]) for name in target_paths]
+
+    # 컬렉션을 새로 만든 경우에는 이전 저널을 이어서 쓰지 않는다
+    ingest_sources(
+        targets,
+        COLLECTION_NAME,
+        manifest,
+        manifest_path,
+        diff["hashes"],
+        os.path.join(JOURNAL_DIR, f"{COLLECTION_NAME}-upload.jsonl"),
+        resume=not recreate,
+        use_cache=use_cache,
+        summary_backend=summary_backend,
+        dedup=dedup,
+        on_progress=on_progress,
+        db_path=db_path,
+    )
 
-    total_chunks = len(doc_chunk_pairs)
 
-    with tqdm(total=total_chunks, desc="Making embeddings...") as pbar:
-        for start_idx in range(0, total_chunks, EMBED_BATCH_SIZE):
-            batch = doc_chunk_pairs[start_idx : start_idx + EMBED_BATCH_SIZE]
+def ingest_sources(
+    sources: list,
+    collection_name: str,
+    manifest: dict,
+    manifest_path: str,
+    hashes: dict,
+    journal_path: str,
+    resume: bool = True,
+    use_cache: bool = True,
+    summary_backend=None,
+    dedup: bool = DEDUP_ENABLED,
+    on_progress: Optional[Callable[[int], None]] = None,
+    doc_keys: Optional[dict] = None,
+    **journal_meta,
+) -> None:
+    """
+    sources를 파싱 → 청킹 → 임베딩/요약 → 업서트하고, manifest에 소스별 hash, doc_key, point_id를 기록해 저장한다.
+    - sources의 항목은 파일 경로, (이름, bytes), (이름, bytes를 반환하는 함수) (src/rag/loader.py)
+    - manifest 키는 소스 이름(파일 경로 / 이름), hashes는 소스 이름 → 내용 hash
+    - journal_path의 체크포인트 저널로 중단된 업로드를 이어서 진행한다 (resume=False면 새로 시작)
+    - doc_keys({소스 이름: doc_key})를 넘기면 파일명 대신 그 값으로 Point ID를 만든다 (iter_documents)
+    """
+    # 파싱 → 청킹 → 업로드 단위 → 배치를 모두 제너레이터로 연결
+    # 파이프라인 큐에 대기할 수 있는 배치 수가 제한되어 있으므로,
+    # 파일이 아무리 커도 메모리에는 몇 개의 배치만 올라가고, 업서트가 끝난 청크는 바로 해제된다
+    for source in sources:
+        name = split_source(source)[0]
+        manifest[name] = {"hash": hashes[name], "doc_keys": [], "point_ids": []}
 
-            breakpoint()
+    parse_stats, dedup_stats = {}, {}
+    units = iter_units(iter_documents(sources, parse_stats, doc_keys), summary_backend)
+    if dedup:
+        # 청킹과 임베딩 사이에서 저정보/중복 청크를 걸러냄
+        units = iter_dedup_units(units, dedup_stats)
+    embedding_cache = EmbeddingCache(EMBED_CACHE_PATH) if use_cache else None
 
-            # (a) 임베딩 생성
-            embedding_tasks = [async_openai_embedding(chunk.body) for (_, chunk) in batch]
-            embedding_results = asyncio.run(async_wrapper(embedding_tasks))
+    journal = IngestJournal(journal_path, resume=resume)
+    if journal.status()["upserted"]:
+        print(f"중단된 업로드를 이어서 진행합니다: {journal.status()}")
+    journal.start_run(files=len(sources), **journal_meta)
 
-            # (a-1) 요약 생성
-            summary_tasks = [async_run_gpt(chunk.body, "make_summary.json", str_struct) for (_, chunk) in batch]
-            summary_results = asyncio.run(async_wrapper(summary_tasks))
+    with tqdm(desc="Making embeddings...", unit="chunk") as pbar:
+        def _on_upserted(batch):
+            # manifest에 파일별 doc_key, point_id 기록
+            for unit in batch:
+                entry = manifest[unit["doc_path"]]
+                if not entry["doc_keys"] or entry["doc_keys"][-1] != unit["doc_key"]:
+                    entry["doc_keys"].append(unit["doc_key"])
+                entry["point_ids"].append(unit["point_id"])
 
-            breakpoint()
+            pbar.update(len(batch))
+            if on_progress:
+                on_progress(len(batch))
+            if embedding_cache:
+                pbar.set_postfix(embedding_cache.stats())
+
+        asyncio.run(
+            run_pipeline(
+                batched(units, EMBED_BATCH_SIZE),
+                collection_name,
+                embedding_cache=embedding_cache,
+                on_upserted=_on_upserted,
+                journal=journal,
+            )
+        )
 
-            # (b) PointStruct 리스트 만들기
-            batch_points = []
-            for (doc, chunk), emb, summ in zip(batch, embedding_results, summary_results):
-                # 임베딩 저장
-                chunk.embedding = emb
-                limited_text = chunk.body[:MAX_CHUNK_LENGTH]
+    journal.finish_run()
+    journal.close()
 
-                # ID를 생성 -> doc_id * 1000 + chunk_id
-                point_id = doc.doc_id * 1000 + chunk.chunk_id
+    # manifest 저장 (파싱에 실패한 파일은 다음 실행에서 다시 시도하도록 manifest에서 제외)
+    for path in parse_stats.get("failed", {}):
+        manifest.pop(path, None)
+    save_manifest(manifest_path, manifest)
 
-                payload_data = {
-                    "doc_title": doc.doc_title,
-                    "doc_source": doc.doc_source,
-                    "raw_text": limited_text,
-                    "summary": summ,  # 새로 생성한 요약
-                }
+    report_parse_stats(parse_stats)
+    if dedup:
+        report_dedup_stats(dedup_stats)
 
-                batch_points.append(
-                    PointStruct(
-                        id=point_id,
-                        vector=chunk.embedding,
-                        payload=payload_data,
-                    )
-                )
+    if embedding_cache:
+        print(f"임베딩 캐시: {embedding_cache.stats()}")
+        embedding_cache.close()
+    print(f"API 호출: 임베딩 {embedding_limiter.stats()} / 요약 {chat_limiter.stats()}")
 
-            # (c) upsert
+
+def sync_s3(
+    dev: bool = True,
+    prefixes: list[str] = S3_SYNC_PREFIXES,
+    bucket_name: str = POSTECH_BUCKET_NAME,
+    s3_client=None,
+    use_cache: bool = True,
+    summary_backend=None,
+    dedup: bool = DEDUP_ENABLED,
+    dry_run: bool = False,
+) -> dict:
+    """
+    S3 버킷의 prefixes 아래 문서(.docx, .pdf, mbox)를 Qdrant 컬렉션과 동기화한다.
+    - 객체의 (ETag, 크기)를 마지막으로 업로드했을 때의 값(MANIFEST_DIR/<컬렉션>-s3.json)과 비교
+    - 새 객체와 바뀐 객체만 내려받아 업로드 파이프라인에 흘려보낸다
+      (진행 중인 파일 수만큼만 내려받으므로 객체가 많아도 메모리는 일정)
+    - 바뀐 객체와 S3에서 삭제된 객체의 기존 Point는 삭제한다
+    - dry_run=True면 비교 결과만 반환하고 아무것도 바꾸지 않는다
+    s3_client를 넘기지 않으면 환경변수(S3_ACCESS_KEY, S3_SECRET_ACCESS_KEY)로 만든 공유 클라이언트를 쓴다.
+    (테스트에서는 moto 등 로컬 S3의 클라이언트를 넘기면 된다)
+    반환값: {"new", "changed", "unchanged", "removed"} 개수
+    """
+    COLLECTION_NAME = POSTECH_COLLECTION_EXP if dev else POSTECH_COLLECTION_PROD
+    s3 = s3_client or get_s3_client(region_name=POSTECH_REGION_NAME)
+
+    # 1. prefix별 객체 목록 → {s3://버킷/키: "ETag:크기"}
+    scopes = [f"s3://{bucket_name}/{prefix}" for prefix in prefixes]
+    keys, versions = {}, {}
+    for prefix in prefixes:
+        for obj in iter_s3_objects(s3, bucket_name, prefix):
+            if not obj["Key"].endswith((".docx", ".pdf", "mbox")):
+                continue
+            name = f"s3://{bucket_name}/{obj['Key']}"
+            keys[name] = obj["Key"]
+            versions[name] = s3_object_version(obj["ETag"], obj["Size"])
+
+    # 2. manifest와 비교 (removed는 이번에 동기화하는 prefix 아래에서만)
+    manifest_path = os.path.join(MANIFEST_DIR, f"{COLLECTION_NAME}-s3.json")
+    manifest = load_manifest(manifest_path)
+    diff = diff_hashes(manifest, versions)
+    diff["removed"] = [
+        name for name in manifest
+        if name not in versions and any(name.startswith(scope) for scope in scopes)
+    ]
+    stats = {key: len(diff[key]) for key in ("new", "changed", "unchanged", "removed")}
+    print(
+        f"S3 동기화: 신규 {stats['new']}개 / 변경 {stats['changed']}개 / "
+        f"유지 {stats['unchanged']}개 / 삭제 {stats['removed']}개"
+    )
+    if dry_run:
+        return stats
+
+    # 3. 바뀐 객체, 삭제된 객체의 기존 Point 삭제
+    stale = diff["changed"] + diff["removed"]
+    if stale:
+        n_deleted = delete_file_points(COLLECTION_NAME, manifest, stale)
+        save_manifest(manifest_path, manifest)
+        print(f"기존 Point {n_deleted}개 삭제")
+
+    # 4. 새 객체, 바뀐 객체를 파싱 직전에 하나씩 내려받아 업로드
+    # (내려받은 내용의 hash는 예전 관리자 업로드 Point를 넘겨받을 때 쓴다)
+    fetched_hashes = {}
+
+    def _fetch(name: str) -> bytes:
+        data = read_s3_object(s3, bucket_name, keys[name])
+        fetched_hashes[name] = data_hash(data)
+        return data
+
+    sources = [(name, functools.partial(_fetch, name)) for name in diff["new"] + diff["changed"]]
+    if sources:
+        ingest_sources(
+            sources,
+            COLLECTION_NAME,
+            manifest,
+            manifest_path,
+            versions,
+            os.path.join(JOURNAL_DIR, f"{COLLECTION_NAME}-s3sync.jsonl"),
+            use_cache=use_cache,
+            summary_backend=summary_backend,
+            dedup=dedup,
+            # 파일명이 아니라 s3://버킷/키로 Point ID를 만든다 (prefix가 다른 같은 파일명, 로컬 업로드와 구분)
+            doc_keys={name: source_doc_key(name) for name, _ in sources},
+            bucket=bucket_name,
+            prefixes=list(prefixes),
+        )
+        take_over_uploads(COLLECTION_NAME, manifest, fetched_hashes)
+    return stats
+
+
+def s3_object_version(etag: str, size: int) -> str:
+    """
+    S3 객체의 버전 문자열 "ETag:크기". (sync_s3 manifest의 hash 자리에 기록)
+    """
+    etag = etag.strip('"')
+    return f"{etag}:{size}"
+
+
+def take_over_uploads(collection_name: str, s3_manifest: dict, fetched_hashes: dict) -> int:
+    """
+    파일명 기준 manifest(MANIFEST_DIR/<컬렉션>.json)에 같은 파일명, 같은 내용으로 기록된 문서의 Point를 삭제한다.
+    예전 관리자 업로드는 file:<파일명> doc_key로 올라갔으므로, sync_s3가 s3://... 이름으로 다시 올린
+    같은 문서가 두 벌 남지 않도록 S3 쪽으로 넘겨받는다. (fetched_hashes: 이번에 내려받은 S3 이름 → sha256)
+    삭제한 Point 개수를 반환.
+    """
+    manifest_path = os.path.join(MANIFEST_DIR, f"{collection_name}.json")
+    manifest = load_manifest(manifest_path)
+    if not manifest:
+        return 0
+
+    # 업서트까지 끝난 객체만 (파싱에 실패한 객체는 s3 manifest에서 빠져 있음)
+    uploaded = {
+        (os.path.basename(name), digest) for name, digest in fetched_hashes.items() if name in s3_manifest
+    }
+    stale = [path for path, entry in manifest.items() if (os.path.basename(path), entry["hash"]) in uploaded]
+    if not stale:
+        return 0
+
+    n_deleted = delete_file_points(collection_name, manifest, stale)
+    save_manifest(manifest_path, manifest)
+    print(f"파일명 기준으로 올라간 같은 문서 {len(stale)}개의 Point {n_deleted}개를 정리했습니다.")
+    return n_deleted
+
+
+def ingest_s3_uploads(
+    files: Iterable,
+    prefix: str,
+    dev: bool = True,
+    bucket_name: str = POSTECH_BUCKET_NAME,
+    s3_client=None,
+    use_cache: bool = True,
+    summary_backend=None,
+    dedup: bool = DEDUP_ENABLED,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """
+    관리자 페이지가 S3(bucket_name/prefix)에 올린 업로드 버퍼를 sync_s3와 같은 방식으로 업로드한다.
+    - 소스 이름은 s3://버킷/키, doc_key는 source_doc_key(이름), manifest는 MANIFEST_DIR/<컬렉션>-s3.json
+    - manifest에는 S3 객체의 (ETag, 크기)를 기록하므로, 이후 sync_s3는 같은 객체를 유지된 것으로 보고 건너뛴다
+      (관리자 업로드와 sync_s3가 같은 문서를 서로 다른 Point ID로 두 번 올리지 않음)
+    버퍼는 이미 메모리에 있으므로 S3에서 다시 내려받지 않고, 객체의 ETag/크기만 조회한다.
+    반환값: {"new", "changed", "unchanged"} 개수
+    """
+    COLLECTION_NAME = POSTECH_COLLECTION_EXP if dev else POSTECH_COLLECTION_PROD
+    s3 = s3_client or get_s3_client(region_name=POSTECH_REGION_NAME)
+
+    # 1. 업로드 버퍼 → {s3://버킷/키: bytes}, 객체의 "ETag:크기" (upload_s3와 같은 키 규칙)
+    buffers, versions = {}, {}
+    for file_name, data in read_upload_files(files):
+        key = os.path.join(prefix, file_name) if prefix else file_name
+        name = f"s3://{bucket_name}/{key}"
+        head = s3.head_object(Bucket=bucket_name, Key=key)
+        buffers[name] = data
+        versions[name] = s3_object_version(head["ETag"], head["ContentLength"])
+
+    # 2. manifest와 비교, 바뀐 객체의 기존 Point 삭제
+    manifest_path = os.path.join(MANIFEST_DIR, f"{COLLECTION_NAME}-s3.json")
+    manifest = load_manifest(manifest_path)
+    diff = diff_hashes(manifest, versions)
+    stats = {key: len(diff[key]) for key in ("new", "changed", "unchanged")}
+    print(f"S3 업로드: 신규 {stats['new']}개 / 변경 {stats['changed']}개 / 유지 {stats['unchanged']}개")
+
+    if diff["changed"]:
+        n_deleted = delete_file_points(COLLECTION_NAME, manifest, diff["changed"])
+        save_manifest(manifest_path, manifest)
+        print(f"기존 Point {n_deleted}개 삭제")
+
+    # 3. 새 객체, 바뀐 객체 업로드
+    sources = [(name, buffers[name]) for name in diff["new"] + diff["changed"]]
+    if sources:
+        ingest_sources(
+            sources,
+            COLLECTION_NAME,
+            manifest,
+            manifest_path,
+            versions,
+            os.path.join(JOURNAL_DIR, f"{COLLECTION_NAME}-s3upload.jsonl"),
+            use_cache=use_cache,
+            summary_backend=summary_backend,
+            dedup=dedup,
+            on_progress=on_progress,
+            doc_keys={name: source_doc_key(name) for name, _ in sources},
+            bucket=bucket_name,
+            prefixes=[prefix],
+        )
+        take_over_uploads(COLLECTION_NAME, manifest, {name: data_hash(data) for name, data in sources})
+    return stats
+
+
+def url_source_name(url: str, filename: Optional[str]) -> str:
+    """
+    URL 문서의 소스 이름 (manifest 키, 파서 선택, 문서 제목에 쓰임).
+    URL 경로가 .docx/.pdf로 끝나지 않으면 (download.php?id=3 등) 응답의 파일명을 fragment로 붙인다.
+    (제목은 fragment의 파일명, Point ID는 fragment 없는 URL로 만든다: src/rag/parse.source_filename, source_doc_key)
+    """
+    if urlparse(url).path.endswith((".docx", ".pdf")) or not filename:
+        return url
+    return f"{url}#{filename}"
+
+
+def _read_file(file_path: str) -> bytes:
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def refresh_urls(
+    urls: Optional[Iterable[str]] = None,
+    dev: bool = True,
+    download_dir: str = URL_DOWNLOAD_DIR,
+    max_workers: int = URL_REFRESH_CONCURRENCY,
+    session=None,
+    remove_missing: bool = False,
+    use_cache: bool = True,
+    summary_backend=None,
+    dedup: bool = DEDUP_ENABLED,
+    dry_run: bool = False,
+) -> dict:
+    """
+    원본 URL의 문서(.docx, .pdf)를 다시 내려받아, 바뀐 문서만 Qdrant 컬렉션에 다시 업로드한다.
+    - urls를 넘기지 않으면 이전에 업로드한 URL(MANIFEST_DIR/<컬렉션>-url.json)을 모두 다시 확인한다
+    - max_workers개의 URL을 동시에 요청하고, 지난번 응답의 ETag / Last-Modified로 조건부 요청을 보낸다
+      (304면 내려받지 않음, 200이어도 내용 hash가 같으면 바뀌지 않은 것으로 본다)
+    - 본문은 download_dir에 스트리밍으로 저장하고, 업로드할 때 파일을 하나씩 읽는다
+    - 바뀐 문서의 기존 Point는 삭제하고, remove_missing=True면 urls에 없는 URL의 Point도 삭제한다
+    - dry_run=True면 내려받아 비교만 하고 컬렉션과 manifest는 바꾸지 않는다
+    session에 requests.Session을 넘기면 그 세션으로 요청한다. (로컬 HTTP 서버로 테스트할 때 등)
+    반환값: {"new", "changed", "unchanged", "removed", "failed"} 개수
+    """
+    COLLECTION_NAME = POSTECH_COLLECTION_EXP if dev else POSTECH_COLLECTION_PROD
+    manifest_path = os.path.join(MANIFEST_DIR, f"{COLLECTION_NAME}-url.json")
+    manifest = load_manifest(manifest_path)
+    # URL → manifest 키 (키에 파일명 fragment가 붙은 경우가 있으므로 entry의 url, 없으면 fragment를 뺀 키로 찾는다)
+    keys = {entry.get("url") or normalize_url(key): key for key, entry in manifest.items()}
+    # 대소문자, 기본 포트, fragment만 다른 URL은 같은 문서로 본다
+    urls = list(dict.fromkeys(normalize_url(url) for url in urls)) if urls is not None else list(keys)
+
+    def _fetch(url: str) -> dict:
+        entry = manifest.get(keys.get(url), {})
+        file_path = os.path.join(download_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        result = fetch_url(url, file_path, entry.get("etag"), entry.get("last_modified"), session=session)
+        result["path"] = file_path
+        return result
+
+    # 1. URL들을 동시에 조건부 요청
+    diff = {"new": [], "changed": [], "unchanged": [], "removed": [], "failed": {}}
+    fetched, hashes = {}, {}
+    with ThreadPoolExecutor(max_workers=max(min(max_workers, len(urls)), 1)) as executor:
+        futures = {executor.submit(_fetch, url): url for url in urls}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Checking URLs...", unit="url"):
+            url = futures[future]
             try:
-                qdrant_client.upsert(
-                    collection_name=COLLECTION_NAME,
-                    points=batch_points
-                )
-                pbar.update(len(batch_points))
-            except:
-                # 만약 대량 업서트에서 에러 발생 시, 5개씩 잘라서 업서트
-                for small_start_idx in range(0, len(batch_points), 5):
-                    small_batch = batch_points[small_start_idx : small_start_idx + 5]
-                    qdrant_client.upsert(
-                        collection_name=COLLECTION_NAME,
-                        points=small_batch
-                    )
-                    pbar.update(len(small_batch))
+                result = future.result()
+            except Exception:
+                diff["failed"][url] = traceback.format_exc(limit=3)
+                continue
+            fetched[url] = result
+
+            key = keys.get(url)
+            if not result["modified"]:
+                diff["unchanged"].append(url)
+                continue
+            name = url_source_name(url, result["filename"])
+            if not name.endswith((".docx", ".pdf")):
+                diff["failed"][url] = f"지원하지 않는 파일 형식입니다: {result['filename']}"
+                continue
+            hashes[name] = result["hash"]
+            if key is None:
+                diff["new"].append(url)
+            elif key != name or manifest[key]["hash"] != result["hash"]:
+                diff["changed"].append(url)
+            else:
+                diff["unchanged"].append(url)
+
+    if remove_missing:
+        requested = set(urls)
+        diff["removed"] = [url for url in keys if url not in requested]
+    stats = {key: len(diff[key]) for key in ("new", "changed", "unchanged", "removed", "failed")}
+    print(
+        f"URL 갱신: 신규 {stats['new']}개 / 변경 {stats['changed']}개 / 유지 {stats['unchanged']}개 / "
+        f"삭제 {stats['removed']}개 / 실패 {stats['failed']}개"
+    )
+    for url, error in diff["failed"].items():
+        print(f"  실패: {url}\n{error}")
+    if dry_run:
+        return stats
+
+    # 2. 바뀐 문서, 빠진 URL의 기존 Point 삭제
+    stale = [keys[url] for url in diff["changed"] + diff["removed"]]
+    if stale:
+        n_deleted = delete_file_points(COLLECTION_NAME, manifest, stale)
+        save_manifest(manifest_path, manifest)
+        print(f"기존 Point {n_deleted}개 삭제")
+
+    # 3. 새 문서, 바뀐 문서를 내려받은 파일에서 하나씩 읽어 업로드
+    sources = []
+    for url in diff["new"] + diff["changed"]:
+        result = fetched[url]
+        sources.append((url_source_name(url, result["filename"]), functools.partial(_read_file, result["path"])))
+    if sources:
+        ingest_sources(
+            sources,
+            COLLECTION_NAME,
+            manifest,
+            manifest_path,
+            hashes,
+            os.path.join(JOURNAL_DIR, f"{COLLECTION_NAME}-urlrefresh.jsonl"),
+            use_cache=use_cache,
+            summary_backend=summary_backend,
+            dedup=dedup,
+            # 파일명이 아니라 URL로 Point ID를 만든다 (다른 호스트의 같은 파일명, 로컬 업로드와 구분)
+            doc_keys={name: source_doc_key(url) for url, (name, _) in zip(diff["new"] + diff["changed"], sources)},
+            urls=len(urls),
+        )
+
+    # 4. 다음 조건부 요청에 쓸 ETag / Last-Modified 기록 (업로드에 실패한 문서는 manifest에 없으므로 다음에 다시 받음)
+    for url, result in fetched.items():
+        key = keys.get(url) if not result["modified"] else url_source_name(url, result["filename"])
+        if key in manifest:
+            manifest[key].update(url=url, etag=result["etag"], last_modified=result["last_modified"])
+    save_manifest(manifest_path, manifest)
+    return stats
+
+
+def export_batch(db_path: str, job_name: str, summary_backend=None) -> dict:
+    """
+    실시간 API 호출 대신 OpenAI Batch API로 임베딩/요약을 처리하기 위해
+    요청 파일(JSONL)을 만들고 제출한다. (대량 backfill 용)
+    이미 요청 파일이 만들어진 작업이면 파싱을 건너뛰고, 미제출 파일만 제출한다.
+    gpt가 아닌 요약 backend를 쓰는 문서는 여기서 바로 요약해 payload에 넣는다.
+    """
+    job_dir = os.path.join(BATCH_DIR, job_name)
+
+    if not batch_job_exists(job_dir):
+        paths_list = list_files(db_path)
+        docs_list = load_documents(paths_list)
+
+        units = make_units(docs_list, summary_backend)
+        local_units = [u for u in units if u["summary_backend"] != "gpt"]
+
+        if local_units:
+            local_summaries = asyncio.run(
+                async_summarize([u["body"] for u in local_units], [u["summary_backend"] for u in local_units])
+            )
+            for unit, summ in zip(local_units, local_summaries):
+                unit["payload"]["summary"] = summ.model_dump()
+
+        # 업서트가 끝난 파일을 증분 업로드 manifest에 기록할 수 있도록 파일 hash를 함께 저장
+        write_batch_requests(units, job_dir, hashes={path: file_hash(path) for path in paths_list})
+
+    return submit_batch_job(job_dir)
+
+
+def import_batch(job_name: str, dev: bool = True):
+    """
+    export_batch로 제출한 작업의 결과 파일을 내려받아 Qdrant에 업서트한다.
+    아직 끝나지 않은 batch가 있으면 None을 반환하며, 나중에 다시 호출하면 된다.
+    실패/만료/취소된 batch의 요청 파일은 다시 제출한다.
+    batch는 끝났지만 개별 요청이 실패했거나 요약 응답이 잘못된 청크는 업서트 전에 실시간 API로 다시 처리한다.
+    업서트가 끝난 파일은 증분 업로드 manifest(MANIFEST_DIR/<컬렉션>.json)에 기록하므로,
+    이후 upload()는 같은 파일을 다시 올리지 않는다.
+    """
+    COLLECTION_NAME = POSTECH_COLLECTION_EXP if dev else POSTECH_COLLECTION_PROD
+    job_dir = os.path.join(BATCH_DIR, job_name)
+
+    if not collect_batch_job(job_dir):
+        resubmit = needs_resubmit(job_dir)
+        if resubmit:
+            print(f"실패/만료/취소된 batch를 다시 제출합니다: {resubmit}")
+            submit_batch_job(job_dir)
+        print("아직 완료되지 않은 batch가 있습니다. 나중에 다시 실행해 주세요.")
+        return None
+
+    stats = upsert_batch_results(job_dir, COLLECTION_NAME)
+    print(f"Batch 업서트 결과: {stats}")
+
+    # manifest 갱신 (내용이 바뀐 파일의 이전 Point 중 새 Point와 겹치지 않는 것은 삭제)
+    manifest_path = os.path.join(MANIFEST_DIR, f"{COLLECTION_NAME}.json")
+    manifest = load_manifest(manifest_path)
+    entries = upserted_manifest_entries(job_dir)
+    stale_ids = []
+    for path, entry in entries.items():
+        previous = manifest.get(path)
+        if previous and previous["hash"] != entry["hash"]:
+            stale_ids.extend(set(previous["point_ids"]) - set(entry["point_ids"]))
+    delete_points(COLLECTION_NAME, stale_ids)
+    manifest.update(entries)
+    save_manifest(manifest_path, manifest)
+    stats["manifest"] = len(entries)
+    return stats
 
 
 if __name__ == "__main__":
     # 예시 실행
     # 1) recreate=True => 컬렉션 재생성, 그리고 업로드
-    #    이 경우에도 ID는 항상 0부터 다시 시작
     # upload(db_path="db/uploaded", recreate=True, dev=False)
 
     # 2) update => 이미 컬렉션에 데이터가 있는 경우
-    #    새로 업로드될 문서들의 doc_id는 기존 max_id // 1000 + 1부터
-    upload(db_path="/Users/huhchaewon/data/ 2.mbox", recreate=False, dev=False)
\ No newline at end of file
+    #    Point ID는 문서 고유 키로 정해지므로, 이미 올라간 문서는 덮어쓰기 된다
+    upload(db_path="/Users/huhchaewon/data/ 2.mbox", recreate=False, dev=False)
+    #    요약을 LLM 없이 추출 요약으로 대체하려면 summary_backend를 지정
+    # upload(db_path="/Users/huhchaewon/data/ 2.mbox", dev=False, summary_backend={"mbox": "textrank"})
+
+    # 3) batch => 대량 backfill은 Batch API로 처리 (요청 파일 생성/제출 후, 완료되면 업서트)
+    # export_batch(db_path="/Users/huhchaewon/data/ 2.mbox", job_name="mbox-2024")
+    # import_batch(job_name="mbox-2024", dev=False)
+
+    # 4) S3 동기화 => 버킷의 uploaded/, final/ 아래 문서 중 바뀐 것만 반영 (삭제된 객체의 Point도 삭제)
+    # sync_s3(dev=False)
+
+    # 5) 원본 URL 갱신 => 이전에 올린 URL 문서를 조건부 요청으로 다시 확인해 바뀐 것만 반영
+    # refresh_urls(["https://example.com/notice.pdf"], dev=False)
+    # refresh_urls(dev=False)
\ No newline at end of file